@@ -0,0 +1,169 @@
+"""
+Fixtures for the offline benchmark suite.
+
+Each benchmark measures one operation with the ``bench`` fixture, which
+records the best wall time over a few rounds and, for operations that talk to
+the mock PDS, how many requests they made. Results are compared against
+``baselines.json``: a benchmark fails when it makes more requests than its
+baseline, or when it runs slower than its baseline wall time by more than the
+``--bench-tolerance`` factor. Wall times vary between machines far more than
+request counts do, so the default factor is generous and benchmarks whose
+baseline is too short to time reliably are not timed. Run with
+``--update-baselines`` to record new baselines instead, for example on the
+machine that later runs with a tighter ``--bench-tolerance``.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+from mock_pds import HANDLE, MockPDS
+
+from bluesky_social.scheduler import RequestScheduler
+from bluesky_social.transport import HttpPool, create_client
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# Wall times may exceed their baseline by this factor before a benchmark
+# fails; generous, since baselines are often recorded on another machine
+DEFAULT_TOLERANCE = 3.0
+
+# Baselines faster than this are too noisy to check against any tolerance
+MIN_TIMED_SECONDS = 0.01
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--update-baselines",
+        action="store_true",
+        help="Record the measured results as the new baselines",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=float(os.environ.get("BENCH_TOLERANCE", DEFAULT_TOLERANCE)),
+        help="Allowed slowdown factor over the baseline wall time "
+        f"(default: {DEFAULT_TOLERANCE}); 0 disables wall time checks",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=3,
+        help="Rounds per benchmark; the fastest one is reported",
+    )
+
+
+class Bench:
+    """Measures benchmarks and checks them against the stored baselines."""
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.update = config.getoption("--update-baselines")
+        self.tolerance = config.getoption("--bench-tolerance")
+        self.rounds = config.getoption("--bench-rounds")
+        self.baselines: dict[str, dict[str, Any]] = (
+            json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+        )
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def measure(
+        self,
+        name: str,
+        operation: Callable[[], Any],
+        pds: Optional[MockPDS] = None,
+        rounds: Optional[int] = None,
+        setup: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Run an operation several times and check the fastest run.
+
+        Args:
+            name: Baseline key for this benchmark
+            operation: Called with no arguments once per round
+            pds: Mock server whose request count is checked, if any
+            rounds: Overrides ``--bench-rounds``
+            setup: Called before each round, outside the timing, to reset
+                caches the operation would otherwise warm for later rounds
+
+        Returns:
+            The operation's result from the last round
+        """
+        best = float("inf")
+        requests = None
+        result = None
+        for _ in range(rounds or self.rounds):
+            if setup is not None:
+                setup()
+            if pds is not None:
+                pds.reset_counts()
+            started = time.perf_counter()
+            result = operation()
+            best = min(best, time.perf_counter() - started)
+            if pds is not None:
+                requests = sum(pds.requests.values())
+
+        measured: dict[str, Any] = {"seconds": round(best, 4)}
+        if requests is not None:
+            measured["requests"] = requests
+        self.results[name] = measured
+        if not self.update:
+            self.check(name, measured)
+        return result
+
+    def check(self, name: str, measured: dict[str, Any]) -> None:
+        baseline = self.baselines.get(name)
+        if baseline is None:
+            pytest.fail(f"No baseline for {name}; run with --update-baselines")
+        if "requests" in baseline:
+            assert measured["requests"] <= baseline["requests"], (
+                f"{name} made {measured['requests']} requests, "
+                f"baseline is {baseline['requests']}"
+            )
+        if self.tolerance and baseline["seconds"] >= MIN_TIMED_SECONDS:
+            limit = baseline["seconds"] * self.tolerance
+            assert measured["seconds"] <= limit, (
+                f"{name} took {measured['seconds']:.4f}s, "
+                f"baseline is {baseline['seconds']:.4f}s (limit {limit:.4f}s)"
+            )
+
+    def save(self) -> None:
+        baselines = {**self.baselines, **self.results}
+        BASELINES_PATH.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+        )
+
+
+@pytest.fixture(scope="session")
+def bench(request: pytest.FixtureRequest):
+    recorder = Bench(request.config)
+    yield recorder
+    if recorder.update and recorder.results:
+        recorder.save()
+
+
+@pytest.fixture(scope="session")
+def pool():
+    with HttpPool() as shared:
+        yield shared
+
+
+@pytest.fixture
+def pds_client(pool):
+    """Return a factory for a mock PDS and a client logged in to it."""
+    servers = []
+
+    def start(**options: Any):
+        pds = MockPDS(**options).start()
+        servers.append(pds)
+        # Retries back off quickly so error scenarios measure round trips
+        scheduler = RequestScheduler(base_delay=0.001, max_delay=0.01)
+        client = create_client(pds.url, pool=pool, scheduler=scheduler)
+        client.login(HANDLE, "password")
+        return pds, client
+
+    yield start
+    for pds in servers:
+        pds.stop()
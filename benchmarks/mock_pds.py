@@ -0,0 +1,284 @@
+"""
+A local stand-in for a BlueSky PDS, for offline benchmarks.
+
+``MockPDS`` serves the XRPC methods the package uses from a background HTTP
+server on 127.0.0.1, with generated data and configurable latency, page size
+limit and transient error rate. It counts requests per method so benchmarks
+can check how many round trips an operation takes as well as how long.
+"""
+
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+DID = "did:plc:benchmarkaccount"
+HANDLE = "bench.test"
+CREATED_AT = "2024-01-01T00:00:00.000Z"
+CID = "bafyreie5737gdxlw5i64vzichcalba3z2v5n6icifvx5xytvske7mr3hpm"
+BLOB_CID = "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"
+
+
+def _jwt(subject: str) -> str:
+    """An unsigned token the client can read its expiry from."""
+
+    def part(value: dict[str, Any]) -> str:
+        raw = json.dumps(value).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    now = int(time.time())
+    payload = {"sub": subject, "iat": now, "exp": now + 3600, "scope": "access"}
+    return f"{part({'alg': 'none'})}.{part(payload)}.sig"
+
+
+def _author(n: int) -> dict[str, Any]:
+    return {"did": f"did:plc:user{n}", "handle": f"user{n}.test"}
+
+
+def _timestamp(n: int) -> str:
+    """Timestamps count down with ``n``, so item 0 is the newest."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(1_700_000_000 - n * 60))
+
+
+def _post(uri: str, author: dict[str, Any], text: str, replies: int, n: int) -> Any:
+    return {
+        "uri": uri,
+        "cid": CID,
+        "author": author,
+        "record": {
+            "$type": "app.bsky.feed.post",
+            "text": text,
+            "createdAt": CREATED_AT,
+        },
+        "indexedAt": _timestamp(n),
+        "replyCount": replies,
+    }
+
+
+class MockPDS:
+    """
+    A threaded local XRPC server with generated notifications and posts.
+
+    Notification ``n`` is a reply from ``user{n}`` when ``n`` is even and a
+    like otherwise. Every third reply has a reply of its own, and every
+    sixth is answered by the benchmark account.
+
+    Args:
+        notifications: Number of notifications the account has
+        latency: Seconds each request takes before it is answered
+        page_limit: Largest page the server returns, whatever was asked for
+        error_rate: Fraction of requests answered with a 503
+        seed: Seed for choosing which requests fail
+    """
+
+    def __init__(
+        self,
+        notifications: int = 100,
+        latency: float = 0.0,
+        page_limit: int = 100,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.notifications = notifications
+        self.latency = latency
+        self.page_limit = page_limit
+        self.error_rate = error_rate
+        self.requests: Counter[str] = Counter()
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._records = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/xrpc"
+
+    def start(self) -> "MockPDS":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockPDS":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.errors = 0
+
+    # Generated data
+
+    def _notification(self, n: int) -> dict[str, Any]:
+        reply = n % 2 == 0
+        return {
+            "uri": f"at://did:plc:user{n}/app.bsky.feed.post/{n}",
+            "cid": CID,
+            "author": _author(n),
+            "reason": "reply" if reply else "like",
+            "record": {
+                "$type": "app.bsky.feed.post",
+                "text": f"Reply number {n}",
+                "createdAt": CREATED_AT,
+            },
+            "isRead": False,
+            "indexedAt": _timestamp(n),
+        }
+
+    def _reply_count(self, uri: str) -> int:
+        n = int(uri.rsplit("/", 1)[-1])
+        return 1 if n % 3 == 0 else 0
+
+    def _post_thread(self, uri: str) -> dict[str, Any]:
+        n = int(uri.rsplit("/", 1)[-1])
+        root = _post(uri, _author(n), f"Reply number {n}", self._reply_count(uri), n)
+        replies = []
+        if self._reply_count(uri):
+            me = {"did": DID, "handle": HANDLE}
+            other = _author(n + 1)
+            author = me if n % 6 == 0 else other
+            replies.append(
+                {
+                    "$type": "app.bsky.feed.defs#threadViewPost",
+                    "post": _post(f"{uri}1", author, "Thanks!", 0, n),
+                }
+            )
+        return {
+            "thread": {
+                "$type": "app.bsky.feed.defs#threadViewPost",
+                "post": root,
+                "replies": replies,
+            }
+        }
+
+    # Request handling
+
+    def respond(
+        self, nsid: str, params: dict[str, Any], body: Optional[dict[str, Any]]
+    ) -> tuple[int, dict[str, Any]]:
+        """Return the status and JSON body for one XRPC call."""
+        if nsid == "com.atproto.server.createSession":
+            return 200, {
+                "did": DID,
+                "handle": HANDLE,
+                "accessJwt": _jwt(DID),
+                "refreshJwt": _jwt(DID),
+            }
+        if nsid == "app.bsky.actor.getProfile":
+            return 200, {"did": DID, "handle": HANDLE}
+        if nsid == "app.bsky.notification.listNotifications":
+            limit = min(int(params.get("limit", 50)), self.page_limit)
+            start = int(params.get("cursor") or 0)
+            end = min(start + limit, self.notifications)
+            page = {"notifications": [self._notification(n) for n in range(start, end)]}
+            if end < self.notifications:
+                page["cursor"] = str(end)
+            return 200, page
+        if nsid == "app.bsky.feed.getPosts":
+            uris = params.get("uris", [])
+            posts = [
+                _post(uri, {"did": "did:plc:x", "handle": "x.test"}, "", 0, 0)
+                | {"replyCount": self._reply_count(uri)}
+                for uri in uris
+            ]
+            return 200, {"posts": posts}
+        if nsid == "app.bsky.feed.getPostThread":
+            return 200, self._post_thread(params["uri"])
+        if nsid == "app.bsky.actor.getProfiles":
+            return 200, {
+                "profiles": [
+                    {"did": f"did:plc:{actor.split('.')[0]}", "handle": actor}
+                    for actor in params.get("actors", [])
+                ]
+            }
+        if nsid == "com.atproto.repo.uploadBlob":
+            return 200, {
+                "blob": {
+                    "$type": "blob",
+                    "ref": {"$link": BLOB_CID},
+                    "mimeType": "image/jpeg",
+                    "size": 1,
+                }
+            }
+        if nsid == "com.atproto.repo.createRecord":
+            with self._lock:
+                self._records += 1
+                rkey = self._records
+            uri = f"at://{DID}/app.bsky.feed.post/{rkey}"
+            return 200, {"uri": uri, "cid": CID}
+        if nsid == "com.atproto.repo.applyWrites":
+            results = []
+            for write in (body or {}).get("writes", []):
+                uri = f"at://{DID}/{write['collection']}/{write['rkey']}"
+                results.append(
+                    {
+                        "$type": "com.atproto.repo.applyWrites#createResult",
+                        "uri": uri,
+                        "cid": CID,
+                    }
+                )
+            return 200, {"commit": {"cid": CID, "rev": "rev"}, "results": results}
+        return 400, {"error": "MethodNotImplemented", "message": nsid}
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        pds = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this each
+            # response waits on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _serve(self, body: Optional[dict[str, Any]]) -> None:
+                url = urlparse(self.path)
+                nsid = url.path.rsplit("/", 1)[-1]
+                params: dict[str, Any] = {
+                    key: values if key in ("uris", "actors") else values[0]
+                    for key, values in parse_qs(url.query).items()
+                }
+                with pds._lock:
+                    pds.requests[nsid] += 1
+                    fail = pds._random.random() < pds.error_rate
+                    pds.errors += fail
+                if pds.latency:
+                    time.sleep(pds.latency)
+                if fail:
+                    status, payload = 503, {"error": "Unavailable"}
+                else:
+                    status, payload = pds.respond(nsid, params, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                self._serve(None)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                body = None
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    body = json.loads(raw or b"{}")
+                self._serve(body)
+
+        return Handler
@@ -0,0 +1,20 @@
+import pytest
+
+from bluesky_social.batch import post_many
+from bluesky_social.resolver import _shared_memory
+
+
+@pytest.mark.parametrize("count", [10, 100])
+def test_post_many(bench, pds_client, count):
+    pds, client = pds_client()
+    items = [
+        {"text": f"Post {n} for @user{n}.test #bench https://example.com/{n}"}
+        for n in range(count)
+    ]
+    results = bench.measure(
+        f"batch.post_many[{count}]",
+        lambda: post_many(client, items),
+        pds,
+        setup=_shared_memory.clear,
+    )
+    assert [result["error"] for result in results] == [None] * count
@@ -0,0 +1,40 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from bluesky_social.image_utils import encode_jpeg, encode_to_budget
+
+SIZES = [(640, 480), (2048, 1536), (4032, 3024)]
+
+
+def make_image(size, mode, format):
+    """A noisy image, which compresses about as badly as a photo."""
+    width, height = size
+    noise = Image.effect_noise(size, 64).convert("L")
+    gradient = Image.linear_gradient("L").resize(size)
+    bands = {"RGB": 3, "RGBA": 4}[mode]
+    channels = [noise, gradient, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)]
+    img = Image.merge(mode, (channels + [gradient])[:bands])
+    buffer = BytesIO()
+    img.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("size", SIZES, ids=lambda size: "x".join(map(str, size)))
+@pytest.mark.parametrize(
+    "mode,format", [("RGB", "JPEG"), ("RGB", "PNG"), ("RGBA", "PNG")]
+)
+def test_encode_to_budget(bench, size, mode, format):
+    data = make_image(size, mode, format)
+    name = f"images.encode_to_budget[{format}-{mode}-{size[0]}x{size[1]}]"
+    result = bench.measure(name, lambda: encode_to_budget(data))
+    assert len(result["data"]) <= 1_000_000
+
+
+@pytest.mark.parametrize("size", SIZES, ids=lambda size: "x".join(map(str, size)))
+def test_encode_jpeg(bench, size):
+    data = make_image(size, "RGBA", "PNG")
+    name = f"images.encode_jpeg[PNG-RGBA-{size[0]}x{size[1]}]"
+    jpeg = bench.measure(name, lambda: encode_jpeg(data))
+    assert jpeg.startswith(b"\xff\xd8")
@@ -0,0 +1,35 @@
+import pytest
+
+from bluesky_social.notifications import get_notifications, list_unanswered_responses
+
+
+@pytest.mark.parametrize("count", [100, 1_000, 10_000])
+def test_notification_scan(bench, pds_client, count):
+    pds, client = pds_client(notifications=count)
+    notifications = bench.measure(
+        f"notifications.scan[{count}]", lambda: get_notifications(client), pds
+    )
+    assert len(notifications) == count
+
+
+@pytest.mark.parametrize("count", [100, 1_000, 10_000])
+def test_unanswered_responses(bench, pds_client, count):
+    pds, client = pds_client(notifications=count)
+    responses = bench.measure(
+        f"notifications.unanswered[{count}]",
+        lambda: list_unanswered_responses(client),
+        pds,
+    )
+    # Every even notification is a reply; one in six of those has an answer
+    replies = (count + 1) // 2
+    assert len(responses) == replies - len(range(0, count, 6))
+
+
+def test_unanswered_responses_with_transient_errors(bench, pds_client):
+    pds, client = pds_client(notifications=1_000, error_rate=0.05, seed=1)
+    responses = bench.measure(
+        "notifications.unanswered_errors[1000]",
+        lambda: list_unanswered_responses(client),
+        pds,
+    )
+    assert len(responses) == 500 - len(range(0, 1_000, 6))
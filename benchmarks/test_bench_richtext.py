@@ -0,0 +1,21 @@
+import pytest
+
+from bluesky_social.richtext import build_facets
+
+PARAGRAPH = (
+    "Café ☕ with @alice.test and @bob.example.com — see https://example.com/a?b=c "
+    "#日本語 #BlueSky 🎉🎉 naïve résumé @carol.test! https://bsky.app/profile/x "
+)
+
+
+def resolve(handles):
+    return {handle: f"did:plc:{handle.split('.')[0]}" for handle in handles}
+
+
+@pytest.mark.parametrize("repeats", [1, 100, 1_000])
+def test_build_facets(bench, repeats):
+    text = PARAGRAPH * repeats
+    facets = bench.measure(
+        f"richtext.build_facets[{repeats}]", lambda: build_facets(text, resolve)
+    )
+    assert len(facets) == 7 * repeats
@@ -4,16 +4,95 @@ BlueSky Social Media Client
 A Python library and CLI for interacting with the BlueSky social network.
 """
 
-from .auth import authenticate_bluesky, clear_credentials, get_credentials
-from .bluesky_core import detect_hashtags, post
-from .cli import main
-from .image_utils import convert_to_jpeg
-from .notifications import (
-    get_notifications,
-    get_responses,
-    list_posts_and_responses,
-    list_unanswered_responses,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# The public API is imported on first use (PEP 562), so importing the package
+# or running short CLI commands does not load atproto and Pillow up front
+_EXPORTS = {
+    "authenticate_bluesky": "auth",
+    "clear_credentials": "auth",
+    "get_credentials": "auth",
+    "post_many": "batch",
+    "read_batch_file": "batch",
+    "reply_all": "batch",
+    "BlobCache": "blob_cache",
+    "upload_blob_cached": "blob_cache",
+    "create_post_records": "bluesky_core",
+    "detect_hashtags": "bluesky_core",
+    "post": "bluesky_core",
+    "publish_post": "bluesky_core",
+    "publish_thread": "bluesky_core",
+    "main": "cli",
+    "convert_to_jpeg": "image_utils",
+    "encode_jpeg": "image_utils",
+    "encode_to_budget": "image_utils",
+    "Metrics": "metrics",
+    "instrumented": "metrics",
+    "serve_metrics": "metrics",
+    "get_notifications": "notifications",
+    "get_responses": "notifications",
+    "iter_author_feed": "notifications",
+    "iter_notification_infos": "notifications",
+    "iter_notifications": "notifications",
+    "iter_posts_and_responses": "notifications",
+    "iter_unanswered_responses": "notifications",
+    "list_posts_and_responses": "notifications",
+    "list_unanswered_responses": "notifications",
+    "sync_store": "notifications",
+    "RecordWriter": "output",
+    "write_records": "output",
+    "NotificationRecord": "records",
+    "PostSummary": "records",
+    "ResponseRecord": "records",
+    "IdentityResolver": "resolver",
+    "build_facets": "richtext",
+    "RequestScheduler": "scheduler",
+    "ScheduledRequest": "scheduler",
+    "NotificationStore": "store",
+    "iter_stream_replies": "stream",
+    "unanswered_from_stream": "stream",
+    "HttpPool": "transport",
+    "create_client": "transport",
+    "NotificationWatcher": "watch",
+    "watch_notifications": "watch",
+}
+
+if TYPE_CHECKING:
+    from .auth import authenticate_bluesky, clear_credentials, get_credentials
+    from .batch import post_many, read_batch_file, reply_all
+    from .blob_cache import BlobCache, upload_blob_cached
+    from .bluesky_core import (
+        create_post_records,
+        detect_hashtags,
+        post,
+        publish_post,
+        publish_thread,
+    )
+    from .cli import main
+    from .image_utils import convert_to_jpeg, encode_jpeg, encode_to_budget
+    from .metrics import Metrics, instrumented, serve_metrics
+    from .notifications import (
+        get_notifications,
+        get_responses,
+        iter_author_feed,
+        iter_notification_infos,
+        iter_notifications,
+        iter_posts_and_responses,
+        iter_unanswered_responses,
+        list_posts_and_responses,
+        list_unanswered_responses,
+        sync_store,
+    )
+    from .output import RecordWriter, write_records
+    from .records import NotificationRecord, PostSummary, ResponseRecord
+    from .resolver import IdentityResolver
+    from .richtext import build_facets
+    from .scheduler import RequestScheduler, ScheduledRequest
+    from .store import NotificationStore
+    from .stream import iter_stream_replies, unanswered_from_stream
+    from .transport import HttpPool, create_client
+    from .watch import NotificationWatcher, watch_notifications
 
 __version__ = "0.1.0"
 __author__ = "David Geddes"
@@ -22,7 +101,25 @@ __email__ = "dwgeddes@gmail.com"
 __all__ = [
     # Core functionality
     "post",
+    "publish_post",
+    "publish_thread",
+    "create_post_records",
     "detect_hashtags",
+    "build_facets",
+    "IdentityResolver",
+    # Request scheduling
+    "RequestScheduler",
+    "ScheduledRequest",
+    "HttpPool",
+    "create_client",
+    # Instrumentation
+    "Metrics",
+    "instrumented",
+    "serve_metrics",
+    # Batch posting
+    "post_many",
+    "read_batch_file",
+    "reply_all",
     # Authentication
     "authenticate_bluesky",
     "get_credentials",
@@ -30,10 +127,47 @@ __all__ = [
     # Notifications and responses
     "get_notifications",
     "get_responses",
+    "iter_notifications",
+    "iter_notification_infos",
+    "iter_unanswered_responses",
+    "iter_posts_and_responses",
+    "iter_author_feed",
     "list_posts_and_responses",
     "list_unanswered_responses",
+    # Records
+    "NotificationRecord",
+    "ResponseRecord",
+    "PostSummary",
+    # Structured output
+    "RecordWriter",
+    "write_records",
+    # Local store
+    "NotificationStore",
+    "sync_store",
+    # Watching
+    "NotificationWatcher",
+    "watch_notifications",
+    "iter_stream_replies",
+    "unanswered_from_stream",
     # Image utilities
     "convert_to_jpeg",
+    "encode_jpeg",
+    "encode_to_budget",
+    "BlobCache",
+    "upload_blob_cached",
     # CLI
     "main",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,223 @@
+"""
+Multi-account support for BlueSky.
+
+This module keeps a registry of accounts in the keyring, each with its own
+password and session entries, and runs one operation across many accounts
+at once. Every account gets its own client and request scheduler, so one
+account hitting its rate limit does not slow down the others, while all of
+them share a single HTTP connection pool.
+"""
+
+import json
+import logging
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypedDict
+
+import keyring
+
+from .auth import (
+    authenticate_bluesky,
+    clear_session,
+    persist_session,
+    resume_session,
+)
+from .config import ACCOUNTS_KEY, DEFAULT_MAX_ACCOUNTS, SERVICE_NAME
+from .metrics import instrumented
+
+if TYPE_CHECKING:
+    from atproto import Client
+
+    from .transport import HttpPool
+
+
+class AccountResult(TypedDict):
+    account: str
+    result: Any
+    error: Optional[Exception]
+    elapsed: float
+
+
+class AccountRegistry:
+    """
+    The accounts managed from this machine, stored in the keyring.
+
+    The list of usernames is one keyring entry; each account's password and
+    session live in the same per-username entries the single-account CLI
+    uses.
+
+    Args:
+        service_name: The service name to use in the keyring
+    """
+
+    def __init__(self, service_name: str = SERVICE_NAME) -> None:
+        self.service_name = service_name
+
+    @instrumented("keyring.accounts")
+    def _load(self) -> list[str]:
+        """Read the registered usernames, raising when the keyring fails."""
+        stored = keyring.get_password(self.service_name, ACCOUNTS_KEY)
+        return list(json.loads(stored)) if stored else []
+
+    def accounts(self) -> list[str]:
+        """Return the registered usernames, in the order they were added."""
+        try:
+            return self._load()
+        except Exception as e:
+            logging.error(f"Keyring access error: {e}", exc_info=True)
+            return []
+
+    def _save(self, accounts: list[str]) -> None:
+        keyring.set_password(self.service_name, ACCOUNTS_KEY, json.dumps(accounts))
+
+    def add(self, username: str, password: Optional[str] = None) -> None:
+        """
+        Register an account, storing its password when one is given.
+
+        Args:
+            username: The account's handle
+            password: Optional password, typically an app password
+
+        Raises:
+            Exception: If the keyring cannot be read or written; the stored
+                list is left as it was
+        """
+        # Never rewrite the list from a failed read, which would drop accounts
+        accounts = self._load()
+        if password is not None:
+            keyring.set_password(self.service_name, username, password)
+        if username not in accounts:
+            self._save(accounts + [username])
+
+    def remove(self, username: str) -> bool:
+        """
+        Unregister an account and delete its stored password and session.
+
+        Returns:
+            True if the account was registered
+
+        Raises:
+            Exception: If the list of accounts cannot be read or written
+        """
+        accounts = self._load()
+        if username not in accounts:
+            return False
+        self._save([account for account in accounts if account != username])
+        try:
+            if keyring.get_password(self.service_name, username):
+                keyring.delete_password(self.service_name, username)
+        except Exception as e:
+            logging.error(f"Could not remove password: {e}", exc_info=True)
+        clear_session(self.service_name, username)
+        return True
+
+    def login(self, username: str, pool: Optional["HttpPool"] = None) -> "Client":
+        """
+        Return a client authenticated as one account.
+
+        The stored session is resumed when possible; otherwise the stored
+        password is used, and the new session is saved for next time.
+
+        Args:
+            username: A registered account
+            pool: Connection pool to use; defaults to the process-wide pool
+
+        Returns:
+            An authenticated client with its own request scheduler
+
+        Raises:
+            ValueError: If no session or password is stored for the account
+        """
+        # Registry commands only need the keyring, so atproto loads on first login
+        from .transport import create_client
+
+        client = create_client(pool=pool)
+        persist_session(client, self.service_name, username)
+        if not resume_session(client, self.service_name, username):
+            password = keyring.get_password(self.service_name, username)
+            if not password:
+                raise ValueError(f"No stored password for {username}")
+            authenticate_bluesky(client, username, password)
+        return client
+
+
+def run_for_accounts(
+    registry: AccountRegistry,
+    operation: Callable[["Client"], Any],
+    accounts: Optional[Iterable[str]] = None,
+    max_accounts: int = DEFAULT_MAX_ACCOUNTS,
+    pool: Optional["HttpPool"] = None,
+) -> list[AccountResult]:
+    """
+    Log in to many accounts and run one operation for each, concurrently.
+
+    A failure in one account, whether logging in or running the operation,
+    is recorded in its result and does not affect the others.
+
+    Args:
+        registry: Where the accounts' credentials are stored
+        operation: Called with each account's authenticated client
+        accounts: Usernames to run for; defaults to every registered account
+        max_accounts: Maximum number of accounts processed at once
+        pool: Connection pool shared by the accounts' clients
+
+    Returns:
+        One result per account, in the order the accounts were given
+    """
+    from .transport import shared_pool
+
+    usernames = list(accounts) if accounts is not None else registry.accounts()
+    pool = pool or shared_pool()
+
+    def run(username: str) -> AccountResult:
+        started = time.monotonic()
+        try:
+            result = operation(registry.login(username, pool))
+            error = None
+        except Exception as e:
+            logging.error(f"{username}: {e}", exc_info=True)
+            result, error = None, e
+        return {
+            "account": username,
+            "result": result,
+            "error": error,
+            "elapsed": time.monotonic() - started,
+        }
+
+    if not usernames:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_accounts, len(usernames))) as executor:
+        return list(executor.map(run, usernames))
+
+
+def format_report(results: list[AccountResult], noun: str = "items") -> str:
+    """
+    Summarize per-account results in one report.
+
+    Results that are lists are counted; anything else is shown as is.
+
+    Args:
+        results: Results from ``run_for_accounts``
+        noun: What list results contain, such as "notifications"
+
+    Returns:
+        One line per account followed by a totals line
+    """
+    lines = []
+    total = 0
+    failed = 0
+    for entry in results:
+        prefix = f"{entry['account']} ({entry['elapsed']:.1f}s)"
+        if entry["error"] is not None:
+            failed += 1
+            lines.append(f"{prefix}: failed: {entry['error']}")
+        elif isinstance(entry["result"], list):
+            total += len(entry["result"])
+            lines.append(f"{prefix}: {len(entry['result'])} {noun}")
+        else:
+            lines.append(f"{prefix}: {entry['result']}")
+    summary = f"{len(results)} accounts, {failed} failed"
+    if any(isinstance(entry["result"], list) for entry in results):
+        summary += f", {total} {noun} in total"
+    return "\n".join(lines + [summary])
@@ -0,0 +1,558 @@
+"""
+Asynchronous BlueSky API built on ``atproto.AsyncClient``.
+
+The functions here mirror their synchronous namesakes in ``bluesky_core`` and
+``notifications`` and share their parsing and record-building code, so one
+event loop can drive many accounts at once. Concurrent requests are bounded
+with a semaphore instead of a thread pool, and CPU-bound image re-encoding
+runs in a worker thread so it does not block the loop.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Iterable, Sequence
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from atproto import AsyncClient, models
+from atproto_client.models.blob_ref import BlobRef
+
+from .blob_cache import BlobCache, sha256_hex
+from .bluesky_core import (
+    ReplyRef,
+    build_post_record,
+    prepare_image,
+    validate_text,
+)
+from .config import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_THREAD_DEPTH,
+    MAX_IMAGES_PER_POST,
+    MAX_POSTS_PER_REQUEST,
+)
+from .image_utils import ImageSource, as_image_list
+from .notifications import (
+    ThreadResult,
+    advance_marker,
+    feed_item_past,
+    needs_thread,
+    newest_timestamp,
+    notification_info,
+    notification_past,
+    post_info,
+    post_summary,
+    replied_uris,
+    thread_replies,
+    unanswered_in_batch,
+)
+from .pagination import Timestamp, achunked, chunked, parse_timestamp
+from .records import NotificationRecord, PostSummary, ResponseRecord
+from .resolver import IdentityResolver, ProfileInfo
+from .richtext import build_facets, find_handles
+from .store import NotificationStore
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def _bounded(
+    items: Iterable[T], limit: int, fetch: Callable[[T], Awaitable[R]]
+) -> list[R]:
+    """Await ``fetch`` for every item with at most ``limit`` in flight."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await fetch(item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
+
+
+async def paginate(
+    fetch_page: Callable[[Optional[str]], Awaitable[Any]],
+    items_attr: str,
+    prefetch: bool = True,
+) -> AsyncGenerator[Any, None]:
+    """
+    Iterate over every item of a cursor-paginated endpoint.
+
+    Args:
+        fetch_page: Coroutine function taking a cursor (None for the first
+            page) and returning a response with a ``cursor`` attribute
+        items_attr: Name of the response attribute holding the page items
+        prefetch: Request the next page while the current page is consumed
+
+    Yields:
+        Items from each page in order, until the server stops returning a
+        cursor or returns an empty page
+    """
+    pending: Optional[asyncio.Future[Any]] = None
+    try:
+        page = await fetch_page(None)
+        previous_cursor = None
+        while True:
+            items = getattr(page, items_attr, None) or []
+            cursor = getattr(page, "cursor", None)
+            if not items or not cursor or cursor == previous_cursor:
+                for item in items:
+                    yield item
+                return
+            previous_cursor = cursor
+            if prefetch:
+                pending = asyncio.ensure_future(fetch_page(cursor))
+            for item in items:
+                yield item
+            page = await (pending or fetch_page(cursor))
+            pending = None
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def fetch_threads(
+    client: AsyncClient,
+    uris: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[ThreadResult]:
+    """
+    Fetch post threads concurrently, at most ``max_workers`` at a time.
+
+    Returns:
+        One result per URI, in the same order as ``uris``. A failed lookup
+        has ``thread`` set to None and the exception stored in ``error``.
+    """
+
+    async def fetch(uri: str) -> ThreadResult:
+        try:
+            thread = await client.app.bsky.feed.get_post_thread(
+                {"uri": uri, "depth": depth, "parent_height": 0}
+            )
+            return {"uri": uri, "thread": thread, "error": None}
+        except Exception as e:
+            logging.error(f"Error fetching thread {uri}: {e}", exc_info=True)
+            return {"uri": uri, "thread": None, "error": e}
+
+    return await _bounded(uris, max_workers, fetch)
+
+
+async def fetch_posts(
+    client: AsyncClient, uris: Iterable[str], max_workers: int = DEFAULT_MAX_WORKERS
+) -> dict[str, Any]:
+    """
+    Hydrate posts in bulk with ``app.bsky.feed.getPosts``.
+
+    Returns:
+        Post views keyed by URI. Deleted or unavailable posts, and posts of
+        failed batches, are missing.
+    """
+
+    async def fetch(batch: list[str]) -> list[Any]:
+        try:
+            return list((await client.app.bsky.feed.get_posts({"uris": batch})).posts)
+        except Exception as e:
+            logging.warning(f"Error fetching {len(batch)} posts: {e}")
+            return []
+
+    batches = list(chunked(dict.fromkeys(uris), MAX_POSTS_PER_REQUEST))
+    results = await _bounded(batches, max_workers, fetch)
+    return {post.uri: post for posts in results for post in posts}
+
+
+async def iter_notifications(
+    client: AsyncClient,
+    since: Optional[Timestamp] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: bool = True,
+) -> AsyncGenerator[Any, None]:
+    """Iterate over notifications, newest first, following the cursor lazily."""
+    cutoff = parse_timestamp(since) if since is not None else None
+    pages = paginate(
+        lambda cursor: client.app.bsky.notification.list_notifications(
+            {"limit": page_size, "cursor": cursor}
+        ),
+        "notifications",
+        prefetch,
+    )
+    try:
+        async for notification in pages:
+            if notification_past(notification, cutoff):
+                return
+            yield notification
+    finally:
+        await pages.aclose()
+
+
+async def iter_author_feed(
+    client: AsyncClient,
+    actor: Optional[str] = None,
+    since: Optional[Timestamp] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: bool = True,
+) -> AsyncGenerator[Any, None]:
+    """Iterate over an author's feed, newest first, following the cursor lazily."""
+    cutoff = parse_timestamp(since) if since is not None else None
+    actor = actor or client.me.handle
+    pages = paginate(
+        lambda cursor: client.app.bsky.feed.get_author_feed(
+            {"actor": actor, "limit": page_size, "cursor": cursor}
+        ),
+        "feed",
+        prefetch,
+    )
+    try:
+        async for item in pages:
+            if feed_item_past(item, cutoff):
+                return
+            yield item
+    finally:
+        await pages.aclose()
+
+
+async def _sync_items(
+    store: NotificationStore,
+    account: str,
+    key: str,
+    items: AsyncIterator[Any],
+    add: Callable[[str, list[Any]], int],
+    timestamp: Callable[[Any], Optional[str]],
+) -> int:
+    """Write items to the store page by page, then advance the sync marker."""
+    added = 0
+    newest = None
+    async for page in achunked(items, DEFAULT_PAGE_SIZE):
+        newest = newest_timestamp(page, timestamp, newest)
+        added += add(account, page)
+    advance_marker(store, account, key, newest)
+    return added
+
+
+async def sync_store(client: AsyncClient, store: NotificationStore) -> tuple[int, int]:
+    """
+    Pull notifications and authored posts newer than the last sync into a store.
+
+    Returns:
+        The number of notifications and posts written
+    """
+    account = client.me.did
+    notifications = await _sync_items(
+        store,
+        account,
+        "notifications_indexed_at",
+        iter_notifications(
+            client, since=store.get_state(account, "notifications_indexed_at")
+        ),
+        store.add_notifications,
+        lambda notification: getattr(notification, "indexed_at", None),
+    )
+    posts = await _sync_items(
+        store,
+        account,
+        "feed_indexed_at",
+        iter_author_feed(client, since=store.get_state(account, "feed_indexed_at")),
+        store.add_posts,
+        lambda item: getattr(getattr(item, "post", None), "indexed_at", None),
+    )
+    logging.info(f"Synced {notifications} notifications and {posts} posts")
+    return notifications, posts
+
+
+async def get_notifications(
+    client: AsyncClient,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+) -> list[NotificationRecord]:
+    """
+    Fetch notifications from the BlueSky network.
+
+    Returns:
+        A list of notification records
+    """
+    try:
+        if store is not None:
+            await sync_store(client, store)
+            return [
+                NotificationRecord(**row)
+                for row in store.notifications(client.me.did, since=since)
+            ]
+        return [
+            notification_info(notification, intern_handles=True)
+            async for notification in iter_notifications(client, since=since)
+        ]
+    except Exception as e:
+        logging.error(f"Notifications error: {e}", exc_info=True)
+        return []
+
+
+async def get_responses(
+    client: AsyncClient, post_id: str, depth: int = DEFAULT_THREAD_DEPTH
+) -> list[ResponseRecord]:
+    """
+    Fetch responses to a specific post.
+
+    Returns:
+        A list of response information dictionaries
+    """
+    try:
+        thread = await client.app.bsky.feed.get_post_thread(
+            {"uri": post_id, "depth": depth, "parent_height": 0}
+        )
+        return [post_info(reply.post) for reply in thread_replies(thread)]
+    except Exception as e:
+        logging.error(f"Responses error: {e}", exc_info=True)
+        return []
+
+
+async def list_posts_and_responses(
+    client: AsyncClient,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[PostSummary]:
+    """
+    List all posts and their responses for the authenticated user.
+
+    Returns:
+        Post summaries, as from ``notifications.iter_posts_and_responses``
+    """
+    try:
+        if store is not None:
+            await sync_store(client, store)
+            return [
+                PostSummary(
+                    stored["uri"],
+                    stored["cid"],
+                    stored["text"],
+                    tuple(stored["replies"]),
+                    None,
+                )
+                for stored in store.posts(client.me.did, since=since)
+            ]
+
+        posts: list[PostSummary] = []
+        feed = iter_author_feed(client, since=since)
+        async for page in achunked(feed, DEFAULT_PAGE_SIZE):
+            threads = {
+                result["uri"]: result
+                for result in await fetch_threads(
+                    client, replied_uris(page), max_workers, depth
+                )
+            }
+            posts.extend(post_summary(item, threads) for item in page)
+        return posts
+    except Exception as e:
+        logging.error(f"Listing error: {e}", exc_info=True)
+        return []
+
+
+async def list_unanswered_responses(
+    client: AsyncClient,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[ResponseRecord]:
+    """
+    List all unanswered responses to the user's posts.
+
+    Reply posts are hydrated in bulk first and threads are only fetched for
+    replies that have replies of their own, as in the synchronous version.
+
+    Returns:
+        A list of unanswered response records, in notification order
+    """
+    unanswered: list[ResponseRecord] = []
+    try:
+        if store is not None:
+            await sync_store(client, store)
+            return [
+                ResponseRecord(**row)
+                for row in store.unanswered_responses(client.me.did, since=since)
+            ]
+
+        async def replies_to_me() -> AsyncGenerator[Any, None]:
+            async for notification in iter_notifications(client, since=since):
+                if getattr(notification, "reason", None) == "reply":
+                    yield notification
+
+        async for batch in achunked(replies_to_me(), DEFAULT_PAGE_SIZE):
+            uris = [notification.uri for notification in batch]
+            hydrated = await fetch_posts(client, uris, max_workers)
+            threads = {
+                result["uri"]: result
+                for result in await fetch_threads(
+                    client, needs_thread(uris, hydrated), max_workers, depth
+                )
+            }
+            unanswered.extend(unanswered_in_batch(batch, threads, client.me.handle))
+        return unanswered
+    except Exception as e:
+        logging.error(f"Unanswered responses error: {e}", exc_info=True)
+        return []
+
+
+async def get_profiles(
+    client: AsyncClient,
+    actors: Iterable[str],
+    resolver: Optional[IdentityResolver] = None,
+) -> dict[str, ProfileInfo]:
+    """
+    Look up profiles by handle or DID through the resolver's caches.
+
+    Misses are fetched concurrently in batches of MAX_PROFILES_PER_REQUEST.
+
+    Args:
+        client: BlueSky client used for lookups
+        actors: Handles or DIDs
+        resolver: Identity resolver whose caches to use, defaults to one
+            backed only by the in-process cache
+
+    Returns:
+        A mapping from each found actor, with handles lowercased, to its profile
+    """
+    resolver = resolver or IdentityResolver(client)
+    found, missing = resolver.cached_profiles(actors)
+    batches = resolver.request_batches(missing)
+
+    async def fetch(batch: list[str]) -> list[Any]:
+        try:
+            response = await client.app.bsky.actor.get_profiles({"actors": batch})
+            return list(response.profiles)
+        except Exception as e:
+            logging.warning(f"Could not fetch profiles for {batch}: {e}")
+            return []
+
+    for batch, views in zip(batches, await asyncio.gather(*map(fetch, batches))):
+        resolver.add_fetched(batch, views, found)
+    return found
+
+
+async def upload_blob_cached(
+    client: AsyncClient, data: bytes, cache: Optional[BlobCache] = None
+) -> BlobRef:
+    """Upload bytes as a blob, reusing a cached reference for identical content."""
+    if cache is None:
+        return (await client.upload_blob(data)).blob
+
+    account = client.me.did
+    digest = sha256_hex(data)
+    cached = cache.get_blob(account, digest)
+    if cached is not None:
+        logging.debug(f"Blob cache hit for {digest}")
+        return cached
+
+    blob: BlobRef = (await client.upload_blob(data)).blob
+    cache.put_blob(account, digest, blob)
+    return blob
+
+
+async def upload_images(
+    client: AsyncClient,
+    images: Sequence[ImageSource],
+    alt_texts: Optional[Sequence[str]] = None,
+    cache: Optional[BlobCache] = None,
+) -> list[models.AppBskyEmbedImages.Image]:
+    """
+    Upload the images of one post concurrently.
+
+    Images are read and oversized ones re-encoded in worker threads, and each
+    image is uploaded as soon as its own conversion finishes.
+
+    Returns:
+        Image embed entries in the order the images were given
+
+    Raises:
+        ValueError: If there are too many images, or one cannot be encoded
+            within the size limit
+        FileNotFoundError: If an image file cannot be found
+    """
+    if len(images) > MAX_IMAGES_PER_POST:
+        raise ValueError(
+            f"A post can have at most {MAX_IMAGES_PER_POST} images, got {len(images)}."
+        )
+    alts = list(alt_texts or [])
+    alts += ["Image"] * (len(images) - len(alts))
+
+    async def prepare(image: ImageSource, alt_text: str) -> Any:
+        image_data = await asyncio.to_thread(prepare_image, image, cache)
+        blob = await upload_blob_cached(client, image_data, cache)
+        return models.AppBskyEmbedImages.Image(alt=alt_text, image=blob)
+
+    return list(await asyncio.gather(*map(prepare, images, alts)))
+
+
+async def publish_post(
+    client: AsyncClient,
+    text: str,
+    image_path: Union[ImageSource, Sequence[ImageSource], None] = None,
+    alt_text: Union[str, Sequence[str]] = "Image",
+    reply_to: Optional[ReplyRef] = None,
+    cache: Optional[BlobCache] = None,
+    resolver: Optional[IdentityResolver] = None,
+    root: Optional[ReplyRef] = None,
+) -> ReplyRef:
+    """
+    Post text and optionally images to BlueSky, raising on failure.
+
+    Returns:
+        The URI and CID of the created post
+
+    Raises:
+        ValueError: If the post text exceeds character limits
+        FileNotFoundError: If an image file cannot be found
+        Exception: For any other posting errors
+    """
+    validate_text(text)
+    if not client.me:
+        raise Exception("Client not authenticated. Please authenticate first.")
+
+    sources = as_image_list(image_path)
+    alt_texts = [alt_text] if isinstance(alt_text, str) else list(alt_text)
+    images = await upload_images(client, sources, alt_texts, cache) if sources else None
+
+    handles = find_handles(text)
+    profiles = await get_profiles(client, handles, resolver) if handles else {}
+    facets = build_facets(
+        text,
+        lambda wanted: {
+            handle: profiles[handle]["did"] for handle in wanted if handle in profiles
+        },
+    )
+    post_record = build_post_record(
+        client, text, images, reply_to, root=root, facets=facets
+    )
+    created = await client.app.bsky.feed.post.create(client.me.did, post_record)
+    return {"uri": created.uri, "cid": created.cid}
+
+
+async def post(
+    client: AsyncClient,
+    text: str,
+    image_path: Union[ImageSource, Sequence[ImageSource], None] = None,
+    alt_text: Union[str, Sequence[str]] = "Image",
+    reply_to: Optional[ReplyRef] = None,
+    cache: Optional[BlobCache] = None,
+    resolver: Optional[IdentityResolver] = None,
+    root: Optional[ReplyRef] = None,
+) -> Optional[ReplyRef]:
+    """
+    Post text and optionally images to BlueSky.
+
+    Returns:
+        The URI and CID of the created post, or None if posting failed.
+        Errors are logged and printed rather than raised.
+    """
+    try:
+        created = await publish_post(
+            client, text, image_path, alt_text, reply_to, cache, resolver, root
+        )
+        print("Post successfully published!")
+        return created
+    except (ValueError, FileNotFoundError) as e:
+        logging.error(e, exc_info=True)
+        print(e)
+    except Exception as e:
+        logging.error(f"Post error: {e}", exc_info=True)
+        print(f"Post error: {e}")
+    return None
@@ -10,9 +10,14 @@ from getpass import getpass
 from typing import Any, Optional
 
 import keyring
-from atproto.exceptions import AtProtocolError
 
-from .config import CREDENTIALS_STORED_MESSAGE, SERVICE_NAME, STORE_CREDENTIALS_PROMPT
+from .config import (
+    CREDENTIALS_STORED_MESSAGE,
+    SERVICE_NAME,
+    SESSION_KEY_SUFFIX,
+    STORE_CREDENTIALS_PROMPT,
+)
+from .metrics import instrumented
 
 
 def get_credentials(service_name: str, username: str) -> str:
@@ -62,6 +67,7 @@ def clear_credentials() -> None:
             keyring.delete_password(SERVICE_NAME, "username")
             # Delete the stored password
             keyring.delete_password(SERVICE_NAME, stored)
+            clear_session(SERVICE_NAME, stored)
             print("Credentials removed from keychain.")
         else:
             print("No stored credentials found.")
@@ -83,6 +89,9 @@ def authenticate_bluesky(client: Any, username: str, password: str) -> None:
         AtProtocolError: If authentication fails due to an AT Protocol error
         Exception: If authentication fails for any other reason
     """
+    # atproto is only imported once it is needed, to keep CLI start-up fast
+    from atproto.exceptions import AtProtocolError
+
     try:
         client.login(username, password)
         logging.info(f"Successfully authenticated as {username}")
@@ -94,6 +103,112 @@ def authenticate_bluesky(client: Any, username: str, password: str) -> None:
         raise
 
 
+@instrumented("keyring.get_session")
+def get_session(service_name: str, username: str) -> Optional[str]:
+    """
+    Get the stored session string for a user, if any.
+
+    Args:
+        service_name: The service name to use in the keyring
+        username: The username the session belongs to
+
+    Returns:
+        The exported session string, or None if none is stored
+    """
+    try:
+        session: Optional[str] = keyring.get_password(
+            service_name, username + SESSION_KEY_SUFFIX
+        )
+        return session
+    except Exception as e:
+        logging.error(f"Keyring access error: {e}", exc_info=True)
+        return None
+
+
+@instrumented("keyring.save_session")
+def save_session(service_name: str, username: str, session_string: str) -> None:
+    """
+    Store an exported session string in the keyring.
+    """
+    try:
+        keyring.set_password(
+            service_name, username + SESSION_KEY_SUFFIX, session_string
+        )
+    except Exception as e:
+        logging.error(f"Could not store session: {e}", exc_info=True)
+
+
+@instrumented("keyring.clear_session")
+def clear_session(service_name: str, username: str) -> None:
+    """
+    Remove a stored session string from the keyring, if present.
+    """
+    try:
+        if keyring.get_password(service_name, username + SESSION_KEY_SUFFIX):
+            keyring.delete_password(service_name, username + SESSION_KEY_SUFFIX)
+    except Exception as e:
+        logging.error(f"Could not remove session: {e}", exc_info=True)
+
+
+def persist_session(client: Any, service_name: str, username: str) -> None:
+    """
+    Save the client's session to the keyring whenever it is created or refreshed.
+
+    Args:
+        client: The BlueSky client whose session should be persisted
+        service_name: The service name to use in the keyring
+        username: The username the session belongs to
+    """
+
+    from atproto import SessionEvent
+
+    def on_session_change(event: SessionEvent, session: Any) -> None:
+        # Imported sessions are already stored
+        if event != SessionEvent.IMPORT:
+            save_session(service_name, username, session.export())
+
+    client.on_session_change(on_session_change)
+
+
+def resume_session(client: Any, service_name: str, username: str) -> bool:
+    """
+    Resume a stored session instead of logging in with a password.
+
+    An expired access token is refreshed transparently by the client. If the
+    stored session is rejected (for example, the refresh token has expired
+    too), it is discarded so the caller can fall back to a password login.
+    Other failures, such as network errors, leave it stored for next time.
+
+    Args:
+        client: The BlueSky client to authenticate
+        service_name: The service name to use in the keyring
+        username: The username whose session should be resumed
+
+    Returns:
+        True if the client is now authenticated, False otherwise
+
+    Raises:
+        Exception: If resuming failed for a reason other than the session
+            being malformed, expired or rejected by the server
+    """
+    session_string = get_session(service_name, username)
+    if not session_string:
+        return False
+    # atproto is already loaded by the client; keep this module light to import
+    from atproto_client.exceptions import BadRequestError, UnauthorizedError
+    from atproto_server.exceptions import InvalidTokenError
+
+    try:
+        client.login(session_string=session_string)
+        logging.info(f"Resumed stored session for {username}")
+        return True
+    except (ValueError, InvalidTokenError, BadRequestError, UnauthorizedError) as e:
+        logging.info(f"Stored session for {username} could not be resumed: {e}")
+        clear_session(service_name, username)
+        return False
+
+
+@instrumented("keyring.set_credentials")
 def set_credentials(service_name: str, username: str, password: str) -> None:
     """
     Store credentials in the keyring.
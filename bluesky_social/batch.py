@@ -0,0 +1,332 @@
+"""
+Batch posting for BlueSky.
+
+This module publishes many posts from one process and one authenticated
+client. Image preparation and blob uploads run in a worker pool, records are
+created in groups with one repository commit each, and every item's outcome is
+written to a results file so an interrupted or partially failed batch can be
+resumed. ``reply_all`` builds on this to answer a list of responses at once.
+"""
+
+import csv
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypedDict, Union
+
+from .blob_cache import BlobCache
+from .bluesky_core import (
+    ReplyRef,
+    build_post_record,
+    create_post_records,
+    upload_image,
+    validate_text,
+)
+from .config import DEFAULT_MAX_WORKERS, MAX_APPLY_WRITES
+from .pagination import chunked
+from .resolver import IdentityResolver
+from .richtext import find_handles
+from .store import NotificationStore
+
+
+class BatchItem(TypedDict, total=False):
+    text: str
+    image: Optional[str]
+    alt: str
+    reply_to: Optional[ReplyRef]
+    root: Optional[ReplyRef]
+
+
+class BatchResult(TypedDict):
+    index: int
+    uri: Optional[str]
+    cid: Optional[str]
+    error: Optional[str]
+
+
+class ReplyResult(TypedDict):
+    parent_uri: Optional[str]
+    uri: Optional[str]
+    cid: Optional[str]
+    text: str
+    error: Optional[str]
+
+
+# A str.format template filled from the response's fields, or a callable that
+# returns the reply text for a response, or None to leave it unanswered
+ReplyTemplate = Union[str, Callable[[Mapping[str, Any]], Optional[str]]]
+
+
+def read_batch_file(path: str) -> Iterator[BatchItem]:
+    """
+    Stream posts from a JSONL or CSV batch file.
+
+    JSONL lines are objects with ``text`` and optional ``image``, ``alt``,
+    ``reply_to`` and ``root`` (``{"uri": ..., "cid": ...}``) keys. CSV files
+    use a header row with ``text``, ``image``, ``alt``, ``reply_uri``,
+    ``reply_cid``, ``root_uri`` and ``root_cid`` columns.
+
+    Args:
+        path: Path to a ``.csv`` file, or a JSON Lines file otherwise
+
+    Yields:
+        One batch item per post, in file order
+    """
+    with open(path, newline="", encoding="utf-8") as batch_file:
+        if os.path.splitext(path)[1].lower() == ".csv":
+            for row in csv.DictReader(batch_file):
+                item: BatchItem = {"text": row.get("text") or ""}
+                if row.get("image"):
+                    item["image"] = row["image"]
+                if row.get("alt"):
+                    item["alt"] = row["alt"]
+                if row.get("reply_uri") and row.get("reply_cid"):
+                    item["reply_to"] = {
+                        "uri": row["reply_uri"],
+                        "cid": row["reply_cid"],
+                    }
+                if row.get("root_uri") and row.get("root_cid"):
+                    item["root"] = {"uri": row["root_uri"], "cid": row["root_cid"]}
+                yield item
+        else:
+            for line in batch_file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_completed(results_path: str) -> set[int]:
+    """
+    Return the indices of items already published according to a results file.
+
+    Args:
+        results_path: Path to a results file written by ``post_many``
+
+    Returns:
+        Indices of items that have a recorded URI and no error
+    """
+    completed: set[int] = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if result.get("uri") and not result.get("error"):
+                completed.add(result["index"])
+    return completed
+
+
+def _prepare_images(
+    client: Any, item: BatchItem, cache: Optional[BlobCache]
+) -> Optional[list[Any]]:
+    """Convert and upload the item's image, if it has one."""
+    validate_text(item.get("text") or "")
+    image = item.get("image")
+    if not image:
+        return None
+    return [upload_image(client, image, item.get("alt") or "Image", cache)]
+
+
+def _publish_window(
+    client: Any,
+    window: list[tuple[int, BatchItem, "Future[Optional[list[Any]]]"]],
+    chunk_size: int,
+    resolver: IdentityResolver,
+) -> list[BatchResult]:
+    """Build the records of one window and create them with applyWrites."""
+    results: list[BatchResult] = []
+    ready: list[tuple[int, Any]] = []
+    # Resolve the window's mentions in bulk; each record then hits the cache
+    resolver.resolve_handles(
+        handle
+        for _, item, _ in window
+        for handle in find_handles(item.get("text") or "")
+    )
+    for index, item, images in window:
+        try:
+            post_record = build_post_record(
+                client,
+                item.get("text") or "",
+                images.result(),
+                item.get("reply_to"),
+                root=item.get("root"),
+                resolver=resolver,
+            )
+            ready.append((index, post_record))
+        except Exception as e:
+            logging.error(f"Batch item {index} failed: {e}", exc_info=True)
+            results.append({"index": index, "uri": None, "cid": None, "error": str(e)})
+
+    created = create_post_records(
+        client, [post_record for _, post_record in ready], chunk_size
+    )
+    for (index, _), result in zip(ready, created):
+        error = result["error"]
+        results.append(
+            {
+                "index": index,
+                "uri": result["uri"],
+                "cid": result["cid"],
+                "error": str(error) if error is not None else None,
+            }
+        )
+    return results
+
+
+def post_many(
+    client: Any,
+    items: Iterable[BatchItem],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    results_path: Optional[str] = None,
+    chunk_size: int = MAX_APPLY_WRITES,
+    cache: Optional[BlobCache] = None,
+    resolver: Optional[IdentityResolver] = None,
+) -> list[BatchResult]:
+    """
+    Publish many posts with one client, uploading images in a worker pool.
+
+    Items are consumed lazily in windows of ``chunk_size``. While one window's
+    records are created with a single applyWrites call, the next window's
+    images are already uploading, so at most two windows are held in memory.
+    When ``results_path`` is given, each outcome is appended to it as a JSON
+    line as soon as it is known, and items already recorded as published
+    there are skipped.
+
+    Args:
+        client: Authenticated BlueSky client
+        items: Posts to publish
+        max_workers: Maximum number of concurrent image uploads; values below
+            1 mean 1
+        results_path: Optional JSONL file for per-item results
+        chunk_size: Maximum number of posts created per repository commit
+        cache: Optional blob cache, so repeated images upload only once
+        resolver: Optional identity resolver for mention handles
+
+    Returns:
+        Results for the items processed in this run, ordered by index
+    """
+    completed = read_completed(results_path) if results_path else set()
+    resolver = resolver or IdentityResolver(client)
+    pending = (
+        (index, item) for index, item in enumerate(items) if index not in completed
+    )
+    windows = chunked(pending, chunk_size)
+    results: list[BatchResult] = []
+    results_file = open(results_path, "a", encoding="utf-8") if results_path else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as upload_pool:
+
+            def start(
+                window: list[tuple[int, BatchItem]],
+            ) -> list[tuple[int, BatchItem, "Future[Optional[list[Any]]]"]]:
+                return [
+                    (
+                        index,
+                        item,
+                        upload_pool.submit(_prepare_images, client, item, cache),
+                    )
+                    for index, item in window
+                ]
+
+            current = start(next(windows, []))
+            while current:
+                upcoming = start(next(windows, []))
+                window_results = _publish_window(client, current, chunk_size, resolver)
+                results.extend(window_results)
+                if results_file is not None:
+                    for result in window_results:
+                        results_file.write(json.dumps(result) + "\n")
+                    results_file.flush()
+                current = upcoming
+    finally:
+        if results_file is not None:
+            results_file.close()
+
+    failed = sum(1 for result in results if result["error"])
+    logging.info(f"Batch finished: {len(results) - failed} published, {failed} failed")
+    return sorted(results, key=lambda result: result["index"])
+
+
+def _reply_text(template: ReplyTemplate, response: Mapping[str, Any]) -> Optional[str]:
+    if callable(template):
+        return template(response)
+    return template.format_map(response)
+
+
+def reply_all(
+    client: Any,
+    responses: Iterable[Mapping[str, Any]],
+    template: ReplyTemplate,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    store: Optional[NotificationStore] = None,
+    chunk_size: int = MAX_APPLY_WRITES,
+    resolver: Optional[IdentityResolver] = None,
+) -> list[ReplyResult]:
+    """
+    Reply to many responses at once and mark them answered.
+
+    Reply references come from the responses themselves: each reply's parent
+    is the response and its root is the response's own thread root, so no
+    thread is fetched. Responses without root fields, such as top-level
+    posts, are treated as the root. The replies are published with
+    ``post_many``, up to ``chunk_size`` per applyWrites call, and when a store
+    is given every published reply is recorded in it in one transaction, so
+    the next ``list_unanswered_responses`` scan skips the responses without
+    re-checking their threads.
+
+    Args:
+        client: Authenticated BlueSky client
+        responses: Response records or dictionaries, as returned by
+            ``list_unanswered_responses``
+        template: A ``str.format`` template filled from each response's
+            fields, such as ``"Thanks @{author}!"``, or a callable that
+            returns the reply text for a response, or None to skip it
+        max_workers: Maximum number of concurrent uploads
+        store: Optional notification store to mark the responses answered in
+        chunk_size: Maximum number of replies created per repository commit
+        resolver: Optional identity resolver for mention handles
+
+    Returns:
+        One result per reply attempted, in response order
+
+    Raises:
+        KeyError: If the template names a field the responses do not have
+    """
+    targets: list[Mapping[str, Any]] = []
+    items: list[BatchItem] = []
+    for response in responses:
+        text = _reply_text(template, response)
+        if not text:
+            continue
+        parent: ReplyRef = {"uri": response["uri"], "cid": response["cid"]}
+        root = parent
+        if response.get("root_uri") and response.get("root_cid"):
+            root = {"uri": response["root_uri"], "cid": response["root_cid"]}
+        targets.append(response)
+        items.append({"text": text, "reply_to": parent, "root": root})
+
+    results = post_many(
+        client, items, max_workers, chunk_size=chunk_size, resolver=resolver
+    )
+    replies: list[ReplyResult] = [
+        {
+            "parent_uri": response["uri"],
+            "uri": result["uri"],
+            "cid": result["cid"],
+            "text": item["text"],
+            "error": result["error"],
+        }
+        for response, item, result in zip(targets, items, results)
+    ]
+    if store is not None:
+        store.mark_answered(
+            client.me.did,
+            [reply for reply in replies if reply["uri"] and not reply["error"]],
+        )
+    return replies
@@ -0,0 +1,245 @@
+"""
+Content-addressed blob cache for BlueSky uploads.
+
+This module remembers the blob reference returned for each uploaded image,
+keyed by the SHA-256 of the exact bytes sent, so posting the same image again
+skips the upload. It also keeps the output of JPEG conversions keyed by the
+source hash and the conversion settings, so the same source is never
+re-encoded.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from atproto_client.models.blob_ref import BlobRef, IpldLink
+
+from .config import DEFAULT_BLOB_CACHE_MAX_ENTRIES, DEFAULT_BLOB_CACHE_TTL
+from .metrics import instrumented
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    account TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    cid TEXT NOT NULL,
+    mime_type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (account, digest)
+);
+CREATE INDEX IF NOT EXISTS blobs_by_use ON blobs (used_at);
+
+CREATE TABLE IF NOT EXISTS conversions (
+    digest TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (digest, variant)
+);
+CREATE INDEX IF NOT EXISTS conversions_by_use ON conversions (used_at);
+"""
+
+
+def sha256_hex(data: bytes) -> str:
+    """Return the hex SHA-256 digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobCache:
+    """
+    SQLite cache of blob references and converted image bytes.
+
+    Entries expire ``ttl`` seconds after they were stored, and the least
+    recently used entries are evicted once a table holds more than
+    ``max_entries`` rows. Blob references are kept per account, since a blob
+    belongs to the repository it was uploaded to.
+
+    Args:
+        path: Database file path, or ``":memory:"`` for a throwaway cache
+        ttl: Seconds an entry stays valid
+        max_entries: Maximum number of entries kept in each table
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_BLOB_CACHE_TTL,
+        max_entries: int = DEFAULT_BLOB_CACHE_MAX_ENTRIES,
+    ) -> None:
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Uploads may run on worker threads, so share one connection under a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "BlobCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _lookup(
+        self, table: str, where: str, params: tuple[Any, ...], columns: str
+    ) -> Optional[tuple[Any, ...]]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT {columns}, created_at FROM {table} WHERE {where}", params
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[-1] > self.ttl:
+                self._conn.execute(f"DELETE FROM {table} WHERE {where}", params)
+                return None
+            self._conn.execute(
+                f"UPDATE {table} SET used_at = ? WHERE {where}", (now, *params)
+            )
+        return tuple(row[:-1])
+
+    def _evict(self, table: str) -> None:
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE created_at < ?", (time.time() - self.ttl,)
+        )
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE rowid NOT IN "
+            f"(SELECT rowid FROM {table} ORDER BY used_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def get_blob(self, account: str, digest: str) -> Optional[BlobRef]:
+        """
+        Look up the blob reference previously returned for some bytes.
+
+        Args:
+            account: DID of the repository the blob was uploaded to
+            digest: Hex SHA-256 of the uploaded bytes
+
+        Returns:
+            The cached blob reference, or None on a miss or expired entry
+        """
+        row = self._lookup(
+            "blobs",
+            "account = ? AND digest = ?",
+            (account, digest),
+            "cid, mime_type, size",
+        )
+        if row is None:
+            return None
+        cid, mime_type, size = row
+        return BlobRef(mime_type=mime_type, size=size, ref=IpldLink(link=cid))
+
+    def put_blob(self, account: str, digest: str, blob: BlobRef) -> None:
+        """Remember the blob reference returned for an upload."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (account, digest, cid, mime_type, size, "
+                "created_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (account, digest, str(blob.cid), blob.mime_type, blob.size, now, now),
+            )
+            self._evict("blobs")
+
+    def get_conversion(self, digest: str, variant: str) -> Optional[bytes]:
+        """
+        Look up previously converted image bytes.
+
+        Args:
+            digest: Hex SHA-256 of the source image bytes
+            variant: Conversion settings, such as ``"jpeg:q85"``
+
+        Returns:
+            The converted bytes, or None on a miss or expired entry
+        """
+        row = self._lookup(
+            "conversions", "digest = ? AND variant = ?", (digest, variant), "data"
+        )
+        return bytes(row[0]) if row is not None else None
+
+    def put_conversion(self, digest: str, variant: str, data: bytes) -> None:
+        """Remember the output of converting a source image."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversions (digest, variant, data, "
+                "created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (digest, variant, data, now, now),
+            )
+            self._evict("conversions")
+
+
+@instrumented("blob.upload_blob_cached")
+def upload_blob_cached(
+    client: Any, data: bytes, cache: Optional[BlobCache] = None
+) -> BlobRef:
+    """
+    Upload bytes as a blob, reusing a cached reference for identical content.
+
+    Args:
+        client: Authenticated BlueSky client
+        data: The exact bytes to upload
+        cache: Optional blob cache; without one every call uploads
+
+    Returns:
+        The blob reference to embed in a record
+    """
+    if cache is None:
+        blob: BlobRef = client.upload_blob(data).blob
+        return blob
+
+    account = client.me.did
+    digest = sha256_hex(data)
+    cached = cache.get_blob(account, digest)
+    if cached is not None:
+        logging.debug(f"Blob cache hit for {digest}")
+        return cached
+
+    blob = client.upload_blob(data).blob
+    cache.put_blob(account, digest, blob)
+    return blob
+
+
+def convert_cached(
+    source: bytes,
+    variant: str,
+    convert: Callable[[], bytes],
+    cache: Optional[BlobCache] = None,
+) -> bytes:
+    """
+    Return converted image bytes, reusing a cached conversion of the same source.
+
+    Args:
+        source: The source image bytes, used as the cache key
+        variant: Conversion settings, part of the cache key
+        convert: Callable performing the conversion on a miss
+        cache: Optional blob cache; without one every call converts
+
+    Returns:
+        The converted image bytes
+    """
+    if cache is None:
+        return convert()
+
+    digest = sha256_hex(source)
+    cached = cache.get_conversion(digest, variant)
+    if cached is not None:
+        logging.debug(f"Conversion cache hit for {digest} ({variant})")
+        return cached
+
+    converted = convert()
+    cache.put_conversion(digest, variant, converted)
+    return converted
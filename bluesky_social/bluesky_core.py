@@ -3,15 +3,46 @@ Core functionality for BlueSky social media platform.
 Provides utilities for posting, handling hashtags, and managing responses.
 """
 
+import hashlib
 import logging
+import multiprocessing
 import os
-import re
-from typing import Optional, TypedDict
+import random
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypedDict, Union
 
+import libipld
 from atproto import Client, models
+from atproto.exceptions import BadRequestError
+from atproto_client.models.utils import get_model_as_dict
 
-from .config import MAX_IMAGE_SIZE, MAX_POST_LENGTH
-from .image_utils import convert_to_jpeg
+from .blob_cache import BlobCache, convert_cached, upload_blob_cached
+from .config import (
+    DEFAULT_JPEG_QUALITY,
+    MAX_APPLY_WRITES,
+    MAX_IMAGE_SIZE,
+    MAX_IMAGES_PER_POST,
+    MAX_POST_LENGTH,
+)
+from .image_utils import EncodeResult, ImageSource, as_image_list, encode_to_budget
+from .metrics import instrumented
+from .resolver import IdentityResolver
+from .richtext import build_facets
+
+POST_COLLECTION = "app.bsky.feed.post"
+
+# Cache key of the conversion that fits an image to the upload limit
+_UPLOAD_VARIANT = f"jpeg:budget{MAX_IMAGE_SIZE}:q{DEFAULT_JPEG_QUALITY}"
+
+# Record keys are TIDs: microseconds since the epoch plus a random clock ID,
+# encoded with the sortable base32 alphabet
+_TID_ALPHABET = "234567abcdefghijklmnopqrstuvwxyz"
+_TID_CLOCK_ID = random.randrange(1024)
+_tid_lock = threading.Lock()
+_last_tid_micros = 0
 
 
 class ReplyRef(TypedDict):
@@ -19,6 +50,12 @@ class ReplyRef(TypedDict):
     cid: str
 
 
+class WriteResult(TypedDict):
+    uri: Optional[str]
+    cid: Optional[str]
+    error: Optional[Exception]
+
+
 class ResponseInfo(TypedDict):
     cid: str
     uri: str
@@ -26,6 +63,7 @@ class ResponseInfo(TypedDict):
     text: str
 
 
+@instrumented("richtext.detect_hashtags")
 def detect_hashtags(text: str) -> list[models.AppBskyRichtextFacet.Main]:
     """
     Detect hashtags in text and return formatted facets for BlueSky API.
@@ -36,89 +74,554 @@ def detect_hashtags(text: str) -> list[models.AppBskyRichtextFacet.Main]:
     Returns:
         List of facet objects ready for the BlueSky API
     """
-    char_to_byte = [0]
-    for char in text:
-        char_to_byte.append(char_to_byte[-1] + len(char.encode("utf-8")))
+    return build_facets(text, kinds=("tag",))
+
+
+def validate_text(text: str) -> None:
+    """
+    Check that post text fits within the BlueSky character limit.
+
+    Raises:
+        ValueError: If the post text exceeds character limits
+    """
+    if len(text) > MAX_POST_LENGTH:
+        raise ValueError(
+            f"Text exceeds the maximum allowed length of {MAX_POST_LENGTH} characters."
+        )
+
+
+def _read_image(image: ImageSource) -> bytes:
+    """Return the bytes of an image given as a path, buffer or file object."""
+    if isinstance(image, str):
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image file not found: {image}")
+        with open(image, "rb") as image_file:
+            return image_file.read()
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    return image.read()
+
+
+def _log_encode(image_data: bytes, result: EncodeResult) -> bytes:
+    logging.info(
+        f"Re-encoded {len(image_data)} byte image to "
+        f"{len(result['data'])} bytes at quality {result['quality']} in "
+        f"{result['attempts']} attempts ({result['elapsed']:.3f}s)"
+    )
+    return result["data"]
+
+
+def _encode_for_upload(image_data: bytes, max_bytes: int) -> bytes:
+    """Re-encode image bytes to fit the upload limit."""
+    # Decode the bytes already in memory instead of reading the file again
+    return _log_encode(image_data, encode_to_budget(image_data, max_bytes))
+
+
+def _process_context() -> Any:
+    """
+    Return the start method for image conversion processes.
+
+    The pool's workers are started from upload threads, and forking while
+    other threads run can leave a child holding a lock it never releases, so
+    workers start from a fresh interpreter instead.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def fit_image(
+    image_data: bytes,
+    cache: Optional[BlobCache] = None,
+    encode: Callable[[bytes, int], bytes] = _encode_for_upload,
+) -> bytes:
+    """
+    Return image bytes within the upload limit, re-encoding them if needed.
+
+    Args:
+        image_data: The image bytes
+        cache: Optional blob cache, so identical images are not re-converted
+        encode: Function re-encoding bytes to a byte budget, for example one
+            that hands the work to a process pool
+
+    Returns:
+        ``image_data`` itself when it fits, otherwise the re-encoded bytes
+
+    Raises:
+        ValueError: If the image cannot be encoded within the size limit
+    """
+    if len(image_data) <= MAX_IMAGE_SIZE:
+        return image_data
+    return convert_cached(
+        image_data, _UPLOAD_VARIANT, lambda: encode(image_data, MAX_IMAGE_SIZE), cache
+    )
+
+
+def prepare_image(image: ImageSource, cache: Optional[BlobCache] = None) -> bytes:
+    """
+    Read an image and return its bytes within the upload limit.
+
+    Args:
+        image: Path to the image file, or the image bytes or file object
+        cache: Optional blob cache, so identical images are not re-converted
+
+    Returns:
+        The bytes to upload
+
+    Raises:
+        FileNotFoundError: If the image file cannot be found
+        ValueError: If the image cannot be encoded within the size limit
+    """
+    return fit_image(_read_image(image), cache)
+
+
+def upload_image(
+    client: Client,
+    image: ImageSource,
+    alt_text: str = "Image",
+    cache: Optional[BlobCache] = None,
+) -> models.AppBskyEmbedImages.Image:
+    """
+    Upload an image, re-encoding it in memory to fit the size limit if needed.
+
+    Args:
+        client: Authenticated BlueSky client
+        image: Path to the image file, or the image bytes
+        alt_text: Alternative text for the image
+        cache: Optional blob cache, so identical images are neither
+            re-converted nor re-uploaded
+
+    Returns:
+        An image embed entry referencing the uploaded blob
+
+    Raises:
+        FileNotFoundError: If the image file cannot be found
+        ValueError: If the image cannot be encoded within the size limit
+    """
+    image_data = prepare_image(image, cache)
+    blob = upload_blob_cached(client, image_data, cache)
+    return models.AppBskyEmbedImages.Image(alt=alt_text, image=blob)
+
+
+def upload_images(
+    client: Client,
+    images: Sequence[ImageSource],
+    alt_texts: Optional[Sequence[str]] = None,
+    cache: Optional[BlobCache] = None,
+) -> list[models.AppBskyEmbedImages.Image]:
+    """
+    Upload the images of one post, converting oversized ones in parallel.
+
+    Re-encoding runs in a process pool, since Pillow is CPU-bound, and each
+    image is uploaded as soon as its own conversion finishes, so the post
+    costs roughly the time of the slowest image rather than the sum.
+
+    Args:
+        client: Authenticated BlueSky client
+        images: Paths or bytes of up to MAX_IMAGES_PER_POST images
+        alt_texts: Alternative text per image, defaulting to "Image"
+        cache: Optional blob cache for image conversions and uploads
+
+    Returns:
+        Image embed entries in the order the images were given
+
+    Raises:
+        ValueError: If there are too many images, or one cannot be encoded
+            within the size limit
+        FileNotFoundError: If an image file cannot be found
+    """
+    if len(images) > MAX_IMAGES_PER_POST:
+        raise ValueError(
+            f"A post can have at most {MAX_IMAGES_PER_POST} images, got {len(images)}."
+        )
+    alts = list(alt_texts or [])
+    alts += ["Image"] * (len(images) - len(alts))
+    if len(images) == 1:
+        return [upload_image(client, images[0], alts[0], cache)]
+
+    sources = [_read_image(image) for image in images]
+    oversized = sum(1 for data in sources if len(data) > MAX_IMAGE_SIZE)
+
+    # Worker processes are only started when a conversion is actually submitted
+    with (
+        ProcessPoolExecutor(
+            max_workers=max(1, min(oversized, os.cpu_count() or 1)),
+            mp_context=_process_context(),
+        ) as convert_pool,
+        ThreadPoolExecutor(max_workers=max(1, len(sources))) as upload_pool,
+    ):
+
+        def encode(image_data: bytes, max_bytes: int) -> bytes:
+            # Workers only need image_utils, not this module and atproto
+            result = convert_pool.submit(encode_to_budget, image_data, max_bytes)
+            return _log_encode(image_data, result.result())
+
+        def prepare(image_data: bytes, alt_text: str) -> Any:
+            image_data = fit_image(image_data, cache, encode)
+            blob = upload_blob_cached(client, image_data, cache)
+            return models.AppBskyEmbedImages.Image(alt=alt_text, image=blob)
+
+        futures = [
+            upload_pool.submit(prepare, data, alt) for data, alt in zip(sources, alts)
+        ]
+        return [future.result() for future in futures]
+
+
+def build_post_record(
+    client: Client,
+    text: str,
+    images: Optional[list[models.AppBskyEmbedImages.Image]] = None,
+    reply_to: Optional[ReplyRef] = None,
+    root: Optional[ReplyRef] = None,
+    resolver: Optional[IdentityResolver] = None,
+    facets: Optional[list[models.AppBskyRichtextFacet.Main]] = None,
+) -> models.AppBskyFeedPost.Record:
+    """
+    Build a post record with rich-text facets and optional images and reply.
+
+    Args:
+        client: BlueSky client, used for the creation timestamp
+        text: The text content of the post
+        images: Already uploaded image embed entries
+        reply_to: Optional reference to a post to reply to
+        root: Root post of the thread being replied to, defaults to ``reply_to``
+        resolver: Identity resolver for mention handles, defaults to one
+            backed only by the in-process cache
+        facets: Facets already built for the text; when given, mentions are
+            not resolved again
+
+    Returns:
+        The post record, ready to be created in the user's repository
+
+    Raises:
+        ValueError: If the post text exceeds character limits
+    """
+    validate_text(text)
 
-    facets = []
-    for m in re.finditer(r"#\w+", text):
-        start, end = m.start(), m.end()
-        facet = models.AppBskyRichtextFacet.Main(
-            index=models.AppBskyRichtextFacet.ByteSlice(
-                byte_start=char_to_byte[start], byte_end=char_to_byte[end]
+    embed = models.AppBskyEmbedImages.Main(images=images) if images else None
+    if facets is None:
+        facets = build_facets(
+            text, (resolver or IdentityResolver(client)).resolve_handles
+        )
+    post_record = models.AppBskyFeedPost.Record(
+        text=text,
+        embed=embed,
+        facets=facets,
+        created_at=client.get_current_time_iso(),
+    )
+
+    if reply_to:
+        post_record.reply = models.AppBskyFeedPost.ReplyRef(
+            parent=models.ComAtprotoRepoStrongRef.Main(
+                uri=reply_to["uri"], cid=reply_to["cid"]
+            ),
+            root=models.ComAtprotoRepoStrongRef.Main(
+                uri=(root or reply_to)["uri"], cid=(root or reply_to)["cid"]
             ),
-            features=[models.AppBskyRichtextFacet.Tag(tag=m.group()[1:])],
         )
-        facets.append(facet)
-    return facets
+    return post_record
 
 
-def post(
+def create_post_record(
+    client: Client,
+    post_record: models.AppBskyFeedPost.Record,
+    rkey: Optional[str] = None,
+) -> ReplyRef:
+    """
+    Create a post record in the authenticated user's repository.
+
+    Args:
+        client: Authenticated BlueSky client
+        post_record: The record to create
+        rkey: Optional record key, generated by the server when omitted
+
+    Returns:
+        The URI and CID of the created post
+
+    Raises:
+        Exception: If the client is not authenticated
+    """
+    if not client.me:
+        raise Exception("Client not authenticated. Please authenticate first.")
+
+    created = client.app.bsky.feed.post.create(client.me.did, post_record, rkey=rkey)
+    return {"uri": created.uri, "cid": created.cid}
+
+
+def next_tid() -> str:
+    """
+    Generate a record key that sorts after every key generated before it.
+
+    Returns:
+        A 13 character timestamp identifier (TID)
+    """
+    global _last_tid_micros
+    with _tid_lock:
+        micros = max(time.time_ns() // 1000, _last_tid_micros + 1)
+        _last_tid_micros = micros
+    value = (micros << 10) | _TID_CLOCK_ID
+    chars = []
+    for _ in range(13):
+        chars.append(_TID_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _has_links(value: Any) -> bool:
+    """Check whether a JSON record value contains CID links or raw bytes."""
+    if isinstance(value, dict):
+        return (
+            "$link" in value
+            or "$bytes" in value
+            or any(map(_has_links, value.values()))
+        )
+    if isinstance(value, list):
+        return any(map(_has_links, value))
+    return False
+
+
+def record_cid(value: dict[str, Any]) -> Optional[str]:
+    """
+    Compute the CID a record will have in the repository, before creating it.
+
+    Args:
+        value: The record as a JSON-compatible dictionary
+
+    Returns:
+        The CIDv1 (dag-cbor, sha2-256) of the record, or None if the record
+        contains blob links, whose binary encoding is not reproduced locally
+    """
+    if _has_links(value):
+        return None
+    digest = hashlib.sha256(libipld.encode_dag_cbor(value)).digest()
+    # CIDv1, dag-cbor codec (0x71), sha2-256 multihash (0x12, 32 bytes)
+    cid: str = libipld.encode_cid(b"\x01\x71\x12\x20" + digest)
+    return cid
+
+
+def _apply_creates(
+    client: Client,
+    records: Sequence[models.AppBskyFeedPost.Record],
+    rkeys: Sequence[str],
+) -> list[WriteResult]:
+    """Create records in one applyWrites call, falling back to single creates."""
+    repo = client.me.did
+    values = [get_model_as_dict(record) for record in records]
+    writes = [
+        models.ComAtprotoRepoApplyWrites.Create(
+            collection=POST_COLLECTION, rkey=rkey, value=value
+        )
+        for rkey, value in zip(rkeys, values)
+    ]
+    try:
+        response = client.com.atproto.repo.apply_writes(
+            models.ComAtprotoRepoApplyWrites.Data(repo=repo, writes=writes)
+        )
+    except BadRequestError as e:
+        # One invalid record rejects the whole commit; create the records one
+        # by one so only the invalid ones fail
+        logging.warning(f"applyWrites rejected, creating records one by one: {e}")
+        results: list[WriteResult] = []
+        for record, rkey in zip(records, rkeys):
+            try:
+                created = create_post_record(client, record, rkey=rkey)
+                results.append({**created, "error": None})
+            except Exception as record_error:
+                logging.error(f"Post error: {record_error}", exc_info=True)
+                results.append({"uri": None, "cid": None, "error": record_error})
+        return results
+
+    created_results = getattr(response, "results", None) or []
+    if len(created_results) == len(writes):
+        return [
+            {"uri": result.uri, "cid": result.cid, "error": None}
+            for result in created_results
+        ]
+    # Servers that do not report results: URIs and CIDs are known up front
+    return [
+        {
+            "uri": f"at://{repo}/{POST_COLLECTION}/{rkey}",
+            "cid": record_cid(value),
+            "error": None,
+        }
+        for rkey, value in zip(rkeys, values)
+    ]
+
+
+def create_post_records(
+    client: Client,
+    records: Sequence[models.AppBskyFeedPost.Record],
+    chunk_size: int = MAX_APPLY_WRITES,
+) -> list[WriteResult]:
+    """
+    Create many post records with as few repository commits as possible.
+
+    Records are grouped into ``com.atproto.repo.applyWrites`` calls of at most
+    ``chunk_size`` writes, each with a pre-generated record key. If the server
+    rejects a chunk as invalid, that chunk is retried one record at a time.
+
+    Args:
+        client: Authenticated BlueSky client
+        records: Post records to create, in order
+        chunk_size: Maximum number of writes per applyWrites call
+
+    Returns:
+        One result per record, in order. Failed records have ``error`` set.
+
+    Raises:
+        Exception: If the client is not authenticated
+    """
+    if not client.me:
+        raise Exception("Client not authenticated. Please authenticate first.")
+
+    results: list[WriteResult] = []
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start : start + chunk_size]
+        rkeys = [next_tid() for _ in chunk]
+        try:
+            results.extend(_apply_creates(client, chunk, rkeys))
+        except Exception as e:
+            logging.error(f"Post error: {e}", exc_info=True)
+            results.extend({"uri": None, "cid": None, "error": e} for _ in chunk)
+    return results
+
+
+def publish_thread(
+    client: Client,
+    texts: Sequence[str],
+    reply_to: Optional[ReplyRef] = None,
+    chunk_size: int = MAX_APPLY_WRITES,
+    resolver: Optional[IdentityResolver] = None,
+) -> list[ReplyRef]:
+    """
+    Publish a thread of text posts, each replying to the one before it.
+
+    Record keys and CIDs are computed locally, so every reply reference is
+    known before anything is sent and the whole thread goes out in a single
+    applyWrites call per ``chunk_size`` posts.
+
+    Args:
+        client: Authenticated BlueSky client
+        texts: Text of each post in the thread, in order
+        reply_to: Optional post the first post of the thread replies to
+        chunk_size: Maximum number of writes per applyWrites call
+        resolver: Optional identity resolver for mention handles
+
+    Returns:
+        The URI and CID of each created post
+
+    Raises:
+        ValueError: If any post text exceeds character limits
+        Exception: If the client is not authenticated or a post fails
+    """
+    if not client.me:
+        raise Exception("Client not authenticated. Please authenticate first.")
+    for text in texts:
+        validate_text(text)
+
+    repo = client.me.did
+    parent, root = reply_to, reply_to
+    records, rkeys = [], []
+    for text in texts:
+        post_record = build_post_record(
+            client, text, reply_to=parent, root=root, resolver=resolver
+        )
+        rkey = next_tid()
+        cid = record_cid(get_model_as_dict(post_record))
+        if cid is None:
+            raise Exception("Could not compute the CID of a thread post")
+        records.append(post_record)
+        rkeys.append(rkey)
+        parent = {"uri": f"at://{repo}/{POST_COLLECTION}/{rkey}", "cid": cid}
+        root = root or parent
+
+    created: list[ReplyRef] = []
+    for start in range(0, len(records), chunk_size):
+        end = start + chunk_size
+        for result in _apply_creates(client, records[start:end], rkeys[start:end]):
+            if result["error"] is not None:
+                raise result["error"]
+            created.append({"uri": result["uri"] or "", "cid": result["cid"] or ""})
+    return created
+
+
+def publish_post(
     client: Client,
     text: str,
-    image_path: Optional[str] = None,
-    alt_text: str = "Image",
+    image_path: Union[ImageSource, Sequence[ImageSource], None] = None,
+    alt_text: Union[str, Sequence[str]] = "Image",
     reply_to: Optional[ReplyRef] = None,
-) -> None:
+    cache: Optional[BlobCache] = None,
+    resolver: Optional[IdentityResolver] = None,
+    root: Optional[ReplyRef] = None,
+) -> ReplyRef:
     """
-    Post text and optionally an image to BlueSky.
+    Post text and optionally an image to BlueSky, raising on failure.
 
     Args:
         client: Authenticated BlueSky client
         text: The text content of the post
-        image_path: Optional path to an image file
-        alt_text: Alternative text for the image
+        image_path: Optional path to an image file, or the image bytes, or a
+            list of up to MAX_IMAGES_PER_POST of them
+        alt_text: Alternative text for the image, or a list with one per image
         reply_to: Optional reference to a post to reply to
+        cache: Optional blob cache for image conversions and uploads
+        resolver: Optional identity resolver for mention handles
+        root: Root post of the thread being replied to, defaults to ``reply_to``
+
+    Returns:
+        The URI and CID of the created post
 
     Raises:
         ValueError: If the post text exceeds character limits
         FileNotFoundError: If the image file cannot be found
         Exception: For any other posting errors
     """
-    try:
-        if len(text) > MAX_POST_LENGTH:
-            raise ValueError(
-                f"Text exceeds the maximum allowed length of {MAX_POST_LENGTH} characters."
-            )
-
-        embed = None
-        if image_path:
-            if not os.path.exists(image_path):
-                raise FileNotFoundError(f"Image file not found: {image_path}")
-
-            if os.path.getsize(image_path) > MAX_IMAGE_SIZE:  # 1MB
-                image_path = convert_to_jpeg(image_path)
-
-            with open(image_path, "rb") as image_file:
-                image_data = image_file.read()
-
-            upload = client.upload_blob(image_data)
-            image_ref = models.AppBskyEmbedImages.Image(alt=alt_text, image=upload.blob)
-            embed = models.AppBskyEmbedImages.Main(images=[image_ref])
-
-        facets = detect_hashtags(text)
-        post_record = models.AppBskyFeedPost.Record(
-            text=text,
-            embed=embed,
-            facets=facets,
-            created_at=client.get_current_time_iso(),
-        )
+    validate_text(text)
 
-        if reply_to:
-            post_record.reply = models.AppBskyFeedPost.ReplyRef(
-                parent=models.ComAtprotoRepoStrongRef.Main(
-                    uri=reply_to["uri"], cid=reply_to["cid"]
-                ),
-                root=models.ComAtprotoRepoStrongRef.Main(
-                    uri=reply_to["uri"], cid=reply_to["cid"]
-                ),
-            )
+    sources = as_image_list(image_path)
+    alt_texts = [alt_text] if isinstance(alt_text, str) else list(alt_text)
+    images = upload_images(client, sources, alt_texts, cache) if sources else None
+    post_record = build_post_record(
+        client, text, images, reply_to, root=root, resolver=resolver
+    )
+    return create_post_record(client, post_record)
 
-        if not client.me:
-            raise Exception("Client not authenticated. Please authenticate first.")
 
-        client.app.bsky.feed.post.create(client.me.did, post_record)
+def post(
+    client: Client,
+    text: str,
+    image_path: Union[ImageSource, Sequence[ImageSource], None] = None,
+    alt_text: Union[str, Sequence[str]] = "Image",
+    reply_to: Optional[ReplyRef] = None,
+    cache: Optional[BlobCache] = None,
+    resolver: Optional[IdentityResolver] = None,
+    root: Optional[ReplyRef] = None,
+) -> Optional[ReplyRef]:
+    """
+    Post text and optionally an image to BlueSky.
+
+    Args:
+        client: Authenticated BlueSky client
+        text: The text content of the post
+        image_path: Optional path to an image file, or the image bytes, or a
+            list of up to MAX_IMAGES_PER_POST of them
+        alt_text: Alternative text for the image, or a list with one per image
+        reply_to: Optional reference to a post to reply to
+        cache: Optional blob cache for image conversions and uploads
+        resolver: Optional identity resolver for mention handles
+        root: Root post of the thread being replied to, defaults to ``reply_to``
+
+    Returns:
+        The URI and CID of the created post, or None if posting failed.
+        Errors are logged and printed rather than raised.
+    """
+    try:
+        created = publish_post(
+            client, text, image_path, alt_text, reply_to, cache, resolver, root
+        )
         print("Post successfully published!")
+        return created
 
     except ValueError as e:
         logging.error(e, exc_info=True)
@@ -129,3 +632,4 @@ def post(
     except Exception as e:
         logging.error(f"Post error: {e}", exc_info=True)
         print(f"Post error: {e}")
+    return None
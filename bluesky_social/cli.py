@@ -7,20 +7,76 @@ This module handles argument parsing and calls functions from bluesky_core.
 import argparse
 import logging
 import sys
+from typing import TYPE_CHECKING, Any
 
-from atproto import Client
-
-from .auth import authenticate_bluesky, clear_credentials, get_credentials
-from .bluesky_core import post
-from .config import DEFAULT_LOG_LEVEL, DEFAULT_USERNAME, LOG_FORMAT, SERVICE_NAME
-from .notifications import (
-    get_notifications,
-    list_posts_and_responses,
-    list_unanswered_responses,
+from .config import (
+    DEFAULT_BLOB_CACHE_PATH,
+    DEFAULT_IDENTITY_CACHE_PATH,
+    DEFAULT_LOG_LEVEL,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_STORE_PATH,
+    DEFAULT_USERNAME,
+    LOG_FORMAT,
+    MAX_IMAGES_PER_POST,
+    OUTPUT_FORMATS,
+    SERVICE_NAME,
+    WATCH_MAX_INTERVAL,
+    WATCH_MIN_INTERVAL,
 )
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, DEFAULT_LOG_LEVEL), format=LOG_FORMAT)
+# Modules that pull in atproto or Pillow are imported in the code paths that
+# use them, so --help and keyring-only commands start quickly
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from .accounts import AccountRegistry
+
+
+def run_all_accounts(args: argparse.Namespace, registry: "AccountRegistry") -> None:
+    """Run the requested operation for every registered account and report."""
+    from .accounts import format_report, run_for_accounts
+    from .blob_cache import BlobCache
+    from .bluesky_core import publish_post
+    from .notifications import (
+        iter_notifications,
+        list_unanswered_responses,
+        notification_info,
+    )
+    from .transport import HttpPool
+
+    blob_cache = BlobCache(args.blob_cache) if args.blob_cache else None
+
+    def operation(client: Any) -> Any:
+        if args.get_notifications:
+            return [
+                notification_info(notification)
+                for notification in iter_notifications(client, since=args.since)
+            ]
+        if args.get_responses:
+            return list_unanswered_responses(client, args.max_workers, since=args.since)
+        return publish_post(
+            client, args.text or "", args.image, args.alt or [], cache=blob_cache
+        )["uri"]
+
+    if not (args.get_notifications or args.get_responses or args.text or args.image):
+        print(
+            "Error: --all-accounts needs --get-notifications, --get-responses or a post."
+        )
+        sys.exit(1)
+    if not registry.accounts():
+        print("No accounts registered. Add some with --add-account.")
+        sys.exit(1)
+
+    noun = "notifications" if args.get_notifications else "unanswered responses"
+    with HttpPool(http2=args.http2) as pool:
+        results = run_for_accounts(registry, operation, pool=pool)
+    if blob_cache is not None:
+        blob_cache.close()
+    print(format_report(results, noun))
+    if any(result["error"] for result in results):
+        sys.exit(1)
 
 
 def main() -> None:
@@ -32,22 +88,167 @@ def main() -> None:
         usage="bluesky [options]",
     )
     parser.add_argument("--text", type=str, help="The text to post.")
-    parser.add_argument("--image", type=str, help="Path to an image file.")
     parser.add_argument(
-        "--alt", type=str, help="Alternative text for image.", default="Image"
+        "--image",
+        type=str,
+        action="append",
+        help=f"Path to an image file (repeat for up to {MAX_IMAGES_PER_POST}).",
+    )
+    parser.add_argument(
+        "--alt",
+        type=str,
+        action="append",
+        help="Alternative text for image (repeat once per --image).",
+    )
+    parser.add_argument(
+        "--batch", type=str, help="Publish every post in a JSONL or CSV file"
+    )
+    parser.add_argument(
+        "--batch-results",
+        type=str,
+        help="Per-item results file for --batch, also used to resume "
+        "(default: <batch file>.results.jsonl)",
     )
     parser.add_argument(
         "--clear-credentials", action="store_true", help="Clear stored credentials"
     )
+    parser.add_argument(
+        "--add-account",
+        metavar="USERNAME",
+        help="Register an account for --all-accounts, prompting for its password",
+    )
+    parser.add_argument(
+        "--remove-account",
+        metavar="USERNAME",
+        help="Unregister an account and delete its stored credentials",
+    )
+    parser.add_argument(
+        "--list-accounts", action="store_true", help="List registered accounts"
+    )
+    parser.add_argument(
+        "--all-accounts",
+        action="store_true",
+        help="Run --get-notifications, --get-responses or a post for every "
+        "registered account at once and print a combined report",
+    )
     parser.add_argument(
         "--get-notifications", action="store_true", help="Show notifications"
     )
     parser.add_argument(
         "--get-responses", action="store_true", help="List unanswered responses"
     )
+    parser.add_argument(
+        "--reply-all",
+        type=str,
+        metavar="TEMPLATE",
+        help="Reply to every unanswered response with this text; {author}, "
+        "{text} and the other response fields are filled in, and with --store "
+        "the responses are marked answered",
+    )
     parser.add_argument(
         "--list-posts", action="store_true", help="List your posts and their responses"
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and print new notifications as JSON lines",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print replies to your posts from the live firehose as JSON lines",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        help="Like --stream, but read firehose frames recorded in a file",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        help=f"Shortest wait between --watch polls in seconds "
+        f"(default: {WATCH_MIN_INTERVAL:g})",
+        default=WATCH_MIN_INTERVAL,
+    )
+    parser.add_argument(
+        "--max-poll-interval",
+        type=float,
+        help=f"Longest wait between --watch polls when idle "
+        f"(default: {WATCH_MAX_INTERVAL:g})",
+        default=WATCH_MAX_INTERVAL,
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help=f"Maximum concurrent requests (default: {DEFAULT_MAX_WORKERS})",
+        default=DEFAULT_MAX_WORKERS,
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 where the server supports it (needs the h2 package)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        help=f"Retries for a read that is rate limited or fails transiently "
+        f"(default: {DEFAULT_MAX_RETRIES})",
+        default=DEFAULT_MAX_RETRIES,
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="Output format for --get-notifications, --get-responses and "
+        "--list-posts; results are written as they arrive (default: text)",
+    )
+    parser.add_argument(
+        "--profile",
+        "--stats",
+        action="store_true",
+        help="Print call counts, bytes, latencies and retries per request and "
+        "per instrumented function when done",
+    )
+    parser.add_argument(
+        "--stats-file",
+        type=str,
+        help="Write the --profile statistics to a JSON file when done",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve the statistics in the Prometheus text format on this port "
+        "while --watch or --stream runs",
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        help="Only include items newer than this ISO 8601 timestamp",
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        nargs="?",
+        const=DEFAULT_STORE_PATH,
+        help=f"Cache notifications locally and only fetch new ones "
+        f"(default path: {DEFAULT_STORE_PATH})",
+    )
+    parser.add_argument(
+        "--blob-cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_BLOB_CACHE_PATH,
+        help=f"Reuse earlier uploads of identical images "
+        f"(default path: {DEFAULT_BLOB_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--identity-cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_IDENTITY_CACHE_PATH,
+        help=f"Keep resolved handles and profiles between runs "
+        f"(default path: {DEFAULT_IDENTITY_CACHE_PATH})",
+    )
     parser.add_argument(
         "--username",
         type=str,
@@ -56,6 +257,7 @@ def main() -> None:
     )
 
     args = parser.parse_args()
+    logging.basicConfig(level=getattr(logging, DEFAULT_LOG_LEVEL), format=LOG_FORMAT)
 
     # Show help if no arguments provided
     if len(sys.argv) == 1:
@@ -64,43 +266,222 @@ def main() -> None:
 
     # Handle clearing credentials separately as it doesn't require authentication
     if args.clear_credentials:
+        from .auth import clear_credentials
+
         clear_credentials()
         return
 
+    from .accounts import AccountRegistry
+
+    registry = AccountRegistry()
+    if args.add_account or args.remove_account:
+        try:
+            if args.add_account:
+                from getpass import getpass
+
+                password = getpass(f"Enter the password for {args.add_account}: ")
+                registry.add(args.add_account, password)
+                print(f"Registered {args.add_account}.")
+            elif registry.remove(args.remove_account):
+                print(f"Removed {args.remove_account}.")
+            else:
+                print(f"{args.remove_account} is not registered.")
+        except Exception as e:
+            logging.error(f"Keyring access error: {e}", exc_info=True)
+            print(f"Keyring access error: {e}")
+            sys.exit(1)
+        return
+    if args.list_accounts:
+        accounts = registry.accounts()
+        print("\n".join(accounts) if accounts else "No accounts registered.")
+        return
+    if args.all_accounts:
+        run_all_accounts(args, registry)
+        return
+
     # All other operations require authentication
+    from .auth import (
+        authenticate_bluesky,
+        get_credentials,
+        persist_session,
+        resume_session,
+    )
+    from .blob_cache import BlobCache
+    from .resolver import IdentityResolver
+    from .scheduler import RequestScheduler
+    from .store import NotificationStore
+    from .transport import HttpPool, create_client
+
     username = args.username
-    password = get_credentials(SERVICE_NAME, username)
-    client = Client()
+    # Every request shares one scheduler for rate limiting and retries
+    scheduler = RequestScheduler(args.max_retries)
+    # One connection pool serves every request, sized for the worker threads
+    pool = HttpPool(
+        max_connections=max(DEFAULT_MAX_CONNECTIONS, args.max_workers),
+        http2=args.http2,
+    )
+    client = create_client(pool=pool, scheduler=scheduler)
+    persist_session(client, SERVICE_NAME, username)
 
+    # Keep stdout clean for JSON lines and other structured output
+    structured = args.watch or args.stream or args.replay or args.format != "text"
+    messages = sys.stderr if structured else sys.stdout
     try:
-        authenticate_bluesky(client, username, password)
-        print(f"Successfully authenticated as {username}")
+        # Reuse the stored session; only prompt for a password when it fails
+        if not resume_session(client, SERVICE_NAME, username):
+            password = get_credentials(SERVICE_NAME, username)
+            authenticate_bluesky(client, username, password)
+        print(f"Successfully authenticated as {username}", file=messages)
     except Exception as e:
-        print(f"Authentication error: {e}")
+        print(f"Authentication error: {e}", file=messages)
         sys.exit(1)
 
+    store = NotificationStore(args.store) if args.store else None
+    blob_cache = BlobCache(args.blob_cache) if args.blob_cache else None
+    resolver = IdentityResolver(client, args.identity_cache)
+
+    metrics_server = None
+    if args.metrics_port is not None and (args.watch or args.stream or args.replay):
+        from .metrics import serve_metrics
+
+        metrics_server = serve_metrics(args.metrics_port)
+
     # Handle various command line options
     try:
-        if args.get_notifications:
-            notifications = get_notifications(client)
-            if notifications:
-                print(f"\nYou have {len(notifications)} notifications.")
-            else:
-                print("No notifications found or an error occurred.")
+        if args.watch:
+            from .watch import watch_notifications
+
+            try:
+                watch_notifications(
+                    client,
+                    since=args.since,
+                    min_interval=args.poll_interval,
+                    max_interval=args.max_poll_interval,
+                )
+            except KeyboardInterrupt:
+                pass
+
+        elif args.stream or args.replay:
+            from .stream import (
+                FrameSource,
+                firehose_frames,
+                iter_stream_replies,
+                read_frames,
+            )
+            from .watch import emit_json_line
+
+            frames: FrameSource = (
+                read_frames(args.replay) if args.replay else firehose_frames()
+            )
+            try:
+                for reply in iter_stream_replies(frames, [client.me.did], resolver):
+                    emit_json_line(reply)
+            except KeyboardInterrupt:
+                pass
+
+        elif args.get_notifications:
+            from .notifications import NOTIFICATION_FIELDS, iter_notification_infos
+            from .output import write_records
+
+            count = write_records(
+                iter_notification_infos(client, since=args.since, store=store),
+                args.format,
+                NOTIFICATION_FIELDS,
+                lambda _, info: f"Notification from {info['author']}: {info['reason']}",
+            )
+            if args.format == "text":
+                print(
+                    f"\nYou have {count} notifications."
+                    if count
+                    else "No notifications found."
+                )
 
         elif args.get_responses:
-            responses = list_unanswered_responses(client)
-            if responses:
-                print(f"\nYou have {len(responses)} unanswered responses:")
-                for i, resp in enumerate(responses, 1):
-                    print(f"{i}. From: {resp['author']}")
-                    print(f"   Text: {resp['text']}")
-                    print()
-            else:
-                print("No unanswered responses found.")
+            from .notifications import RESPONSE_FIELDS, iter_unanswered_responses
+            from .output import write_records
+
+            count = write_records(
+                iter_unanswered_responses(
+                    client, args.max_workers, since=args.since, store=store
+                ),
+                args.format,
+                RESPONSE_FIELDS,
+                lambda i, resp: f"{i}. From: {resp['author']}\n"
+                f"   Text: {resp['text']}\n",
+            )
+            if args.format == "text":
+                print(
+                    f"You have {count} unanswered responses."
+                    if count
+                    else "No unanswered responses found."
+                )
+
+        elif args.reply_all:
+            from .batch import reply_all
+            from .notifications import list_unanswered_responses
+
+            responses = list_unanswered_responses(
+                client, args.max_workers, since=args.since, store=store
+            )
+            replies = reply_all(
+                client,
+                responses,
+                args.reply_all,
+                args.max_workers,
+                store=store,
+                resolver=resolver,
+            )
+            failed_replies = [sent for sent in replies if sent["error"]]
+            print(
+                f"Replied to {len(replies) - len(failed_replies)} of "
+                f"{len(responses)} unanswered responses."
+            )
+            for sent in failed_replies:
+                print(f"  Reply to {sent['parent_uri']} failed: {sent['error']}")
+            if failed_replies:
+                sys.exit(1)
 
         elif args.list_posts:
-            list_posts_and_responses(client)
+            from .notifications import POST_FIELDS, iter_posts_and_responses
+            from .output import write_records
+
+            def post_text(_: int, listed: "Mapping[str, Any]") -> str:
+                lines = [f"Post: {listed['text']}"]
+                if listed["error"] is not None:
+                    lines.append(f"Error fetching replies: {listed['error']}")
+                lines.extend(f"  Reply: {reply}" for reply in listed["replies"])
+                return "\n".join(lines)
+
+            write_records(
+                iter_posts_and_responses(
+                    client, args.max_workers, since=args.since, store=store
+                ),
+                args.format,
+                POST_FIELDS,
+                post_text,
+            )
+
+        elif args.batch:
+            from .batch import post_many, read_batch_file
+
+            results_path = args.batch_results or f"{args.batch}.results.jsonl"
+            results = post_many(
+                client,
+                read_batch_file(args.batch),
+                args.max_workers,
+                results_path=results_path,
+                cache=blob_cache,
+                resolver=resolver,
+            )
+            failed_items = [item for item in results if item["error"]]
+            print(
+                f"Published {len(results) - len(failed_items)} of {len(results)} "
+                f"posts. Results written to {results_path}"
+            )
+            for item in failed_items:
+                print(f"  Item {item['index']} failed: {item['error']}")
+            if failed_items:
+                sys.exit(1)
 
         elif args.image or args.text:
             # Ensure text is provided
@@ -109,12 +490,42 @@ def main() -> None:
                 print("Error: Please provide text content or an image to post.")
                 sys.exit(1)
 
-            post(client, text, args.image, args.alt)
+            from .bluesky_core import post
+
+            post(
+                client,
+                text,
+                args.image,
+                args.alt or [],
+                cache=blob_cache,
+                resolver=resolver,
+            )
 
     except Exception as e:
         logging.error(f"Error in command execution: {e}", exc_info=True)
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=messages)
         sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
+        if blob_cache is not None:
+            blob_cache.close()
+        logging.debug(f"Identity resolver: {resolver.stats()}")
+        logging.debug(
+            f"Scheduler: {scheduler.retries} retries, "
+            f"{scheduler.throttled:.1f}s throttled"
+        )
+        resolver.close()
+        pool.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if args.profile or args.stats_file:
+            from .metrics import metrics
+
+            if args.profile:
+                print(metrics.summary(), file=sys.stderr)
+            if args.stats_file:
+                metrics.dump(args.stats_file)
 
 
 if __name__ == "__main__":
@@ -2,16 +2,78 @@
 Configuration constants for the BlueSky social media client.
 """
 
+import os
+
 # Service configuration
 SERVICE_NAME = "Bluesky"
 DEFAULT_USERNAME = "jetsetjaxon.bsky.social"
+SESSION_KEY_SUFFIX = ":session"  # Keyring entry holding the exported session
+ACCOUNTS_KEY = "accounts"  # Keyring entry listing the registered accounts
+DEFAULT_MAX_ACCOUNTS = 8  # Accounts processed at once by --all-accounts
 
 # BlueSky API limits
 MAX_POST_LENGTH = 300  # BlueSky post character limit
 MAX_IMAGE_SIZE = 1_000_000  # 1MB image size limit
+MAX_IMAGES_PER_POST = 4  # Images allowed in one app.bsky.embed.images embed
+MAX_APPLY_WRITES = 200  # Writes accepted per com.atproto.repo.applyWrites call
+MAX_PROFILES_PER_REQUEST = 25  # Actors accepted per app.bsky.actor.getProfiles call
+MAX_POSTS_PER_REQUEST = 25  # URIs accepted per app.bsky.feed.getPosts call
+MAX_TAG_LENGTH = 64  # Longest hashtag, in characters, that is faceted
+
+# Request concurrency
+DEFAULT_MAX_WORKERS = 8  # Parallel thread lookups per listing
+DEFAULT_PAGE_SIZE = 50  # Items per list request (API maximum is 100)
+DEFAULT_THREAD_DEPTH = 1  # Reply levels fetched when a thread is needed
+
+# HTTP connection pool
+DEFAULT_MAX_CONNECTIONS = 20  # Connections open at once across pooled clients
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10  # Idle connections kept for reuse
+DEFAULT_KEEPALIVE_EXPIRY = 30.0  # Seconds an idle connection stays open
+DEFAULT_HTTP_TIMEOUT = 30.0  # Seconds to wait for a read, write or connection
+DEFAULT_CONNECT_TIMEOUT = 10.0  # Seconds to wait for a new connection
+
+# Request scheduling
+DEFAULT_MAX_RETRIES = 4  # Retries for a failed read before giving up
+RETRY_BASE_DELAY = 0.5  # Seconds before the first retry, doubled on each retry
+RETRY_MAX_DELAY = 60.0  # Longest single backoff between retries
+
+# Instrumentation
+# Latency histogram bucket bounds in seconds, as in the Prometheus clients
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PREFIX = "bluesky_social"  # Prefix of exported Prometheus metric names
+
+# Output
+OUTPUT_FORMATS = ("text", "json", "jsonl", "csv")  # Choices for --format
+OUTPUT_BUFFER_SIZE = 64 * 1024  # Bytes buffered before listing output is written
+
+# Notification watcher
+WATCH_MIN_INTERVAL = 5.0  # Seconds between polls while notifications arrive
+WATCH_MAX_INTERVAL = 300.0  # Longest wait between polls when idle
+WATCH_BACKOFF_FACTOR = 1.5  # Interval growth per idle poll
+
+# Local cache
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".bluesky_social", "store.sqlite3"
+)
+
+DEFAULT_BLOB_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".bluesky_social", "blobs.sqlite3"
+)
+# Unreferenced blobs are garbage collected by the PDS, so cached refs expire
+DEFAULT_BLOB_CACHE_TTL = 24 * 60 * 60  # Seconds
+DEFAULT_BLOB_CACHE_MAX_ENTRIES = 256
+
+DEFAULT_IDENTITY_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".bluesky_social", "identities.sqlite3"
+)
+# Handles can be changed by their owners, so resolved DIDs expire
+DEFAULT_IDENTITY_CACHE_TTL = 24 * 60 * 60  # Seconds
+DEFAULT_IDENTITY_CACHE_MAX_ENTRIES = 4096
 
 # Image processing
 DEFAULT_JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 40  # Below this, downscale instead of lowering quality
+MAX_IMAGE_DIMENSION = 2000  # Longest side in pixels, matching the BlueSky app
 
 # User interaction messages
 STORE_CREDENTIALS_PROMPT = "Store credentials in keychain? (y/n): "
@@ -2,66 +2,292 @@
 Image utilities for BlueSky posts.
 
 This module provides functions for working with images in BlueSky posts,
-including format conversion and optimization.
+including format conversion and optimization. Images can be given as a file
+path or as in-memory bytes, and encoded output is returned as bytes; writing
+the result to disk is opt-in.
 """
 
 import logging
+import math
 import os
-from typing import Optional
+import time
+from collections.abc import Sequence
+from io import BytesIO
+from typing import BinaryIO, Optional, TypedDict, Union, cast
 
 from PIL import Image, UnidentifiedImageError
 
-from .config import DEFAULT_JPEG_QUALITY
+from .config import (
+    DEFAULT_JPEG_QUALITY,
+    MAX_IMAGE_DIMENSION,
+    MAX_IMAGE_SIZE,
+    MIN_JPEG_QUALITY,
+)
+from .metrics import instrumented
 
+# Never shrink below this many pixels on the longest side to meet a budget
+_MIN_BUDGET_DIMENSION = 256
 
-def convert_to_jpeg(image_path: str, quality: Optional[int] = None) -> str:
+# A file path, raw image bytes, or a binary file object
+ImageSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+
+def as_image_list(
+    images: Union[ImageSource, Sequence[ImageSource], None],
+) -> list[ImageSource]:
+    """
+    Normalize one image, a sequence of images, or nothing to a list.
+
+    Paths and bytes are single images even though they are sequences too.
+    """
+    if not images:
+        return []
+    if isinstance(images, (str, bytes, bytearray, memoryview)):
+        return [images]
+    if not isinstance(images, Sequence):
+        return [images]
+    # mypy widens this back to include bytes, which were handled above
+    return list(cast(Sequence[ImageSource], images))
+
+
+class EncodeResult(TypedDict):
+    data: bytes
+    quality: int
+    size: tuple[int, int]
+    attempts: int
+    elapsed: float
+
+
+def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """Convert an image to RGB, compositing any transparency onto white."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _describe(source: ImageSource) -> str:
+    """Name an image source in log and error messages."""
+    if isinstance(source, str):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<{len(source)} byte image>"
+    return getattr(source, "name", "<image stream>")
+
+
+def open_image(source: ImageSource) -> Image.Image:
     """
-    Convert an image to JPEG format for upload to BlueSky.
+    Open an image from a path, bytes-like object or binary file object.
 
     Args:
-        image_path: Path to the source image file
+        source: The image to open
+
+    Returns:
+        The opened (lazily decoded) image
+
+    Raises:
+        FileNotFoundError: If a path is given and the file does not exist
+        UnidentifiedImageError: If the data is not a valid image
+    """
+    if isinstance(source, str) and not os.path.exists(source):
+        error_msg = f"Image file not found: {source}"
+        logging.error(error_msg)
+        raise FileNotFoundError(error_msg)
+
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return Image.open(BytesIO(source))
+        return Image.open(source)
+    except UnidentifiedImageError as e:
+        error_msg = f"Not a valid image file: {_describe(source)}"
+        logging.error(error_msg)
+        raise UnidentifiedImageError(error_msg) from e
+
+
+@instrumented("image.encode_jpeg")
+def encode_jpeg(source: ImageSource, quality: Optional[int] = None) -> bytes:
+    """
+    Convert an image to JPEG bytes in memory for upload to BlueSky.
+
+    Args:
+        source: Path, bytes-like object or binary file object of the image
         quality: JPEG quality (1-100), defaults to DEFAULT_JPEG_QUALITY
 
     Returns:
-        Path to the converted JPEG file
+        The encoded JPEG bytes
 
     Raises:
         FileNotFoundError: If the source image file does not exist
-        UnidentifiedImageError: If the file is not a valid image
+        UnidentifiedImageError: If the data is not a valid image
         Exception: For other image processing errors
     """
     if quality is None:
         quality = DEFAULT_JPEG_QUALITY
-    if not os.path.exists(image_path):
-        error_msg = f"Image file not found: {image_path}"
-        logging.error(error_msg)
-        raise FileNotFoundError(error_msg)
+    img = open_image(source)
 
     try:
-        img = Image.open(image_path)
-        jpeg_path = os.path.splitext(image_path)[0] + ".jpeg"
-
         # Convert to RGB (removing alpha channel if present)
-        if img.mode in ("RGBA", "LA") or (
-            img.mode == "P" and "transparency" in img.info
-        ):
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3] if img.mode == "RGBA" else None)
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-
-        # Save as JPEG with specified quality
-        img.save(jpeg_path, format="JPEG", quality=quality, optimize=True)
-        logging.debug(f"Successfully converted {image_path} to JPEG")
-        return jpeg_path
-
-    except UnidentifiedImageError as e:
-        error_msg = f"Not a valid image file: {image_path}"
-        logging.error(error_msg)
-        raise UnidentifiedImageError(error_msg) from e
+        data = _encode_jpeg(_flatten_to_rgb(img), quality)
+        logging.debug(f"Successfully converted {_describe(source)} to JPEG")
+        return data
 
     except Exception as e:
-        error_msg = f"Error converting image {image_path}: {e}"
+        error_msg = f"Error converting image {_describe(source)}: {e}"
         logging.error(error_msg, exc_info=True)
         raise Exception(error_msg) from e
+
+
+@instrumented("image.convert_to_jpeg")
+def convert_to_jpeg(
+    image: ImageSource,
+    quality: Optional[int] = None,
+    output_path: Optional[str] = None,
+) -> str:
+    """
+    Convert an image to a JPEG file on disk.
+
+    Posting does not need this; use ``encode_jpeg`` to stay in memory.
+
+    Args:
+        image: Path, bytes-like object or binary file object of the image
+        quality: JPEG quality (1-100), defaults to DEFAULT_JPEG_QUALITY
+        output_path: Where to write the JPEG, defaults to the source path with
+            a ``.jpeg`` extension (required when ``image`` is not a path)
+
+    Returns:
+        Path to the converted JPEG file
+
+    Raises:
+        FileNotFoundError: If the source image file does not exist
+        UnidentifiedImageError: If the file is not a valid image
+        ValueError: If no output path can be determined
+        Exception: For other image processing errors
+    """
+    if output_path is None:
+        if not isinstance(image, str):
+            raise ValueError("output_path is required when converting image data")
+        output_path = os.path.splitext(image)[0] + ".jpeg"
+
+    data = encode_jpeg(image, quality)
+    with open(output_path, "wb") as jpeg_file:
+        jpeg_file.write(data)
+    return output_path
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _downscale(img: Image.Image, max_dimension: int) -> Image.Image:
+    """Shrink an image so its longest side is at most ``max_dimension``."""
+    longest = max(img.size)
+    if longest <= max_dimension:
+        return img
+    # reduce() box-averages by an integer factor, which is much cheaper than a
+    # full resample; the remaining fraction is handled by a LANCZOS resize
+    factor = longest // max_dimension
+    if factor >= 2:
+        img = img.reduce(factor)
+    scale = max_dimension / max(img.size)
+    if scale < 1:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.LANCZOS)
+    return img
+
+
+@instrumented("image.encode_to_budget")
+def encode_to_budget(
+    image: ImageSource,
+    max_bytes: int = MAX_IMAGE_SIZE,
+    max_quality: int = DEFAULT_JPEG_QUALITY,
+    min_quality: int = MIN_JPEG_QUALITY,
+    max_dimension: int = MAX_IMAGE_DIMENSION,
+) -> EncodeResult:
+    """
+    Encode an image as the best quality JPEG that fits within a byte budget.
+
+    The image is first limited to ``max_dimension`` pixels on its longest side
+    (JPEG sources are decoded at reduced scale with ``Image.draft``). The
+    highest quality between ``min_quality`` and ``max_quality`` that fits is
+    then found by binary search; if even ``min_quality`` is too large, the
+    dimensions are scaled down in proportion to the overshoot and the search
+    repeats.
+
+    Args:
+        image: Path, bytes-like object or binary file object of the image
+        max_bytes: Maximum size of the encoded image in bytes
+        max_quality: Highest JPEG quality to try
+        min_quality: Lowest JPEG quality accepted before downscaling
+        max_dimension: Maximum width or height of the encoded image
+
+    Returns:
+        The encoded bytes with the chosen quality and size, the number of
+        encode attempts and the seconds spent
+
+    Raises:
+        FileNotFoundError: If the source image file does not exist
+        UnidentifiedImageError: If the file is not a valid image
+        ValueError: If the image cannot be made to fit the budget
+    """
+    started = time.perf_counter()
+    attempts = 0
+    img = open_image(image)
+
+    if img.format == "JPEG" and max(img.size) > max_dimension:
+        # Let the decoder skip detail we are about to throw away
+        scale = max_dimension / max(img.size)
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    img = _downscale(_flatten_to_rgb(img), max_dimension)
+
+    while True:
+        # Most images fit at full quality once resized; then try the floor so
+        # hopeless cases go straight to downscaling instead of a full search
+        best: Optional[tuple[int, bytes]] = None
+        floor_size = 0
+        for quality in (max_quality, min_quality):
+            attempts += 1
+            data = _encode_jpeg(img, quality)
+            if len(data) <= max_bytes:
+                best = (quality, data)
+                break
+            floor_size = len(data)
+        if best is not None and best[0] == min_quality:
+            low, high = min_quality + 1, max_quality - 1
+            while low <= high:
+                quality = (low + high + 1) // 2
+                attempts += 1
+                data = _encode_jpeg(img, quality)
+                if len(data) <= max_bytes:
+                    best = (quality, data)
+                    low = quality + 1
+                else:
+                    high = quality - 1
+
+        if best is not None:
+            elapsed = time.perf_counter() - started
+            logging.debug(
+                f"Encoded {_describe(image)} at quality {best[0]}, {img.size}, "
+                f"{len(best[1])} bytes in {attempts} attempts ({elapsed:.3f}s)"
+            )
+            return {
+                "data": best[1],
+                "quality": best[0],
+                "size": img.size,
+                "attempts": attempts,
+                "elapsed": elapsed,
+            }
+
+        if max(img.size) <= _MIN_BUDGET_DIMENSION:
+            raise ValueError(
+                f"Could not encode {_describe(image)} within {max_bytes} bytes"
+            )
+        # Bytes scale roughly with pixel count; aim slightly under the budget
+        scale = min(0.9, math.sqrt(max_bytes / floor_size) * 0.95)
+        target = max(_MIN_BUDGET_DIMENSION, int(max(img.size) * scale))
+        img = _downscale(img, target)
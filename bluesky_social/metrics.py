@@ -0,0 +1,332 @@
+"""
+Request and function instrumentation for BlueSky.
+
+Every XRPC call sent through a ``ScheduledRequest`` and every function
+wrapped with ``instrumented`` is recorded in a ``Metrics`` registry: calls,
+errors, retries, bytes sent and received, and a latency histogram per XRPC
+method or function. The process-wide registry ``metrics`` can be printed as
+a summary table, dumped as JSON, or exported in the Prometheus text format,
+optionally over HTTP for long-running watchers.
+
+Recording takes a lock and a few additions, so it stays on all the time.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, TypeVar
+
+from .config import LATENCY_BUCKETS, METRICS_PREFIX
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Kinds of operation, used as the "kind" label
+XRPC = "xrpc"
+FUNCTION = "function"
+
+
+class OperationStats:
+    """Counters and a latency histogram for one XRPC method or function."""
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "retries",
+        "bytes_sent",
+        "bytes_received",
+        "seconds",
+        "max_seconds",
+        "buckets",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # One count per bucket in LATENCY_BUCKETS, then one for slower calls
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a latency quantile as the upper bound of its bucket.
+
+        Calls slower than the last bucket are reported as the slowest call.
+        """
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), self.buckets):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "seconds": self.seconds,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _size(count: int) -> str:
+    if count < 1024:
+        return f"{count}B"
+    size = count / 1024
+    for unit in ("KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+class Metrics:
+    """
+    A thread-safe registry of operation statistics.
+
+    Operations are keyed by kind (``"xrpc"`` or ``"function"``) and name,
+    such as ``("xrpc", "app.bsky.feed.getPosts")`` or
+    ``("function", "image.encode_to_budget")``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], OperationStats] = {}
+
+    def observe(
+        self,
+        kind: str,
+        name: str,
+        seconds: float,
+        error: bool = False,
+        sent: int = 0,
+        received: int = 0,
+    ) -> None:
+        """
+        Record one call.
+
+        Args:
+            kind: "xrpc" or "function"
+            name: XRPC method or function name
+            seconds: How long the call took
+            error: Whether the call failed
+            sent: Bytes sent, for requests
+            received: Bytes received, for requests
+        """
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            stats = self._stats.get((kind, name))
+            if stats is None:
+                stats = self._stats[(kind, name)] = OperationStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.buckets[index] += 1
+
+    def retry(self, kind: str, name: str) -> None:
+        """Record that a failed call is about to be retried."""
+        with self._lock:
+            self._stats.setdefault((kind, name), OperationStats()).retries += 1
+
+    @contextmanager
+    def timed(self, kind: str, name: str) -> Iterator[None]:
+        """Record the time spent in a block, as an error if it raises."""
+        started = time.perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            self.observe(kind, name, time.perf_counter() - started, error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """
+        Return the statistics as plain data, suitable for JSON.
+
+        Returns:
+            Statistics by kind, then by name; histogram buckets are
+            cumulative and keyed by their upper bound in seconds
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            result: dict[str, dict[str, dict[str, Any]]] = {}
+            for (kind, name), stats in items:
+                result.setdefault(kind, {})[name] = stats.as_dict()
+        return result
+
+    def dump(self, path: str) -> None:
+        """Write the statistics to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+
+    def summary(self) -> str:
+        """
+        Format the statistics as a table, slowest operations first.
+
+        Returns:
+            The table, or a note that nothing was recorded
+        """
+        rows = [
+            (kind, name, entry)
+            for kind, entries in self.snapshot().items()
+            for name, entry in entries.items()
+        ]
+        if not rows:
+            return "No calls recorded."
+        rows.sort(key=lambda row: row[2]["seconds"], reverse=True)
+        width = max(len(name) for _, name, _ in rows)
+        header = (
+            f"{'Operation':<{width + 10}} {'Calls':>6} {'Errors':>6} "
+            f"{'Retries':>7} {'Sent':>8} {'Received':>8} {'Total s':>8} "
+            f"{'Mean ms':>8} {'p95 ms':>8} {'Max ms':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for kind, name, entry in rows:
+            mean = entry["seconds"] / entry["calls"] if entry["calls"] else 0.0
+            lines.append(
+                f"{kind + ' ' + name:<{width + 10}} {entry['calls']:>6} "
+                f"{entry['errors']:>6} {entry['retries']:>7} "
+                f"{_size(entry['bytes_sent']):>8} "
+                f"{_size(entry['bytes_received']):>8} "
+                f"{entry['seconds']:>8.2f} {mean * 1000:>8.1f} "
+                f"{entry['p95_seconds'] * 1000:>8.1f} "
+                f"{entry['max_seconds'] * 1000:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """
+        Format the statistics in the Prometheus text exposition format.
+
+        Returns:
+            Counters for calls, errors, retries and bytes, and a latency
+            histogram, each labelled with the operation's kind and name
+        """
+        snapshot = self.snapshot()
+        entries = [
+            (f'kind="{_label(kind)}",name="{_label(name)}"', entry)
+            for kind, named in snapshot.items()
+            for name, entry in named.items()
+        ]
+        lines = []
+        for field, help_text in (
+            ("calls", "Calls made"),
+            ("errors", "Calls that failed"),
+            ("retries", "Failed calls that were retried"),
+            ("bytes_sent", "Request bytes sent"),
+            ("bytes_received", "Response bytes received"),
+        ):
+            metric = f"{METRICS_PREFIX}_{field}_total"
+            lines.append(f"# HELP {metric} {help_text}.")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(
+                f"{metric}{{{labels}}} {entry[field]}" for labels, entry in entries
+            )
+
+        metric = f"{METRICS_PREFIX}_latency_seconds"
+        lines.append(f"# HELP {metric} Call latency.")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, entry in entries:
+            for bound, count in entry["buckets"].items():
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {entry['seconds']}")
+            lines.append(f"{metric}_count{{{labels}}} {entry['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+# The registry every instrumented function and scheduled request records to
+metrics = Metrics()
+
+
+def instrumented(name: str, registry: Optional[Metrics] = None) -> Callable[[F], F]:
+    """
+    Decorate a function so each call is recorded as a "function" operation.
+
+    Args:
+        name: Operation name, such as "image.encode_to_budget"
+        registry: Registry to record to; defaults to ``metrics``
+
+    Returns:
+        The decorator
+    """
+
+    def decorate(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with (registry or metrics).timed(FUNCTION, name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def serve_metrics(
+    port: int, registry: Optional[Metrics] = None, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Serve the statistics in the Prometheus text format from a background thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free one
+        registry: Registry to serve; defaults to ``metrics``
+        host: Address to listen on
+
+    Returns:
+        The running server; call ``shutdown()`` to stop it
+    """
+    source = registry or metrics
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = source.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logging.debug(f"Metrics request: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -6,154 +6,614 @@ and post responses.
 """
 
 import logging
-from typing import Any
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional, TypedDict
 
+from .config import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_THREAD_DEPTH,
+    MAX_POSTS_PER_REQUEST,
+)
+from .pagination import Timestamp, chunked, paginate, parse_timestamp
+from .records import (
+    NotificationRecord,
+    PostSummary,
+    ResponseRecord,
+    extract,
+    notification_record,
+    response_record,
+)
+from .store import NotificationStore
 
-def get_notifications(client: Any) -> list[dict[str, Any]]:
+# Keys of the records each listing yields, in output column order
+NOTIFICATION_FIELDS = NotificationRecord.__slots__
+RESPONSE_FIELDS = ResponseRecord.__slots__
+POST_FIELDS = PostSummary.__slots__
+
+
+class ThreadResult(TypedDict):
+    uri: str
+    thread: Any
+    error: Optional[Exception]
+
+
+def fetch_threads(
+    client: Any,
+    uris: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[ThreadResult]:
+    """
+    Fetch post threads concurrently with a bounded number of workers.
+
+    Only the replies below each post are requested, down to ``depth`` levels;
+    parent posts are not.
+
+    Args:
+        client: An authenticated BlueSky client
+        uris: URIs of the posts whose threads should be fetched
+        max_workers: Maximum number of requests in flight at once
+        depth: How many levels of replies to fetch
+
+    Returns:
+        One result per URI, in the same order as ``uris``. A failed lookup
+        has ``thread`` set to None and the exception stored in ``error``.
+    """
+
+    def fetch(uri: str) -> ThreadResult:
+        try:
+            thread = client.app.bsky.feed.get_post_thread(
+                {"uri": uri, "depth": depth, "parent_height": 0}
+            )
+            return {"uri": uri, "thread": thread, "error": None}
+        except Exception as e:
+            logging.error(f"Error fetching thread {uri}: {e}", exc_info=True)
+            return {"uri": uri, "thread": None, "error": e}
+
+    if max_workers <= 1 or len(uris) <= 1:
+        return [fetch(uri) for uri in uris]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(uris))) as executor:
+        return list(executor.map(fetch, uris))
+
+
+def fetch_posts(
+    client: Any, uris: Iterable[str], max_workers: int = DEFAULT_MAX_WORKERS
+) -> dict[str, Any]:
+    """
+    Hydrate posts in bulk with ``app.bsky.feed.getPosts``.
+
+    URIs are deduplicated and requested MAX_POSTS_PER_REQUEST at a time, with
+    batches fetched concurrently. A failed batch is logged and its posts are
+    left out, so callers can fall back to per-post thread lookups.
+
+    Args:
+        client: An authenticated BlueSky client
+        uris: URIs of the posts to fetch
+        max_workers: Maximum number of requests in flight at once
+
+    Returns:
+        Post views keyed by URI. Deleted or unavailable posts are missing.
+    """
+    batches = list(chunked(dict.fromkeys(uris), MAX_POSTS_PER_REQUEST))
+
+    def fetch(batch: list[str]) -> list[Any]:
+        try:
+            return list(client.app.bsky.feed.get_posts({"uris": batch}).posts)
+        except Exception as e:
+            logging.warning(f"Error fetching {len(batch)} posts: {e}")
+            return []
+
+    if max_workers <= 1 or len(batches) <= 1:
+        results = [fetch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(fetch, batches))
+    return {post.uri: post for posts in results for post in posts}
+
+
+def notification_past(notification: Any, cutoff: Optional[datetime]) -> bool:
+    """Whether a notification is at or before the cutoff, ending iteration."""
+    indexed_at = getattr(notification, "indexed_at", None)
+    return bool(cutoff and indexed_at and parse_timestamp(indexed_at) <= cutoff)
+
+
+def feed_item_past(item: Any, cutoff: Optional[datetime]) -> bool:
+    """Whether a feed item is at or before the cutoff, ending iteration."""
+    # Pinned posts are listed first regardless of age
+    pinned = getattr(getattr(item, "reason", None), "py_type", None) == (
+        "app.bsky.feed.defs#reasonPin"
+    )
+    indexed_at = getattr(getattr(item, "post", None), "indexed_at", None)
+    return bool(
+        cutoff and not pinned and indexed_at and parse_timestamp(indexed_at) <= cutoff
+    )
+
+
+def iter_notifications(
+    client: Any,
+    since: Optional[Timestamp] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: bool = True,
+) -> Generator[Any, None, None]:
+    """
+    Iterate over notifications, newest first, following the cursor lazily.
+
+    Args:
+        client: An authenticated BlueSky client
+        since: Stop once notifications indexed at or before this time are reached
+        page_size: Number of notifications requested per page
+        prefetch: Fetch the next page in the background while the current one
+            is consumed
+
+    Yields:
+        Notification models from the BlueSky API
+    """
+    cutoff = parse_timestamp(since) if since is not None else None
+    pages = paginate(
+        lambda cursor: client.app.bsky.notification.list_notifications(
+            {"limit": page_size, "cursor": cursor}
+        ),
+        "notifications",
+        prefetch,
+    )
+    for notification in pages:
+        if notification_past(notification, cutoff):
+            pages.close()
+            return
+        yield notification
+
+
+def iter_author_feed(
+    client: Any,
+    actor: Optional[str] = None,
+    since: Optional[Timestamp] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: bool = True,
+) -> Generator[Any, None, None]:
+    """
+    Iterate over an author's feed, newest first, following the cursor lazily.
+
+    Args:
+        client: An authenticated BlueSky client
+        actor: Handle or DID of the author, defaults to the authenticated user
+        since: Stop once posts indexed at or before this time are reached
+        page_size: Number of feed items requested per page
+        prefetch: Fetch the next page in the background while the current one
+            is consumed
+
+    Yields:
+        Feed view items from the BlueSky API
+    """
+    cutoff = parse_timestamp(since) if since is not None else None
+    actor = actor or client.me.handle
+    pages = paginate(
+        lambda cursor: client.app.bsky.feed.get_author_feed(
+            {"actor": actor, "limit": page_size, "cursor": cursor}
+        ),
+        "feed",
+        prefetch,
+    )
+    for item in pages:
+        if feed_item_past(item, cutoff):
+            pages.close()
+            return
+        yield item
+
+
+def newest_timestamp(
+    items: Iterable[Any],
+    timestamp: Callable[[Any], Optional[str]],
+    newest: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Return the latest timestamp among items, or ``newest`` if it is later."""
+    # Not just the first item: a pinned post leads the feed whatever its age
+    for item in items:
+        value = timestamp(item)
+        if value:
+            parsed = parse_timestamp(value)
+            if newest is None or parsed > newest:
+                newest = parsed
+    return newest
+
+
+def advance_marker(
+    store: NotificationStore, account: str, key: str, newest: Optional[datetime]
+) -> None:
+    """Store a sync marker, never moving it backwards."""
+    if newest is None:
+        return
+    current = store.get_state(account, key)
+    if current is None or newest > parse_timestamp(current):
+        store.set_state(account, key, newest.isoformat())
+
+
+def _sync_items(
+    store: NotificationStore,
+    account: str,
+    key: str,
+    items: Iterator[Any],
+    add: Callable[[str, list[Any]], int],
+    timestamp: Callable[[Any], Optional[str]],
+) -> int:
+    """Write items to the store page by page, then advance the sync marker."""
+    added = 0
+    newest = None
+    for page in chunked(items, DEFAULT_PAGE_SIZE):
+        newest = newest_timestamp(page, timestamp, newest)
+        added += add(account, page)
+    # Only move the marker once the whole delta is stored, so an interrupted
+    # sync is retried from the same point
+    advance_marker(store, account, key, newest)
+    return added
+
+
+def sync_store(client: Any, store: NotificationStore) -> tuple[int, int]:
+    """
+    Pull notifications and authored posts newer than the last sync into a store.
+
+    Args:
+        client: An authenticated BlueSky client
+        store: The local store to update
+
+    Returns:
+        The number of notifications and posts written
+    """
+    account = client.me.did
+    notifications = _sync_items(
+        store,
+        account,
+        "notifications_indexed_at",
+        iter_notifications(
+            client, since=store.get_state(account, "notifications_indexed_at")
+        ),
+        store.add_notifications,
+        lambda notification: getattr(notification, "indexed_at", None),
+    )
+    posts = _sync_items(
+        store,
+        account,
+        "feed_indexed_at",
+        iter_author_feed(client, since=store.get_state(account, "feed_indexed_at")),
+        store.add_posts,
+        lambda item: getattr(getattr(item, "post", None), "indexed_at", None),
+    )
+    logging.info(f"Synced {notifications} notifications and {posts} posts")
+    return notifications, posts
+
+
+def notification_info(
+    notification: Any, intern_handles: bool = False
+) -> NotificationRecord:
+    """Extract the fields shown for a notification into a ``NotificationRecord``."""
+    return notification_record(notification, intern_handles)
+
+
+def post_info(post: Any, intern_handles: bool = False) -> ResponseRecord:
+    """
+    Extract the fields shown for a post into a ``ResponseRecord``.
+
+    Works on post views and on reply notifications, which carry the same
+    ``cid``, ``uri``, ``author`` and ``record`` attributes.
+    """
+    return response_record(post, intern_handles)
+
+
+def thread_replies(thread: Any) -> list[Any]:
+    """Return the direct replies of a ``getPostThread`` response."""
+    return list(getattr(getattr(thread, "thread", None), "replies", None) or [])
+
+
+def is_answered(replies: Iterable[Any], handle: str) -> bool:
+    """Whether any of the replies was written by the given handle."""
+    return any(
+        getattr(getattr(reply.post, "author", None), "handle", None) == handle
+        for reply in replies
+    )
+
+
+def needs_thread(uris: Iterable[str], hydrated: dict[str, Any]) -> list[str]:
+    """
+    Pick the replies whose threads must be fetched to know if they are answered.
+
+    Posts that could not be hydrated fall back to a thread lookup; a post
+    known to have no replies is unanswered without one.
+    """
+    return [uri for uri in uris if getattr(hydrated.get(uri), "reply_count", None) != 0]
+
+
+def replied_uris(items: Iterable[Any]) -> list[str]:
+    """Return the URIs of the feed items whose posts have replies."""
+    return [item.post.uri for item in items if getattr(item, "reply_count", 0) > 0]
+
+
+def unanswered_in_batch(
+    notifications: Iterable[Any], threads: dict[str, ThreadResult], handle: str
+) -> Iterator[ResponseRecord]:
+    """
+    Yield the reply notifications of a batch that the given handle has not answered.
+
+    Args:
+        notifications: Reply notifications
+        threads: Fetched threads by post URI; a reply without one has no
+            replies of its own
+        handle: Handle of the account whose answers count
+
+    Yields:
+        Response records of the unanswered replies. Replies whose thread
+        lookup failed are logged and skipped.
+    """
+    for notification in notifications:
+        try:
+            result = threads.get(notification.uri)
+            if result is None:
+                replies = []
+            elif result["error"] is not None:
+                raise result["error"]
+            else:
+                replies = thread_replies(result["thread"])
+        except Exception as e:
+            logging.error(
+                f"Error processing thread for notification {getattr(notification, 'uri', None)}: {e}",
+                exc_info=True,
+            )
+            continue
+        if not is_answered(replies, handle):
+            yield post_info(notification, intern_handles=True)
+
+
+def post_summary(item: Any, threads: dict[str, ThreadResult]) -> PostSummary:
+    """
+    Summarize an author feed item with the replies from its fetched thread.
+
+    Args:
+        item: Feed item from ``iter_author_feed``
+        threads: Fetched threads by post URI; only needed for posts that
+            have replies
+
+    Returns:
+        The post's summary; ``error`` is set if its thread lookup failed
+    """
+    cid, uri, _, text = extract(getattr(item, "post", None))
+    if not getattr(item, "reply_count", 0) > 0:
+        return PostSummary(uri, cid, text, (), None)
+    result = threads[item.post.uri]
+    if result["error"] is not None:
+        return PostSummary(uri, cid, text, (), repr(result["error"]))
+    replies = tuple(
+        extract(reply.post)[3] for reply in thread_replies(result["thread"])
+    )
+    return PostSummary(uri, cid, text, replies, None)
+
+
+def iter_notification_infos(
+    client: Any,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+) -> Iterator[NotificationRecord]:
+    """
+    Yield notification records, newest first, as their pages arrive.
+
+    Author handles are interned, so a long listing keeps one copy of each.
+
+    Args:
+        client: An authenticated BlueSky client
+        since: Only fetch notifications indexed after this time
+        store: Optional local store; only new notifications are fetched and
+            the result is read back from the store
+
+    Yields:
+        Notification records
+    """
+    if store is not None:
+        sync_store(client, store)
+        for row in store.notifications(client.me.did, since=since):
+            yield NotificationRecord(**row)
+        return
+    for notification in iter_notifications(client, since=since):
+        yield notification_info(notification, intern_handles=True)
+
+
+def get_notifications(
+    client: Any,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+) -> list[NotificationRecord]:
     """
     Fetch notifications from the BlueSky network.
 
     Args:
         client: An authenticated BlueSky client
+        since: Only fetch notifications indexed after this time
+        store: Optional local store; only new notifications are fetched and
+            the result is read back from the store
 
     Returns:
-        A list of notification information dictionaries
+        A list of notification records
     """
     try:
-        notifications = client.app.bsky.notification.list_notifications().notifications
-        result = []
-        for notification in notifications:
-            info = {
-                "author": getattr(notification.author, "handle", None),
-                "reason": getattr(notification, "reason", None),
-                "cid": getattr(notification, "cid", None),
-                "uri": getattr(notification, "uri", None),
-                "text": getattr(getattr(notification, "record", None), "text", None),
-            }
-            print(f"Notification from {info['author']}: {info['reason']}")
-            result.append(info)
-        return result
+        return list(iter_notification_infos(client, since, store))
     except Exception as e:
         logging.error(f"Notifications error: {e}", exc_info=True)
-        print(f"Notifications error: {e!r}")
         return []
 
 
-def get_responses(client: Any, post_id: str) -> list[dict[str, Any]]:
+def get_responses(
+    client: Any, post_id: str, depth: int = DEFAULT_THREAD_DEPTH
+) -> list[ResponseRecord]:
     """
     Fetch responses to a specific post.
 
     Args:
         client: An authenticated BlueSky client
         post_id: URI of the post to get responses for
+        depth: How many levels of replies to fetch
 
     Returns:
-        A list of response information dictionaries
+        A list of response records
     """
     try:
-        thread = client.app.bsky.feed.get_post_thread({"uri": post_id})
-        responses = []
-        if hasattr(thread.thread, "replies") and thread.thread.replies:
-            for reply in thread.thread.replies:
-                responses.append(
-                    {
-                        "text": getattr(
-                            getattr(reply.post, "record", None), "text", None
-                        ),
-                        "author": getattr(
-                            getattr(reply.post, "author", None), "handle", None
-                        ),
-                        "cid": getattr(reply.post, "cid", None),
-                        "uri": getattr(reply.post, "uri", None),
-                    }
-                )
-        return responses
+        thread = client.app.bsky.feed.get_post_thread(
+            {"uri": post_id, "depth": depth, "parent_height": 0}
+        )
+        return [post_info(reply.post) for reply in thread_replies(thread)]
     except Exception as e:
         logging.error(f"Responses error: {e}", exc_info=True)
-        print(f"Responses error: {e!r}")
         return []
 
 
-def list_posts_and_responses(client: Any) -> None:
+def iter_posts_and_responses(
+    client: Any,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> Iterator[PostSummary]:
+    """
+    Yield the user's posts with the texts of their replies, newest first.
+
+    Feed items already carry reply counts, so threads are only fetched for
+    posts that have replies, one feed page at a time; each page's posts are
+    yielded as soon as its threads are in.
+
+    Args:
+        client: An authenticated BlueSky client
+        max_workers: Maximum number of thread lookups in flight at once
+        since: Only list posts indexed after this time
+        store: Optional local store; replies are read from cached reply
+            notifications instead of fetching each thread
+        depth: How many levels of replies to fetch per thread
+
+    Yields:
+        Post summaries; ``error`` is set when a post's thread could not be
+        fetched
+    """
+    if store is not None:
+        sync_store(client, store)
+        for stored in store.posts(client.me.did, since=since):
+            yield PostSummary(
+                stored["uri"],
+                stored["cid"],
+                stored["text"],
+                tuple(stored["replies"]),
+                None,
+            )
+        return
+
+    feed = iter_author_feed(client, since=since)
+    for page in chunked(feed, DEFAULT_PAGE_SIZE):
+        threads = {
+            result["uri"]: result
+            for result in fetch_threads(client, replied_uris(page), max_workers, depth)
+        }
+        for post in page:
+            yield post_summary(post, threads)
+
+
+def list_posts_and_responses(
+    client: Any,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[PostSummary]:
     """
     List all posts and their responses for the authenticated user.
 
     Args:
         client: An authenticated BlueSky client
+        max_workers: Maximum number of thread lookups in flight at once
+        since: Only list posts indexed after this time
+        store: Optional local store; replies are read from cached reply
+            notifications instead of fetching each thread
+        depth: How many levels of replies to fetch per thread
+
+    Returns:
+        Post summaries as yielded by ``iter_posts_and_responses``
     """
     try:
-        feed = client.app.bsky.feed.get_author_feed({"actor": client.me.handle}).feed
-        for post in feed:
-            post_obj = getattr(post, "post", None)
-            post_text = (
-                getattr(getattr(post_obj, "record", None), "text", None)
-                if post_obj
-                else None
-            )
-            print(f"Post: {post_text}")
-            if getattr(post, "reply_count", 0) > 0:
-                try:
-                    thread = client.app.bsky.feed.get_post_thread(
-                        {"uri": post.post.uri}
-                    )
-                    if hasattr(thread.thread, "replies") and thread.thread.replies:
-                        for reply in thread.thread.replies:
-                            print(
-                                f"  Reply: {getattr(getattr(reply.post, 'record', None), 'text', None)}"
-                            )
-                except Exception as e:
-                    logging.error(f"Error fetching replies: {e}", exc_info=True)
-                    print(f"Error fetching replies: {e!r}")
+        return list(iter_posts_and_responses(client, max_workers, since, store, depth))
     except Exception as e:
         logging.error(f"Listing error: {e}", exc_info=True)
-        print(f"Listing error: {e!r}")
+        return []
+
+
+def iter_unanswered_responses(
+    client: Any,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> Iterator[ResponseRecord]:
+    """
+    Yield unanswered responses to the user's posts as each batch is checked.
+
+    Reply posts are first hydrated in bulk with getPosts; a reply with no
+    replies of its own is unanswered without further requests, and threads
+    are only fetched, concurrently, for the rest. A failed lookup is logged
+    and skipped without aborting the rest of the batch. With a store, only
+    new notifications and posts are fetched and the answer comes from a
+    local query instead of thread lookups.
+
+    Args:
+        client: An authenticated BlueSky client
+        max_workers: Maximum number of requests in flight at once
+        since: Only consider notifications indexed after this time
+        store: Optional local store to sync and query
+        depth: How many levels of replies to fetch per thread
+
+    Yields:
+        Unanswered response records, in notification order
+    """
+    if store is not None:
+        sync_store(client, store)
+        for row in store.unanswered_responses(client.me.did, since=since):
+            yield ResponseRecord(**row)
+        return
+
+    replies_to_me = (
+        notification
+        for notification in iter_notifications(client, since=since)
+        if getattr(notification, "reason", None) == "reply"
+    )
+    for batch in chunked(replies_to_me, DEFAULT_PAGE_SIZE):
+        uris = [notification.uri for notification in batch]
+        hydrated = fetch_posts(client, uris, max_workers)
+        threads = {
+            result["uri"]: result
+            for result in fetch_threads(
+                client, needs_thread(uris, hydrated), max_workers, depth
+            )
+        }
+        yield from unanswered_in_batch(batch, threads, client.me.handle)
 
 
-def list_unanswered_responses(client: Any) -> list[dict[str, Any]]:
+def list_unanswered_responses(
+    client: Any,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    since: Optional[Timestamp] = None,
+    store: Optional[NotificationStore] = None,
+    depth: int = DEFAULT_THREAD_DEPTH,
+) -> list[ResponseRecord]:
     """
     List all unanswered responses to the user's posts.
 
     Args:
         client: An authenticated BlueSky client
+        max_workers: Maximum number of requests in flight at once
+        since: Only consider notifications indexed after this time
+        store: Optional local store to sync and query
+        depth: How many levels of replies to fetch per thread
 
     Returns:
-        A list of unanswered response information dictionaries
+        A list of unanswered response records, in notification order, as
+        yielded by ``iter_unanswered_responses``
     """
-    unanswered = []
     try:
-        notifications = client.app.bsky.notification.list_notifications().notifications
-        for notification in notifications:
-            if getattr(notification, "reason", None) == "reply":
-                try:
-                    thread = client.app.bsky.feed.get_post_thread(
-                        {"uri": notification.uri}
-                    )
-                    replies = getattr(thread.thread, "replies", [])
-                    if not replies or not any(
-                        getattr(getattr(reply.post, "author", None), "handle", None)
-                        == client.me.handle
-                        for reply in replies
-                    ):
-                        unanswered.append(
-                            {
-                                "cid": getattr(notification, "cid", None),
-                                "uri": getattr(notification, "uri", None),
-                                "author": getattr(notification.author, "handle", None),
-                                "text": getattr(
-                                    getattr(notification, "record", None), "text", None
-                                ),
-                            }
-                        )
-                except Exception as e:
-                    logging.error(
-                        f"Error processing thread for notification {getattr(notification, 'uri', None)}: {e}",
-                        exc_info=True,
-                    )
-                    print(
-                        f"Error processing thread for notification {getattr(notification, 'uri', None)}: {e!r}"
-                    )
-        return unanswered
+        return list(iter_unanswered_responses(client, max_workers, since, store, depth))
     except Exception as e:
         logging.error(f"Unanswered responses error: {e}", exc_info=True)
-        print(f"Unanswered responses error: {e!r}")
         return []
@@ -0,0 +1,154 @@
+"""
+Structured output for BlueSky listings.
+
+``RecordWriter`` writes result dictionaries as human-readable text, one JSON
+array, JSON lines or CSV, one record at a time. Fed from the ``iter_*``
+listing generators, output starts as soon as the first page is in and
+memory stays flat however long the listing is. Writes go through a single
+buffered stream instead of one terminal write per line.
+"""
+
+import csv
+import json
+import sys
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, TextIO
+
+from .config import OUTPUT_BUFFER_SIZE, OUTPUT_FORMATS
+
+# Formats a 1-based record number and a record as lines of text
+TextFormatter = Callable[[int, Mapping[str, Any]], str]
+
+
+@contextmanager
+def open_stdout(buffer_size: int = OUTPUT_BUFFER_SIZE) -> Iterator[TextIO]:
+    """
+    Open a UTF-8 text stream on standard output with a large buffer.
+
+    The stream is flushed and closed on exit, leaving standard output open.
+    When standard output has no file descriptor, as under test capture, it is
+    used as is.
+    """
+    sys.stdout.flush()
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        yield sys.stdout
+        return
+    with open(
+        fd, "w", buffering=buffer_size, encoding="utf-8", newline="", closefd=False
+    ) as stream:
+        yield stream
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class RecordWriter:
+    """
+    Write records to a stream in one of ``OUTPUT_FORMATS``.
+
+    Args:
+        stream: Where to write; it is flushed, not closed, by ``close``
+        format: "text", "json", "jsonl" or "csv"
+        fields: Keys written as CSV columns, in order
+        text: Formats each record in "text" mode; defaults to ``key: value``
+            lines
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        format: str,
+        fields: Sequence[str],
+        text: Optional[TextFormatter] = None,
+    ) -> None:
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {format}")
+        self.stream = stream
+        self.format = format
+        self.fields = list(fields)
+        self.text = text or (
+            lambda _, record: "\n".join(
+                f"{key}: {value}" for key, value in record.items()
+            )
+        )
+        self.count = 0
+        self._csv: Optional[Any] = None
+        if format == "csv":
+            self._csv = csv.DictWriter(
+                stream, self.fields, extrasaction="ignore", lineterminator="\n"
+            )
+            self._csv.writeheader()
+        elif format == "json":
+            stream.write("[")
+
+    def write(self, record: Mapping[str, Any]) -> None:
+        """Write one record, a dictionary or any other mapping."""
+        self.count += 1
+        if self.format in ("json", "jsonl") and not isinstance(record, dict):
+            record = dict(record)
+        if self.format == "jsonl":
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.format == "json":
+            separator = "\n" if self.count == 1 else ",\n"
+            self.stream.write(separator + json.dumps(record, ensure_ascii=False))
+        elif self._csv is not None:
+            self._csv.writerow(
+                {key: _csv_value(record.get(key)) for key in self.fields}
+            )
+        else:
+            self.stream.write(self.text(self.count, record) + "\n")
+
+    def close(self) -> None:
+        """Finish the output, closing the JSON array, and flush it."""
+        if self.format == "json":
+            self.stream.write("\n]\n")
+        self.stream.flush()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave a JSON array open, so truncated output fails to parse
+            # rather than passing for a complete listing
+            self.stream.flush()
+
+
+def write_records(
+    records: Iterable[Mapping[str, Any]],
+    format: str,
+    fields: Sequence[str],
+    text: Optional[TextFormatter] = None,
+    stream: Optional[TextIO] = None,
+) -> int:
+    """
+    Write every record from an iterable as it is produced.
+
+    Args:
+        records: Iterable of result dictionaries, typically a generator
+        format: One of ``OUTPUT_FORMATS``
+        fields: Keys written as CSV columns
+        text: Formats each record in "text" mode
+        stream: Where to write; defaults to buffered standard output
+
+    Returns:
+        The number of records written
+    """
+    if stream is None:
+        with open_stdout() as stdout:
+            return write_records(records, format, fields, text, stdout)
+    with RecordWriter(stream, format, fields, text) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
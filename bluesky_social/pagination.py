@@ -0,0 +1,127 @@
+"""
+Cursor pagination utilities for BlueSky list endpoints.
+
+This module provides a generic iterator that follows XRPC cursors lazily,
+fetching the next page in the background while the caller works through the
+current one, so memory stays bounded regardless of how deep the history is.
+"""
+
+from collections.abc import AsyncGenerator, AsyncIterable, Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+Timestamp = Union[str, datetime]
+
+
+def parse_timestamp(value: Timestamp) -> datetime:
+    """
+    Parse an AT Protocol timestamp into a timezone-aware datetime.
+
+    Args:
+        value: An ISO 8601 string (``Z`` suffix allowed) or a datetime
+
+    Returns:
+        The timestamp as an aware datetime, assuming UTC when no offset is given
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = value.strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        # fromisoformat before 3.11 only accepts 3 or 6 fractional digits
+        if "." in text:
+            head, _, tail = text.partition(".")
+            digits = len(tail) - len(tail.lstrip("0123456789"))
+            fraction, offset = tail[:digits], tail[digits:]
+            text = f"{head}.{fraction[:6].ljust(6, '0')}{offset}"
+        parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def paginate(
+    fetch_page: Callable[[Optional[str]], Any],
+    items_attr: str,
+    prefetch: bool = True,
+) -> Generator[Any, None, None]:
+    """
+    Iterate over every item of a cursor-paginated endpoint.
+
+    Call ``close`` on the generator to stop early; it shuts down the
+    prefetch thread.
+
+    Args:
+        fetch_page: Callable taking a cursor (None for the first page) and
+            returning a response with a ``cursor`` attribute
+        items_attr: Name of the response attribute holding the page items
+        prefetch: Fetch the next page in a background thread while the
+            current page is being consumed
+
+    Yields:
+        Items from each page in order, until the server stops returning a
+        cursor or returns an empty page
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = fetch_page(None)
+        previous_cursor = None
+        while True:
+            items = getattr(page, items_attr, None) or []
+            cursor = getattr(page, "cursor", None)
+            if not items or not cursor or cursor == previous_cursor:
+                yield from items
+                return
+            previous_cursor = cursor
+            if executor is None:
+                yield from items
+                page = fetch_page(cursor)
+            else:
+                pending = executor.submit(fetch_page, cursor)
+                yield from items
+                page = pending.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Split an iterable into lists of at most ``size`` items, lazily.
+
+    Args:
+        items: The items to split
+        size: Maximum length of each chunk
+
+    Yields:
+        Consecutive chunks of ``items``
+    """
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def achunked(items: AsyncIterable[T], size: int) -> AsyncGenerator[list[T], None]:
+    """
+    Split an async iterable into lists of at most ``size`` items, lazily.
+
+    Args:
+        items: The items to split
+        size: Maximum length of each chunk
+
+    Yields:
+        Consecutive chunks of ``items``, as ``chunked`` does for plain iterables
+    """
+    chunk: list[T] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
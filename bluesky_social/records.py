@@ -0,0 +1,157 @@
+"""
+Compact records for notifications, responses and posts.
+
+Listings can hold tens of thousands of items, so each item is a frozen
+dataclass with ``__slots__`` instead of a per-item dictionary, and repeated
+author handles can be interned so every record from one author shares a
+single string. Records are read-only mappings as well, so code written
+against the dictionaries these listings used to return, such as
+``response["cid"]`` or ``dict(response)``, keeps working; ``as_dict``
+converts one back to a plain dictionary.
+
+``__slots__`` are declared by hand, as ``dataclass(slots=True)`` needs
+Python 3.10.
+"""
+
+import sys
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+class _Record(Mapping[str, Any]):
+    """Read-only mapping access to a slotted record's fields, in order."""
+
+    __slots__: tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Frozen slotted instances cannot be restored attribute by attribute
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the record as a plain dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(frozen=True, eq=False)
+class NotificationRecord(_Record):
+    """A notification as shown in listings."""
+
+    __slots__ = ("author", "reason", "cid", "uri", "text")
+
+    author: Optional[str]
+    reason: Optional[str]
+    cid: Optional[str]
+    uri: Optional[str]
+    text: Optional[str]
+
+
+@dataclass(frozen=True, eq=False)
+class ResponseRecord(_Record):
+    """
+    A post replying to the user, or any post reduced to its basic fields.
+
+    ``root_uri`` and ``root_cid`` name the first post of the thread the post
+    replies into, so a reply to it can be built without fetching the thread.
+    They are None for posts that are not replies.
+    """
+
+    __slots__ = ("cid", "uri", "author", "text", "root_uri", "root_cid")
+
+    cid: Optional[str]
+    uri: Optional[str]
+    author: Optional[str]
+    text: Optional[str]
+    root_uri: Optional[str]
+    root_cid: Optional[str]
+
+
+@dataclass(frozen=True, eq=False)
+class PostSummary(_Record):
+    """One of the user's posts with the texts of its replies."""
+
+    __slots__ = ("uri", "cid", "text", "replies", "error")
+
+    uri: Optional[str]
+    cid: Optional[str]
+    text: Optional[str]
+    replies: tuple[Optional[str], ...]
+    error: Optional[str]
+
+
+def extract(
+    model: Any, intern_handles: bool = False
+) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    Read the CID, URI, author handle and text of a post or notification model.
+
+    Attributes are read directly, falling back to None when the model or one
+    of its parts is missing, rather than through nested ``getattr`` calls.
+
+    Args:
+        model: A post view, notification or feed post model, or None
+        intern_handles: Intern the author handle, so records from the same
+            author share one string
+
+    Returns:
+        ``(cid, uri, author, text)``
+    """
+    try:
+        author = model.author.handle
+    except AttributeError:
+        author = None
+    else:
+        if intern_handles and author is not None:
+            author = sys.intern(author)
+    try:
+        text = model.record.text
+    except AttributeError:
+        text = None
+    return getattr(model, "cid", None), getattr(model, "uri", None), author, text
+
+
+def notification_record(
+    notification: Any, intern_handles: bool = False
+) -> NotificationRecord:
+    """Build a ``NotificationRecord`` from a notification model."""
+    cid, uri, author, text = extract(notification, intern_handles)
+    return NotificationRecord(
+        author, getattr(notification, "reason", None), cid, uri, text
+    )
+
+
+def response_record(post: Any, intern_handles: bool = False) -> ResponseRecord:
+    """Build a ``ResponseRecord`` from a post view or reply notification."""
+    try:
+        root = post.record.reply.root
+    except AttributeError:
+        root = None
+    return ResponseRecord(
+        *extract(post, intern_handles),
+        getattr(root, "uri", None),
+        getattr(root, "cid", None),
+    )
+
+
+def as_dicts(records: Any) -> list[dict[str, Any]]:
+    """Convert records, or any mappings, to a list of plain dictionaries."""
+    return [dict(record) for record in records]
@@ -0,0 +1,295 @@
+"""
+Identity resolution for BlueSky.
+
+This module maps handles to DIDs and DIDs to basic profile information. Answers
+are kept in a process-wide LRU shared by every resolver and, optionally, in an
+SQLite file with a TTL so later runs reuse them too. Misses are fetched in bulk
+with ``app.bsky.actor.getProfiles``, 25 actors per request.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any, Optional, TypedDict
+
+from .config import (
+    DEFAULT_IDENTITY_CACHE_MAX_ENTRIES,
+    DEFAULT_IDENTITY_CACHE_TTL,
+    MAX_PROFILES_PER_REQUEST,
+)
+from .pagination import chunked
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    did TEXT PRIMARY KEY,
+    handle TEXT NOT NULL,
+    display_name TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_by_handle ON profiles (handle);
+"""
+
+
+class ProfileInfo(TypedDict):
+    did: str
+    handle: str
+    display_name: Optional[str]
+
+
+class _ProfileLRU:
+    """Thread-safe LRU of profiles, indexed by both DID and handle."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._by_did: OrderedDict[str, tuple[ProfileInfo, float]] = OrderedDict()
+        self._dids_by_handle: dict[str, str] = {}
+
+    def get(self, actor: str, ttl: float) -> Optional[ProfileInfo]:
+        with self._lock:
+            did = actor if actor.startswith("did:") else self._dids_by_handle.get(actor)
+            entry = self._by_did.get(did) if did else None
+            if entry is None:
+                return None
+            profile, fetched_at = entry
+            if time.time() - fetched_at > ttl or (
+                did != actor and profile["handle"] != actor
+            ):
+                return None
+            self._by_did.move_to_end(profile["did"])
+            return profile
+
+    def put(self, profile: ProfileInfo, fetched_at: float) -> None:
+        with self._lock:
+            previous = self._by_did.pop(profile["did"], None)
+            if previous is not None:
+                self._dids_by_handle.pop(previous[0]["handle"], None)
+            self._by_did[profile["did"]] = (profile, fetched_at)
+            self._dids_by_handle[profile["handle"]] = profile["did"]
+            while len(self._by_did) > self.max_entries:
+                evicted, _ = self._by_did.popitem(last=False)[1]
+                if self._dids_by_handle.get(evicted["handle"]) == evicted["did"]:
+                    del self._dids_by_handle[evicted["handle"]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_did.clear()
+            self._dids_by_handle.clear()
+
+
+# Handles and DIDs are global facts, so every resolver shares one memory cache
+_shared_memory = _ProfileLRU(DEFAULT_IDENTITY_CACHE_MAX_ENTRIES)
+
+
+def _normalize_actor(actor: str) -> str:
+    """Handles are case-insensitive and may be written with a leading "@"."""
+    return actor if actor.startswith("did:") else actor.lstrip("@").lower()
+
+
+class IdentityResolver:
+    """
+    Cached handle to DID and DID to profile lookups for one client.
+
+    Lookups check the in-process LRU, then the on-disk cache when one is
+    configured, and fetch whatever is left with bulk ``getProfiles`` calls.
+    The ``hits``, ``misses`` and ``requests`` counters show how well the
+    caches are doing.
+
+    Args:
+        client: BlueSky client used for lookups
+        path: Optional database file path for a cache that outlives the process
+        ttl: Seconds a cached answer stays valid
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_IDENTITY_CACHE_TTL,
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self._memory = _shared_memory
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            if path != ":memory:":
+                directory = os.path.dirname(os.path.abspath(path))
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the on-disk cache, if there is one."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "IdentityResolver":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache hit, miss and request counters."""
+        return {"hits": self.hits, "misses": self.misses, "requests": self.requests}
+
+    def _load(self, actor: str) -> Optional[ProfileInfo]:
+        if self._conn is None:
+            return None
+        column = "did" if actor.startswith("did:") else "handle"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT did, handle, display_name, fetched_at FROM profiles "
+                f"WHERE {column} = ? AND fetched_at > ?",
+                (actor, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        profile: ProfileInfo = {"did": row[0], "handle": row[1], "display_name": row[2]}
+        self._memory.put(profile, row[3])
+        return profile
+
+    def remember(self, profiles: Iterable[Any]) -> None:
+        """
+        Cache profile views that arrived with other responses.
+
+        Args:
+            profiles: Objects with ``did``, ``handle`` and optionally
+                ``display_name`` attributes, such as notification authors
+        """
+        now = time.time()
+        rows = []
+        for view in profiles:
+            did = getattr(view, "did", None)
+            handle = getattr(view, "handle", None)
+            if not did or not handle:
+                continue
+            profile: ProfileInfo = {
+                "did": did,
+                "handle": handle.lower(),
+                "display_name": getattr(view, "display_name", None),
+            }
+            self._memory.put(profile, now)
+            rows.append((did, profile["handle"], profile["display_name"], now))
+        if self._conn is not None and rows:
+            with self._lock, self._conn:
+                # A handle moves with its owner, so drop stale claims to it
+                self._conn.executemany(
+                    "DELETE FROM profiles WHERE handle = ? AND did != ?",
+                    [(row[1], row[0]) for row in rows],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO profiles "
+                    "(did, handle, display_name, fetched_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+
+    def cached_profiles(
+        self, actors: Iterable[str]
+    ) -> tuple[dict[str, ProfileInfo], list[str]]:
+        """
+        Look up profiles in the caches only.
+
+        Args:
+            actors: Handles or DIDs
+
+        Returns:
+            The profiles found, keyed by normalized actor, and the normalized
+            actors that still need fetching
+        """
+        found: dict[str, ProfileInfo] = {}
+        missing: list[str] = []
+        for actor in dict.fromkeys(map(_normalize_actor, actors)):
+            profile = self._memory.get(actor, self.ttl) or self._load(actor)
+            if profile is not None:
+                self.hits += 1
+                found[actor] = profile
+            else:
+                self.misses += 1
+                missing.append(actor)
+        return found, missing
+
+    def request_batches(self, missing: Iterable[str]) -> list[list[str]]:
+        """
+        Split actors to fetch into ``getProfiles`` batches, counting the requests.
+
+        Args:
+            missing: Normalized actors not found in the caches
+
+        Returns:
+            Batches of at most MAX_PROFILES_PER_REQUEST actors, one per request
+        """
+        batches = list(chunked(missing, MAX_PROFILES_PER_REQUEST))
+        self.requests += len(batches)
+        return batches
+
+    def add_fetched(
+        self, batch: list[str], views: Iterable[Any], found: dict[str, ProfileInfo]
+    ) -> None:
+        """
+        Cache the profiles fetched for a batch of actors and add them to ``found``.
+
+        Args:
+            batch: The normalized actors that were requested
+            views: The profile views the server returned for them
+            found: Result mapping to update
+        """
+        views = list(views)
+        self.remember(views)
+        for view in views:
+            profile = self._memory.get(view.did, self.ttl)
+            if profile is None:
+                continue
+            for actor in (view.did, profile["handle"]):
+                if actor in batch:
+                    found[actor] = profile
+
+    def get_profiles(self, actors: Iterable[str]) -> dict[str, ProfileInfo]:
+        """
+        Look up profiles by handle or DID, fetching misses in bulk.
+
+        Args:
+            actors: Handles or DIDs
+
+        Returns:
+            A mapping from each found actor, with handles lowercased, to its
+            profile. Actors that do not exist are left out.
+        """
+        found, missing = self.cached_profiles(actors)
+        for batch in self.request_batches(missing):
+            try:
+                response = self.client.app.bsky.actor.get_profiles({"actors": batch})
+            except Exception as e:
+                logging.warning(f"Could not fetch profiles for {batch}: {e}")
+                continue
+            self.add_fetched(batch, response.profiles, found)
+        return found
+
+    def resolve_handles(self, handles: Iterable[str]) -> dict[str, str]:
+        """
+        Resolve handles to DIDs.
+
+        Args:
+            handles: Handles to resolve, with or without the leading "@"
+
+        Returns:
+            A mapping from each resolved handle, lowercased, to its DID
+        """
+        return {
+            handle: profile["did"]
+            for handle, profile in self.get_profiles(handles).items()
+        }
+
+    def resolve_handle(self, handle: str) -> Optional[str]:
+        """Resolve one handle to its DID, or None if it does not exist."""
+        return self.resolve_handles([handle]).get(_normalize_actor(handle))
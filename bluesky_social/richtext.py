@@ -0,0 +1,162 @@
+"""
+Rich-text facets for BlueSky posts.
+
+This module finds hashtags, @mentions and links in post text and turns them
+into ``app.bsky.richtext.facet`` entries. The text is scanned once with a
+single compiled pattern, so tags follow Python's Unicode word rules, and
+match positions are converted to the UTF-8 byte offsets facets use in the
+same pass.
+"""
+
+import re
+from collections.abc import Iterable
+from typing import Any, Callable, Optional
+
+from atproto import models
+
+from .config import MAX_TAG_LENGTH
+from .metrics import instrumented
+
+# Tags and mentions must start the text or follow whitespace or "(". A tag is
+# a run of word characters, so it stops at spaces of any kind, punctuation
+# and emoji.
+_FACET_PATTERN = re.compile(
+    r"(?P<url>https?://[^\s<>\"]+)"
+    r"|(?<![^\s(])@(?P<handle>[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?"
+    r"(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?)+)"
+    r"|(?<![^\s(])#(?P<tag>\w+)"
+)
+
+# Punctuation that usually ends a sentence rather than a URL
+_URL_TRAILING = ".,;:!?'"
+
+HandleResolver = Callable[[list[str]], dict[str, str]]
+
+
+def _url_end(text: str, start: int, end: int) -> int:
+    """Drop trailing punctuation and an unbalanced closing parenthesis."""
+    while end > start:
+        last = text[end - 1]
+        if last in _URL_TRAILING:
+            end -= 1
+        elif last == ")" and text.count(")", start, end) > text.count("(", start, end):
+            end -= 1
+        else:
+            break
+    return end
+
+
+def _tag_value(tag: str) -> Optional[str]:
+    """Apply the BlueSky tag rules, returning None for text that is no tag."""
+    # "_" is the only punctuation a word can contain; it cannot end a tag
+    tag = tag.rstrip("_")
+    if all(c.isdigit() or c == "_" for c in tag) or len(tag) > MAX_TAG_LENGTH:
+        return None
+    return tag
+
+
+class _ByteOffsets:
+    """Convert increasing character offsets in text to UTF-8 byte offsets."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.ascii = text.isascii()
+        self.index = 0
+        self.offset = 0
+
+    def __call__(self, index: int) -> int:
+        if self.ascii:
+            return index
+        self.offset += len(self.text[self.index : index].encode("utf-8"))
+        self.index = index
+        return self.offset
+
+
+def _facet(start: int, end: int, feature: Any) -> models.AppBskyRichtextFacet.Main:
+    return models.AppBskyRichtextFacet.Main(
+        index=models.AppBskyRichtextFacet.ByteSlice(byte_start=start, byte_end=end),
+        features=[feature],
+    )
+
+
+def find_handles(text: str) -> list[str]:
+    """
+    Return the lowercased handles mentioned in text, sorted and deduplicated.
+
+    This lets callers resolve mentions ahead of ``build_facets``, for example
+    with an asynchronous client.
+    """
+    return sorted(
+        {
+            match.group("handle").lower()
+            for match in _FACET_PATTERN.finditer(text)
+            if match.lastgroup == "handle"
+        }
+    )
+
+
+@instrumented("richtext.build_facets")
+def build_facets(
+    text: str,
+    resolve_handles: Optional[HandleResolver] = None,
+    kinds: Iterable[str] = ("url", "handle", "tag"),
+) -> list[models.AppBskyRichtextFacet.Main]:
+    """
+    Find hashtags, mentions and links in text and return facets for them.
+
+    Mention handles are collected during the scan and resolved with one call
+    to ``resolve_handles``; mentions that cannot be resolved are left as
+    plain text.
+
+    Args:
+        text: The post text
+        resolve_handles: Callable mapping a list of handles to their DIDs,
+            such as ``IdentityResolver.resolve_handles``; without one,
+            mentions are not faceted
+        kinds: Which facet kinds to build, out of "url", "handle" and "tag"
+
+    Returns:
+        Facets in text order
+    """
+    wanted = set(kinds)
+    if resolve_handles is None:
+        wanted.discard("handle")
+
+    byte_offset = _ByteOffsets(text)
+    found: list[tuple[int, int, str, str]] = []
+    for match in _FACET_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind not in wanted:
+            continue
+        start, end = match.span()
+        if kind == "url":
+            end = _url_end(text, start, end)
+            value = text[start:end]
+        elif kind == "tag":
+            tag = _tag_value(match.group(kind))
+            if tag is None:
+                continue
+            value = tag
+            end = match.start(kind) + len(value)
+        else:
+            value = match.group(kind)
+        found.append((byte_offset(start), byte_offset(end), kind, value))
+
+    dids: dict[str, str] = {}
+    handles = sorted({value.lower() for _, _, kind, value in found if kind == "handle"})
+    if handles and resolve_handles is not None:
+        dids = resolve_handles(handles)
+
+    facets = []
+    for start, end, kind, value in found:
+        if kind == "url":
+            feature: Any = models.AppBskyRichtextFacet.Link(uri=value)
+        elif kind == "tag":
+            feature = models.AppBskyRichtextFacet.Tag(tag=value)
+        else:
+            did = dids.get(value.lower())
+            if did is None:
+                continue
+            feature = models.AppBskyRichtextFacet.Mention(did=did)
+        facets.append(_facet(start, end, feature))
+    return facets
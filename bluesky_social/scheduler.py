@@ -0,0 +1,323 @@
+"""
+Rate-limit-aware request scheduling for BlueSky.
+
+Every XRPC call made by a client built with ``ScheduledRequest`` goes through
+one ``RequestScheduler``. It keeps a token bucket per endpoint, refilled from
+the ``ratelimit-*`` headers the PDS sends with each response, so bulk work
+slows down before it hits the limit instead of failing midway. Reads are
+retried with jittered exponential backoff on rate limiting and transient
+server or network errors. Writes are sent one at a time in submission order
+and only retried when the server rejected them unprocessed with a 429. Blob
+uploads are content-addressed, so they are sent concurrently and retried
+like reads.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import httpx
+from atproto_client.exceptions import (
+    InvokeTimeoutError,
+    NetworkError,
+    RateLimitExceededError,
+    RequestErrorBase,
+)
+from atproto_client.request import Request
+
+from .config import DEFAULT_MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+from .metrics import XRPC, Metrics
+from .metrics import metrics as default_metrics
+
+# Statuses worth retrying for reads: rate limiting and transient server errors
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Procedures that are safe to repeat, so they are scheduled like reads
+_IDEMPOTENT_PROCEDURES = {"com.atproto.repo.uploadBlob"}
+
+
+def _header_int(headers: Any, name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _policy_window(policy: Optional[str]) -> Optional[float]:
+    """Return the window in seconds of a policy such as ``3000;w=300``."""
+    for part in (policy or "").split(";")[1:]:
+        key, _, value = part.strip().partition("=")
+        if key == "w":
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    Request budget for one endpoint, driven by ``ratelimit-*`` headers.
+
+    Until the server has sent rate-limit headers the bucket never blocks.
+    Afterwards tokens refill continuously at ``limit / window`` per second,
+    and every response resets the count to what the server reports.
+    """
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.tokens = 0.0
+        self.rate = 0.0
+        self.reset_at = 0.0
+        self.updated_at = 0.0
+
+    def update(self, headers: Any, now: float) -> None:
+        """Adopt the budget reported in a response's headers."""
+        limit = _header_int(headers, "ratelimit-limit")
+        remaining = _header_int(headers, "ratelimit-remaining")
+        if limit is None or remaining is None:
+            return
+        reset = _header_int(headers, "ratelimit-reset")
+        window = _policy_window(headers.get("ratelimit-policy"))
+        self.limit = limit
+        self.tokens = float(remaining)
+        self.reset_at = float(reset) if reset is not None else 0.0
+        self.rate = limit / window if window else 0.0
+        self.updated_at = now
+
+    def exhaust(self, until: float, now: float) -> None:
+        """Empty the bucket after a 429 until the given time."""
+        self.limit = self.limit or 1
+        self.tokens = 0.0
+        self.rate = 0.0
+        self.reset_at = max(self.reset_at, until)
+        self.updated_at = now
+
+    def acquire(self, now: float) -> float:
+        """
+        Take a token if one is available.
+
+        Args:
+            now: Current time in seconds since the epoch
+
+        Returns:
+            0 when a token was taken, otherwise the seconds to wait before
+            trying again
+        """
+        if self.limit is None:
+            return 0.0
+        if self.rate:
+            self.tokens = min(
+                float(self.limit), self.tokens + (now - self.updated_at) * self.rate
+            )
+        self.updated_at = now
+        if now >= self.reset_at > 0:
+            # A new window has started
+            self.tokens = max(self.tokens, float(self.limit))
+            self.reset_at = 0.0
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        waits = []
+        if self.rate:
+            waits.append((1 - self.tokens) / self.rate)
+        if self.reset_at:
+            waits.append(self.reset_at - now)
+        if not waits:
+            # Nothing says when the budget comes back; let the server decide
+            return 0.0
+        return max(0.01, min(waits))
+
+
+class RequestScheduler:
+    """
+    Pace, retry and order XRPC requests.
+
+    Args:
+        max_retries: Retries for a read before its error is raised
+        base_delay: First backoff delay in seconds, doubled on each retry
+        max_delay: Longest single backoff delay in seconds
+        sleep: Function used to wait, replaceable in tests
+        clock: Function returning the current time in seconds since the epoch
+        metrics: Registry recording each request and retry; defaults to the
+            process-wide ``metrics``
+    """
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.clock = clock
+        self.metrics = metrics or default_metrics
+        self.retries = 0
+        self.throttled = 0.0
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        # Writes take a ticket and go out strictly in ticket order
+        self._writes = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def _wait_for_token(self, nsid: str) -> None:
+        while True:
+            with self._lock:
+                bucket = self._buckets.setdefault(nsid, TokenBucket())
+                delay = bucket.acquire(self.clock())
+            if not delay:
+                return
+            logging.debug(f"Rate limit budget for {nsid} used up, waiting {delay:.2f}s")
+            with self._lock:
+                self.throttled += delay
+            self.sleep(delay)
+
+    def _record(self, nsid: str, headers: Any) -> None:
+        with self._lock:
+            self._buckets.setdefault(nsid, TokenBucket()).update(headers, self.clock())
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: anywhere between zero and the exponential cap
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _retry_delay(self, nsid: str, error: Exception, attempt: int) -> float:
+        if isinstance(error, RateLimitExceededError):
+            if error.retry_after is not None:
+                delay = float(error.retry_after)
+            elif error.reset_at is not None:
+                delay = error.reset_at.timestamp() - self.clock()
+            else:
+                delay = self._backoff(attempt)
+            delay = max(0.0, delay)
+            now = self.clock()
+            with self._lock:
+                self._buckets.setdefault(nsid, TokenBucket()).exhaust(now + delay, now)
+            return delay
+        return self._backoff(attempt)
+
+    def _retryable(self, error: Exception, write: bool) -> bool:
+        if isinstance(error, RateLimitExceededError):
+            return True
+        if write:
+            # The write may have been applied; never send it twice
+            return False
+        if isinstance(error, (InvokeTimeoutError, NetworkError)) and (
+            getattr(error, "response", None) is None
+        ):
+            return True
+        response = getattr(error, "response", None)
+        return getattr(response, "status_code", None) in _RETRY_STATUSES
+
+    def _attempts(self, nsid: str, write: bool, send: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            self._wait_for_token(nsid)
+            try:
+                response = send()
+            except RequestErrorBase as e:
+                response = getattr(e, "response", None)
+                if response is not None:
+                    self._record(nsid, response.headers)
+                if attempt >= self.max_retries or not self._retryable(e, write):
+                    raise
+                delay = self._retry_delay(nsid, e, attempt)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                self.metrics.retry(XRPC, nsid)
+                logging.warning(
+                    f"{nsid} failed ({type(e).__name__}), retry {attempt} "
+                    f"of {self.max_retries} in {delay:.2f}s"
+                )
+                self.sleep(delay)
+                continue
+            self._record(nsid, response.headers)
+            return response
+
+    def call(self, nsid: str, write: bool, send: Callable[[], Any]) -> Any:
+        """
+        Send one request under the scheduler's pacing and retry rules.
+
+        Args:
+            nsid: XRPC method name, used to pick the rate-limit bucket
+            write: Whether the request changes repository state and must be
+                sent in order and at most once
+            send: Performs the request and returns a response with ``headers``
+
+        Returns:
+            Whatever ``send`` returned
+
+        Raises:
+            RequestErrorBase: When the request fails and cannot be retried
+        """
+        if not write:
+            return self._attempts(nsid, write, send)
+
+        with self._writes:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._writes.wait_for(lambda: self._serving == ticket)
+        try:
+            return self._attempts(nsid, write, send)
+        finally:
+            with self._writes:
+                self._serving += 1
+                self._writes.notify_all()
+
+
+class ScheduledRequest(Request):
+    """
+    An atproto ``Request`` that sends every call through a ``RequestScheduler``.
+
+    Pass it to the client, as in ``Client(request=ScheduledRequest())``, and
+    every module using that client shares its pacing and retries.
+
+    Args:
+        scheduler: Scheduler to use; a new one by default
+        **kwargs: Additional parameters for ``httpx.Client``
+    """
+
+    def __init__(
+        self, scheduler: Optional[RequestScheduler] = None, **kwargs: Any
+    ) -> None:
+        super().__init__(**kwargs)
+        self.scheduler = scheduler or RequestScheduler()
+
+    def _new_instance(self) -> "ScheduledRequest":
+        return type(self)(self.scheduler, **self._client_kwargs)
+
+    def _send_request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        nsid = url.rsplit("/", 1)[-1]
+        metrics = self.scheduler.metrics
+
+        def send() -> httpx.Response:
+            started = time.perf_counter()
+            try:
+                response: httpx.Response = super(ScheduledRequest, self)._send_request(
+                    method, url, **kwargs
+                )
+            except Exception:
+                metrics.observe(XRPC, nsid, time.perf_counter() - started, error=True)
+                raise
+            metrics.observe(
+                XRPC,
+                nsid,
+                time.perf_counter() - started,
+                sent=int(response.request.headers.get("content-length", 0)),
+                received=len(response.content),
+            )
+            return response
+
+        write = method != "GET" and nsid not in _IDEMPOTENT_PROCEDURES
+        # Typed locally: the scheduler and atproto's request methods return Any
+        response: httpx.Response = self.scheduler.call(nsid, write, send)
+        return response
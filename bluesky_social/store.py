@@ -0,0 +1,297 @@
+"""
+Local notification store for BlueSky.
+
+This module provides a SQLite-backed cache of notifications and authored posts
+so repeated CLI runs only need to pull what changed since the last sync, and
+questions such as "which replies have I not answered yet" can be answered with
+an indexed query instead of one thread fetch per notification.
+"""
+
+import os
+import sqlite3
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .pagination import Timestamp, parse_timestamp
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    account TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    cid TEXT,
+    author TEXT,
+    author_did TEXT,
+    reason TEXT,
+    text TEXT,
+    parent_uri TEXT,
+    root_uri TEXT,
+    root_cid TEXT,
+    indexed_at TEXT,
+    PRIMARY KEY (account, uri)
+);
+CREATE INDEX IF NOT EXISTS notifications_by_reason
+    ON notifications (account, reason, indexed_at);
+CREATE INDEX IF NOT EXISTS notifications_by_parent
+    ON notifications (account, parent_uri);
+
+CREATE TABLE IF NOT EXISTS posts (
+    account TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    cid TEXT,
+    text TEXT,
+    parent_uri TEXT,
+    reply_count INTEGER,
+    indexed_at TEXT,
+    PRIMARY KEY (account, uri)
+);
+CREATE INDEX IF NOT EXISTS posts_by_parent ON posts (account, parent_uri);
+CREATE INDEX IF NOT EXISTS posts_by_time ON posts (account, indexed_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (account, key)
+);
+"""
+
+
+def _normalize_timestamp(value: Optional[Timestamp]) -> Optional[str]:
+    """Store timestamps in one canonical form so they compare as strings."""
+    if not value:
+        return None
+    return parse_timestamp(value).isoformat()
+
+
+def _reply_refs(record: Any) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """Extract the parent URI and root strong ref of a post record, if any."""
+    reply = getattr(record, "reply", None)
+    if reply is None:
+        return None, None, None
+    parent = getattr(reply, "parent", None)
+    root = getattr(reply, "root", None)
+    return (
+        getattr(parent, "uri", None),
+        getattr(root, "uri", None),
+        getattr(root, "cid", None),
+    )
+
+
+class NotificationStore:
+    """
+    SQLite cache of notifications and authored posts, partitioned by account.
+
+    Args:
+        path: Database file path, or ``":memory:"`` for a throwaway store
+    """
+
+    def __init__(self, path: str) -> None:
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "NotificationStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def get_state(self, account: str, key: str) -> Optional[str]:
+        """Return a stored sync value such as the newest seen ``indexedAt``."""
+        row = self._conn.execute(
+            "SELECT value FROM sync_state WHERE account = ? AND key = ?",
+            (account, key),
+        ).fetchone()
+        return row["value"] if row else None
+
+    def set_state(self, account: str, key: str, value: Optional[str]) -> None:
+        """Record a sync value for the next incremental run."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (account, key, value) "
+                "VALUES (?, ?, ?)",
+                (account, key, value),
+            )
+
+    def add_notifications(self, account: str, notifications: Iterable[Any]) -> int:
+        """
+        Insert or update notification models from the BlueSky API.
+
+        Args:
+            account: DID of the account the notifications belong to
+            notifications: Notification models, as yielded by ``iter_notifications``
+
+        Returns:
+            The number of rows written
+        """
+        rows = []
+        for notification in notifications:
+            record = getattr(notification, "record", None)
+            author = getattr(notification, "author", None)
+            rows.append(
+                (
+                    account,
+                    getattr(notification, "uri", None),
+                    getattr(notification, "cid", None),
+                    getattr(author, "handle", None),
+                    getattr(author, "did", None),
+                    getattr(notification, "reason", None),
+                    getattr(record, "text", None),
+                    *_reply_refs(record),
+                    _normalize_timestamp(getattr(notification, "indexed_at", None)),
+                )
+            )
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO notifications (account, uri, cid, author, "
+                "author_did, reason, text, parent_uri, root_uri, root_cid, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def add_posts(self, account: str, feed: Iterable[Any]) -> int:
+        """
+        Insert or update the account's own posts from author feed items.
+
+        Reposts of other people's posts are skipped.
+
+        Args:
+            account: DID of the account that authored the posts
+            feed: Feed view items, as yielded by ``iter_author_feed``
+
+        Returns:
+            The number of rows written
+        """
+        rows = []
+        for item in feed:
+            post = getattr(item, "post", None)
+            author_did = getattr(getattr(post, "author", None), "did", None)
+            if post is None or author_did not in (None, account):
+                continue
+            record = getattr(post, "record", None)
+            rows.append(
+                (
+                    account,
+                    getattr(post, "uri", None),
+                    getattr(post, "cid", None),
+                    getattr(record, "text", None),
+                    _reply_refs(record)[0],
+                    getattr(post, "reply_count", None),
+                    _normalize_timestamp(getattr(post, "indexed_at", None)),
+                )
+            )
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO posts (account, uri, cid, text, parent_uri, "
+                "reply_count, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def mark_answered(self, account: str, replies: Iterable[Mapping[str, Any]]) -> int:
+        """
+        Record replies the account just published, in one transaction.
+
+        Each reply is stored as one of the account's posts, so the response it
+        answers drops out of ``unanswered_responses`` without waiting for the
+        next feed sync.
+
+        Args:
+            account: DID of the account that authored the replies
+            replies: Mappings with the reply's ``uri``, ``cid`` and ``text``
+                and the ``parent_uri`` of the response it answers
+
+        Returns:
+            The number of rows written
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (
+                account,
+                reply["uri"],
+                reply["cid"],
+                reply.get("text"),
+                reply["parent_uri"],
+                0,
+                now,
+            )
+            for reply in replies
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO posts (account, uri, cid, text, parent_uri, "
+                "reply_count, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def notifications(
+        self, account: str, since: Optional[Timestamp] = None
+    ) -> list[dict[str, Any]]:
+        """Return stored notifications, newest first."""
+        rows = self._conn.execute(
+            "SELECT author, reason, cid, uri, text FROM notifications "
+            "WHERE account = ? AND (? IS NULL OR indexed_at > ?) "
+            "ORDER BY indexed_at DESC",
+            (account, *([_normalize_timestamp(since)] * 2)),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def posts(
+        self, account: str, since: Optional[Timestamp] = None
+    ) -> list[dict[str, Any]]:
+        """Return stored posts with the texts of their known replies, newest first."""
+        params = (account, *([_normalize_timestamp(since)] * 2))
+        rows = self._conn.execute(
+            "SELECT uri, cid, text FROM posts "
+            "WHERE account = ? AND (? IS NULL OR indexed_at > ?) "
+            "ORDER BY indexed_at DESC",
+            params,
+        ).fetchall()
+        # All replies in one query rather than one per post
+        replies: dict[str, list[Optional[str]]] = {}
+        for reply in self._conn.execute(
+            "SELECT n.parent_uri, n.text FROM notifications AS n "
+            "JOIN posts AS p ON p.account = n.account AND p.uri = n.parent_uri "
+            "WHERE n.account = ? AND n.reason = 'reply' "
+            "AND (? IS NULL OR p.indexed_at > ?) "
+            "ORDER BY n.indexed_at",
+            params,
+        ):
+            replies.setdefault(reply["parent_uri"], []).append(reply["text"])
+        return [{**dict(row), "replies": replies.get(row["uri"], [])} for row in rows]
+
+    def unanswered_responses(
+        self, account: str, since: Optional[Timestamp] = None
+    ) -> list[dict[str, Any]]:
+        """
+        Return reply notifications that have no child post authored by the account.
+
+        Args:
+            account: DID of the account whose replies are checked
+            since: Only consider notifications indexed after this time
+
+        Returns:
+            Unanswered response dictionaries, newest first
+        """
+        rows = self._conn.execute(
+            "SELECT n.cid, n.uri, n.author, n.text, n.root_uri, n.root_cid "
+            "FROM notifications AS n "
+            "WHERE n.account = ? AND n.reason = 'reply' "
+            "AND (? IS NULL OR n.indexed_at > ?) "
+            "AND NOT EXISTS (SELECT 1 FROM posts AS p "
+            "WHERE p.account = n.account AND p.parent_uri = n.uri) "
+            "ORDER BY n.indexed_at DESC",
+            (account, *([_normalize_timestamp(since)] * 2)),
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,307 @@
+"""
+Real-time reply detection from the BlueSky firehose.
+
+This module reads ``com.atproto.sync.subscribeRepos`` frames, from the live
+firehose or from a recording, and picks out new posts that reply to a set of
+accounts. Commits carry their records as a CAR file of blocks; only the
+blocks of post creations are decoded, and other blocks are skipped without
+being parsed. Replies come out in the same form as
+``list_unanswered_responses`` returns them.
+"""
+
+import base64
+import logging
+import queue
+import struct
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional, Union
+
+import libipld
+
+from .resolver import IdentityResolver
+
+POST_PREFIX = "app.bsky.feed.post/"
+
+# Frames as sent on the wire, as replayed by ``read_frames``, or their already
+# decoded message type and body, as streamed by ``firehose_frames``
+FrameSource = Union[Iterable[bytes], Iterable[tuple[str, dict[str, Any]]]]
+
+_LENGTH = struct.Struct(">I")
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Read an unsigned LEB128 varint, returning its value and the next offset."""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def cid_to_bytes(cid: Any) -> bytes:
+    """Return the binary form of a base32 CID string; binary CIDs pass through."""
+    if isinstance(cid, bytes):
+        return cid
+    encoded = str(cid)[1:].upper()
+    return base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+
+
+def find_block(car: bytes, cid: Any) -> Optional[bytes]:
+    """
+    Return the raw bytes of one block of a CARv1 file without decoding others.
+
+    Args:
+        car: The CAR file
+        cid: CID of the wanted block, as a string or in binary form
+
+    Returns:
+        The block's encoded bytes, or None if the CAR does not contain it
+    """
+    target = cid_to_bytes(cid)
+    header_length, offset = _read_varint(car, 0)
+    offset += header_length
+    while offset < len(car):
+        section_length, start = _read_varint(car, offset)
+        end = start + section_length
+        # CIDv1: version, codec, then a multihash of code, length and digest
+        cid_end = start
+        for _ in range(3):
+            _, cid_end = _read_varint(car, cid_end)
+        digest_length, cid_end = _read_varint(car, cid_end)
+        cid_end += digest_length
+        if car[start:cid_end] == target:
+            return car[cid_end:end]
+        offset = end
+    return None
+
+
+def decode_frame(frame: Union[bytes, tuple[str, dict[str, Any]]]) -> tuple[str, Any]:
+    """Split a frame into its message type and body."""
+    if not isinstance(frame, (bytes, bytearray)):
+        return frame
+    header, body = libipld.decode_dag_cbor_multi(bytes(frame))
+    if header.get("op") != 1:
+        return "#error", body
+    return header.get("t") or "", body
+
+
+def encode_frame(message_type: str, body: dict[str, Any]) -> bytes:
+    """Encode a message frame the way it is sent over the firehose websocket."""
+    header: bytes = libipld.encode_dag_cbor({"op": 1, "t": message_type})
+    payload: bytes = libipld.encode_dag_cbor(body)
+    return header + payload
+
+
+def read_frames(path: str) -> Iterator[bytes]:
+    """
+    Replay frames recorded with ``write_frames``.
+
+    Args:
+        path: Recording file
+
+    Yields:
+        Each recorded frame, in order
+    """
+    with open(path, "rb") as recording:
+        while True:
+            prefix = recording.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            yield recording.read(_LENGTH.unpack(prefix)[0])
+
+
+def write_frames(path: str, frames: Iterable[bytes]) -> int:
+    """
+    Record frames to a file as length-prefixed bytes for offline replay.
+
+    Args:
+        path: Recording file, appended to
+        frames: Encoded frames
+
+    Returns:
+        The number of frames written
+    """
+    written = 0
+    with open(path, "ab") as recording:
+        for frame in frames:
+            recording.write(_LENGTH.pack(len(frame)) + frame)
+            written += 1
+    return written
+
+
+def firehose_frames(
+    base_uri: Optional[str] = None, cursor: Optional[int] = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Stream frames from the live firehose.
+
+    The websocket client runs on a background thread; closing the generator
+    stops it. If the client fails, its error is raised here, and the stream
+    ends when the client stops on its own.
+
+    Args:
+        base_uri: Firehose websocket URI, defaults to the BlueSky relay
+        cursor: Optional sequence number to resume from
+
+    Yields:
+        Message type and decoded body of each frame
+    """
+    from atproto import FirehoseSubscribeReposClient
+
+    params = {"cursor": cursor} if cursor is not None else None
+    client = FirehoseSubscribeReposClient(params, base_uri)
+    frames: queue.Queue[Union[tuple[str, dict[str, Any]], BaseException, None]]
+    frames = queue.Queue(maxsize=1000)
+
+    def run() -> None:
+        # The thread always ends with an error or a None sentinel, so the
+        # consumer never waits on a client that is gone
+        try:
+            client.start(lambda message: frames.put((message.type, message.body)))
+        except BaseException as e:
+            frames.put(e)
+        else:
+            frames.put(None)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                return
+            if isinstance(frame, BaseException):
+                raise frame
+            yield frame
+    finally:
+        client.stop()
+
+
+def _post_events(
+    frames: FrameSource,
+) -> Iterator[tuple[str, str, str, dict[str, Any]]]:
+    """Yield the author DID, URI, CID and record of every post created."""
+    for frame in frames:
+        message_type, body = decode_frame(frame)
+        if message_type != "#commit":
+            continue
+        ops = [
+            op
+            for op in body.get("ops") or []
+            if op.get("action") == "create"
+            and str(op.get("path", "")).startswith(POST_PREFIX)
+        ]
+        if not ops:
+            continue
+        repo = body.get("repo")
+        blocks = body.get("blocks") or b""
+        for op in ops:
+            if not op.get("cid"):
+                continue
+            block = find_block(blocks, op["cid"])
+            if block is None:
+                logging.debug(f"Block for {repo}/{op['path']} missing from commit")
+                continue
+            cid = op["cid"]
+            cid = libipld.encode_cid(cid) if isinstance(cid, bytes) else str(cid)
+            yield repo, f"at://{repo}/{op['path']}", cid, libipld.decode_dag_cbor(block)
+
+
+def _parent_did(record: dict[str, Any]) -> Optional[str]:
+    parent_uri = ((record.get("reply") or {}).get("parent") or {}).get("uri") or ""
+    if not parent_uri.startswith("at://"):
+        return None
+    return parent_uri[len("at://") :].split("/", 1)[0]
+
+
+def _root_ref(record: dict[str, Any]) -> tuple[Optional[str], Optional[str]]:
+    root = (record.get("reply") or {}).get("root") or {}
+    return root.get("uri"), root.get("cid")
+
+
+def iter_stream_replies(
+    frames: FrameSource,
+    dids: Iterable[str],
+    resolver: Optional[IdentityResolver] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield new replies to posts by the given accounts as they are seen.
+
+    Args:
+        frames: Firehose frames, live or replayed
+        dids: DIDs of the accounts whose replies are wanted
+        resolver: Optional identity resolver to report author handles
+            instead of DIDs
+
+    Yields:
+        Response dictionaries with ``cid``, ``uri``, ``author``, ``text``,
+        ``root_uri`` and ``root_cid``
+    """
+    ours = set(dids)
+    for author, uri, cid, record in _post_events(frames):
+        if author in ours or _parent_did(record) not in ours:
+            continue
+        handle = None
+        if resolver is not None:
+            profile = resolver.get_profiles([author]).get(author)
+            handle = profile["handle"] if profile else None
+        root_uri, root_cid = _root_ref(record)
+        yield {
+            "cid": cid,
+            "uri": uri,
+            "author": handle or author,
+            "text": record.get("text"),
+            "root_uri": root_uri,
+            "root_cid": root_cid,
+        }
+
+
+def unanswered_from_stream(
+    frames: FrameSource,
+    dids: Iterable[str],
+    resolver: Optional[IdentityResolver] = None,
+) -> list[dict[str, Any]]:
+    """
+    Collect replies to the given accounts that they have not answered.
+
+    Replies are dropped again when one of the accounts replies to them later
+    in the stream.
+
+    Args:
+        frames: Firehose frames, typically a finite replay
+        dids: DIDs of the accounts whose replies are wanted
+        resolver: Optional identity resolver to report author handles
+
+    Returns:
+        Unanswered response dictionaries, newest first, like
+        ``list_unanswered_responses``
+    """
+    ours = set(dids)
+    pending: dict[str, dict[str, Any]] = {}
+    for author, uri, cid, record in _post_events(frames):
+        if author in ours:
+            parent_uri = ((record.get("reply") or {}).get("parent") or {}).get("uri")
+            if parent_uri is not None:
+                pending.pop(parent_uri, None)
+        elif _parent_did(record) in ours:
+            root_uri, root_cid = _root_ref(record)
+            pending[uri] = {
+                "cid": cid,
+                "uri": uri,
+                "author": author,
+                "text": record.get("text"),
+                "root_uri": root_uri,
+                "root_cid": root_cid,
+            }
+
+    if resolver is not None and pending:
+        profiles = resolver.get_profiles({info["author"] for info in pending.values()})
+        for info in pending.values():
+            profile = profiles.get(info["author"])
+            if profile is not None:
+                info["author"] = profile["handle"]
+    return list(reversed(pending.values()))
@@ -0,0 +1,144 @@
+"""
+Shared HTTP connection pooling for BlueSky clients.
+
+A bare ``atproto.Client`` opens its own httpx connection pool, so every new
+client pays for fresh TCP and TLS handshakes. ``HttpPool`` holds one tuned
+``httpx.Client`` that any number of BlueSky clients can share, and
+``create_client`` builds clients on it with request scheduling included.
+Pass those clients to ``post``, ``get_notifications`` and the rest as usual.
+"""
+
+import importlib.util
+import logging
+import threading
+from typing import Any, Optional
+
+import httpx
+from atproto import Client
+from atproto_client.request import RequestBase
+
+from .config import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_HTTP_TIMEOUT,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+)
+from .scheduler import RequestScheduler, ScheduledRequest
+
+
+class HttpPool:
+    """
+    One httpx connection pool shared by many BlueSky clients.
+
+    Args:
+        max_connections: Most connections open at once
+        max_keepalive_connections: Most idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        timeout: Seconds to wait for a read, write or free connection
+        connect_timeout: Seconds to wait for a new connection
+        http2: Use HTTP/2 where the server supports it; needs the ``h2``
+            package (``pip install 'bluesky-social[http2]'``) and falls back
+            to HTTP/1.1 without it
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        timeout: float = DEFAULT_HTTP_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        http2: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logging.warning("HTTP/2 needs the h2 package, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            http2=http2,
+            follow_redirects=True,
+            **kwargs,
+        )
+
+    def request(self, scheduler: Optional[RequestScheduler] = None) -> "PooledRequest":
+        """Return an atproto ``Request`` that sends through this pool."""
+        return PooledRequest(self, scheduler)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.client.close()
+
+    def __enter__(self) -> "HttpPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class PooledRequest(ScheduledRequest):
+    """
+    A ``ScheduledRequest`` that sends through a shared ``HttpPool``.
+
+    Closing it, or a client built on it, leaves the pool open for the other
+    clients; close the pool itself when done.
+
+    Args:
+        pool: Pool to send requests through
+        scheduler: Scheduler to use; a new one by default
+    """
+
+    def __init__(
+        self, pool: HttpPool, scheduler: Optional[RequestScheduler] = None
+    ) -> None:
+        # Skip Request.__init__, which would open a private httpx.Client
+        RequestBase.__init__(self)
+        self.pool = pool
+        self.scheduler = scheduler or RequestScheduler()
+        self._client_kwargs: dict[str, Any] = {}
+        self._client = pool.client
+
+    def _new_instance(self) -> "PooledRequest":
+        return type(self)(self.pool, self.scheduler)
+
+    def close(self) -> None:
+        pass
+
+
+_shared_pool: Optional[HttpPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool() -> HttpPool:
+    """Return the process-wide pool with default settings, creating it once."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = HttpPool()
+        return _shared_pool
+
+
+def create_client(
+    base_url: Optional[str] = None,
+    pool: Optional[HttpPool] = None,
+    scheduler: Optional[RequestScheduler] = None,
+) -> Client:
+    """
+    Create a BlueSky client that reuses pooled connections.
+
+    Args:
+        base_url: Optional PDS XRPC URL, defaults to the BlueSky service
+        pool: Connection pool to use; defaults to the process-wide pool
+        scheduler: Request scheduler to use; a new one by default
+
+    Returns:
+        An unauthenticated ``atproto.Client``
+    """
+    return Client(base_url, request=(pool or shared_pool()).request(scheduler))
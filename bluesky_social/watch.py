@@ -0,0 +1,254 @@
+"""
+Notification watcher for BlueSky.
+
+This module keeps one authenticated client alive and polls for new
+notifications, emitting each one as it arrives. Polls only page through
+notifications newer than the last one seen, the polling interval shrinks
+while notifications keep arriving and grows while the account is idle, and
+rate-limit responses pause polling until the server's window resets.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from atproto.exceptions import RateLimitExceededError
+
+from .config import (
+    DEFAULT_PAGE_SIZE,
+    WATCH_BACKOFF_FACTOR,
+    WATCH_MAX_INTERVAL,
+    WATCH_MIN_INTERVAL,
+)
+from .notifications import iter_notifications, notification_info
+from .pagination import Timestamp, parse_timestamp
+
+Emit = Callable[[dict[str, Any]], None]
+
+
+def emit_json_line(info: dict[str, Any]) -> None:
+    """Write a notification to stdout as one JSON line."""
+    sys.stdout.write(json.dumps(info) + "\n")
+    sys.stdout.flush()
+
+
+def rate_limit_delay(error: RateLimitExceededError, default: float) -> float:
+    """
+    Return how long to wait after a rate-limit response.
+
+    Uses ``retry-after`` when present, then ``ratelimit-reset``, and falls
+    back to ``default`` when the server sent neither.
+    """
+    if error.retry_after is not None:
+        retry_after: float = float(error.retry_after)
+        return retry_after
+    if error.reset_at is not None:
+        until_reset: float = (
+            error.reset_at - datetime.now(timezone.utc)
+        ).total_seconds()
+        return max(0.0, until_reset)
+    return default
+
+
+class NotificationWatcher:
+    """
+    Poll for new notifications with an adaptive interval.
+
+    Args:
+        client: An authenticated BlueSky client
+        emit: Called with each new notification's dictionary, oldest first;
+            defaults to writing JSON lines to stdout
+        since: Emit notifications indexed after this time on the first poll;
+            by default only notifications arriving after start are emitted
+        min_interval: Seconds between polls while notifications keep arriving
+        max_interval: Longest wait between polls when idle
+        backoff: Factor the interval grows by after each idle poll
+        page_size: Number of notifications requested per page
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        emit: Emit = emit_json_line,
+        since: Optional[Timestamp] = None,
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+        backoff: float = WATCH_BACKOFF_FACTOR,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
+        self.client = client
+        self.emit = emit
+        self.since = since
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.page_size = page_size
+        self.interval = min_interval
+        self.polls = 0
+        self.emitted = 0
+        self._stop = threading.Event()
+        self._started = since is not None
+        # URIs already emitted with the newest timestamp seen; later
+        # notifications can share that timestamp, so it cannot be skipped
+        self._seen_at_since: set[str] = set()
+
+    def stop(self) -> None:
+        """Ask a running ``run`` loop to return after the current poll."""
+        self._stop.set()
+
+    def _fetch(self, page_size: int, latest_only: bool = False) -> list[Any]:
+        """
+        Fetch the notifications not seen yet, newest first.
+
+        Notifications indexed at ``since`` are included unless their URI was
+        seen. With ``latest_only``, the scan ends after the notifications
+        sharing the newest timestamp.
+        """
+        cutoff = parse_timestamp(self.since) if self.since is not None else None
+        found: list[Any] = []
+        pages = iter_notifications(self.client, page_size=page_size, prefetch=False)
+        try:
+            for notification in pages:
+                indexed_at = getattr(notification, "indexed_at", None)
+                timestamp = parse_timestamp(indexed_at) if indexed_at else None
+                if timestamp is not None:
+                    if cutoff is not None and timestamp < cutoff:
+                        break
+                    if latest_only and found and timestamp < self._newest(found):
+                        break
+                    if timestamp == cutoff and notification.uri in self._seen_at_since:
+                        continue
+                found.append(notification)
+        finally:
+            pages.close()
+        return found
+
+    @staticmethod
+    def _newest(notifications: list[Any]) -> Any:
+        return max(
+            parse_timestamp(notification.indexed_at)
+            for notification in notifications
+            if getattr(notification, "indexed_at", None)
+        )
+
+    def _advance(self, notifications: list[Any]) -> None:
+        """Move ``since`` to the newest of the notifications and remember them."""
+        if not any(getattr(item, "indexed_at", None) for item in notifications):
+            return
+        newest = self._newest(notifications)
+        if self.since is None or newest > parse_timestamp(self.since):
+            self.since = newest
+            self._seen_at_since = set()
+        self._seen_at_since.update(
+            notification.uri
+            for notification in notifications
+            if getattr(notification, "indexed_at", None)
+            and parse_timestamp(notification.indexed_at) == newest
+        )
+
+    def _start(self) -> None:
+        """Remember the newest existing notifications without emitting them."""
+        self._advance(self._fetch(page_size=1, latest_only=True))
+        self._started = True
+
+    def poll(self) -> int:
+        """
+        Fetch and emit notifications newer than the last one seen.
+
+        Returns:
+            The number of notifications emitted
+        """
+        if not self._started:
+            self._start()
+            return 0
+
+        new = self._fetch(self.page_size)
+        self._advance(new)
+        # Pages are newest first; emit in the order the notifications arrived
+        for notification in reversed(new):
+            info = notification_info(notification).as_dict()
+            info["indexed_at"] = getattr(notification, "indexed_at", None)
+            self.emit(info)
+        self.emitted += len(new)
+        return len(new)
+
+    def _next_interval(self, found: int) -> float:
+        if found:
+            # Activity: poll again soon, faster the busier the account is
+            shrink = self.backoff if found < self.page_size else self.backoff**2
+            return max(self.min_interval, self.interval / shrink)
+        return min(self.max_interval, self.interval * self.backoff)
+
+    def run(self, max_polls: Optional[int] = None) -> int:
+        """
+        Poll until ``stop`` is called or ``max_polls`` polls have run.
+
+        Errors are logged and polling continues with a longer interval; a
+        rate-limit response pauses polling until the server's window resets.
+
+        Args:
+            max_polls: Optional number of polls after which to return
+
+        Returns:
+            The total number of notifications emitted
+        """
+        while not self._stop.is_set():
+            delay = self.interval
+            try:
+                found = self.poll()
+                self.interval = self._next_interval(found)
+                delay = self.interval
+            except RateLimitExceededError as e:
+                delay = rate_limit_delay(e, self.max_interval)
+                logging.warning(f"Rate limited, pausing polls for {delay:.0f}s")
+            except Exception as e:
+                logging.error(f"Watch poll failed: {e}", exc_info=True)
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+                delay = self.interval
+
+            self.polls += 1
+            if max_polls is not None and self.polls >= max_polls:
+                break
+            logging.debug(f"Next poll in {delay:.1f}s")
+            self._stop.wait(delay)
+        return self.emitted
+
+
+def watch_notifications(
+    client: Any,
+    emit: Emit = emit_json_line,
+    since: Optional[Timestamp] = None,
+    min_interval: float = WATCH_MIN_INTERVAL,
+    max_interval: float = WATCH_MAX_INTERVAL,
+    max_polls: Optional[int] = None,
+) -> int:
+    """
+    Watch for new notifications until interrupted.
+
+    Args:
+        client: An authenticated BlueSky client
+        emit: Called with each new notification's dictionary; defaults to
+            writing JSON lines to stdout
+        since: Also emit notifications indexed after this time on start
+        min_interval: Seconds between polls while notifications keep arriving
+        max_interval: Longest wait between polls when idle
+        max_polls: Optional number of polls after which to return
+
+    Returns:
+        The total number of notifications emitted
+    """
+    watcher = NotificationWatcher(
+        client, emit, since, min_interval=min_interval, max_interval=max_interval
+    )
+    started = time.monotonic()
+    try:
+        return watcher.run(max_polls)
+    finally:
+        logging.info(
+            f"Watched for {time.monotonic() - started:.0f}s: "
+            f"{watcher.polls} polls, {watcher.emitted} notifications"
+        )
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from bluesky_social.accounts import AccountRegistry, format_report, run_for_accounts
+
+
+@pytest.fixture
+def vault(monkeypatch):
+    entries = {}
+
+    def get_password(service, key):
+        return entries.get((service, key))
+
+    def set_password(service, key, value):
+        entries[(service, key)] = value
+
+    def delete_password(service, key):
+        del entries[(service, key)]
+
+    for module in ("accounts", "auth"):
+        for name, function in (
+            ("get_password", get_password),
+            ("set_password", set_password),
+            ("delete_password", delete_password),
+        ):
+            monkeypatch.setattr(f"bluesky_social.{module}.keyring.{name}", function)
+    return entries
+
+
+class AccountClient:
+    def __init__(self):
+        self.me = None
+        self.logins = []
+
+    def on_session_change(self, callback):
+        self.callback = callback
+
+    def login(self, username=None, password=None, session_string=None):
+        self.logins.append((username, password, session_string))
+        if session_string is None and password != f"{username}-pw":
+            raise Exception("Invalid identifier or password")
+        self.me = type("obj", (), {"handle": username or "resumed"})
+
+
+def test_registry_keeps_per_account_entries(vault):
+    registry = AccountRegistry("Test")
+    registry.add("a.test", "a.test-pw")
+    registry.add("b.test", "b.test-pw")
+    registry.add("a.test")
+    assert registry.accounts() == ["a.test", "b.test"]
+    vault[("Test", "a.test:session")] = "session"
+
+    assert registry.remove("a.test")
+    assert not registry.remove("a.test")
+    assert registry.accounts() == ["b.test"]
+    assert ("Test", "a.test") not in vault
+    assert ("Test", "a.test:session") not in vault
+    assert vault[("Test", "b.test")] == "b.test-pw"
+
+
+def test_keyring_failures_never_overwrite_the_registry(vault, monkeypatch):
+    registry = AccountRegistry("Test")
+    registry.add("a.test")
+    registry.add("b.test")
+
+    def unavailable(service, key):
+        raise RuntimeError("keyring locked")
+
+    monkeypatch.setattr("bluesky_social.accounts.keyring.get_password", unavailable)
+    assert registry.accounts() == []
+    with pytest.raises(RuntimeError):
+        registry.add("c.test", "c.test-pw")
+    with pytest.raises(RuntimeError):
+        registry.remove("a.test")
+    assert vault[("Test", "accounts")] == '["a.test", "b.test"]'
+    assert ("Test", "c.test") not in vault
+
+
+def test_login_resumes_sessions_before_using_passwords(vault, monkeypatch):
+    clients = []
+
+    def create_client(pool=None):
+        clients.append(AccountClient())
+        return clients[-1]
+
+    monkeypatch.setattr("bluesky_social.transport.create_client", create_client)
+    registry = AccountRegistry("Test")
+    registry.add("a.test", "a.test-pw")
+    registry.add("b.test")
+    vault[("Test", "b.test:session")] = "stored-session"
+
+    registry.login("a.test")
+    registry.login("b.test")
+    assert clients[0].logins == [("a.test", "a.test-pw", None)]
+    assert clients[1].logins == [(None, None, "stored-session")]
+
+    registry.add("c.test")
+    with pytest.raises(ValueError):
+        registry.login("c.test")
+
+
+def test_run_for_accounts_isolates_failures_and_reports(vault, monkeypatch):
+    monkeypatch.setattr(
+        "bluesky_social.transport.create_client", lambda pool=None: AccountClient()
+    )
+    registry = AccountRegistry("Test")
+    for name in ("a.test", "b.test", "c.test"):
+        registry.add(name, f"{name}-pw" if name != "b.test" else "wrong")
+
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def operation(client):
+        with lock:
+            active.append(client)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(client)
+        return [client.me.handle] * 2
+
+    results = run_for_accounts(registry, operation, max_accounts=2, pool=object())
+    assert [entry["account"] for entry in results] == ["a.test", "b.test", "c.test"]
+    assert results[0]["result"] == ["a.test", "a.test"]
+    assert results[1]["error"] is not None and results[1]["result"] is None
+    assert max(peak) <= 2
+
+    report = format_report(results, "notifications")
+    assert "b.test" in report and "failed" in report
+    assert report.splitlines()[-1] == "3 accounts, 1 failed, 4 notifications in total"
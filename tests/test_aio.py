@@ -0,0 +1,161 @@
+import asyncio
+from types import SimpleNamespace
+
+from atproto_client.models.blob_ref import BlobRef, IpldLink
+
+from bluesky_social import aio
+from bluesky_social.resolver import _shared_memory
+
+BLOB_CID = "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"
+
+
+def reply_post(uri, author, text, reply_count=None):
+    return SimpleNamespace(
+        uri=uri,
+        cid=f"cid-{uri}",
+        author=SimpleNamespace(handle=author),
+        record=SimpleNamespace(text=text),
+        reason="reply",
+        reply_count=reply_count,
+        indexed_at="2024-01-01T00:00:00Z",
+    )
+
+
+class AsyncClient:
+    def __init__(self, pages, reply_counts=None, answered=()):
+        self.me = SimpleNamespace(handle="me.test", did="did:plc:me")
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+        async def call(name, params):
+            self.calls.append((name, params))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0)
+            self.in_flight -= 1
+
+        async def list_notifications(params):
+            await call("list_notifications", params)
+            index = int(params["cursor"] or 0)
+            return SimpleNamespace(
+                notifications=pages[index],
+                cursor=str(index + 1) if index + 1 < len(pages) else None,
+            )
+
+        async def get_posts(params):
+            await call("get_posts", params)
+            return SimpleNamespace(
+                posts=[
+                    SimpleNamespace(uri=uri, reply_count=(reply_counts or {})[uri])
+                    for uri in params["uris"]
+                    if uri in (reply_counts or {})
+                ]
+            )
+
+        async def get_post_thread(params):
+            await call("get_post_thread", params)
+            author = "me.test" if params["uri"] in answered else "other.test"
+            replies = [SimpleNamespace(post=reply_post("r", author, "reply text"))]
+            return SimpleNamespace(thread=SimpleNamespace(replies=replies))
+
+        async def get_profiles(params):
+            await call("get_profiles", params)
+            return SimpleNamespace(
+                profiles=[
+                    SimpleNamespace(did=f"did:plc:{actor}", handle=actor)
+                    for actor in params["actors"]
+                ]
+            )
+
+        async def create(repo, record):
+            await call("create", record)
+            return SimpleNamespace(uri="at://did:plc:me/post/1", cid="cid-new")
+
+        async def upload_blob(data):
+            await call("upload_blob", data)
+            return SimpleNamespace(
+                blob=BlobRef(
+                    mime_type="image/png", size=len(data), ref=IpldLink(link=BLOB_CID)
+                )
+            )
+
+        self.upload_blob = upload_blob
+        self.app = SimpleNamespace(
+            bsky=SimpleNamespace(
+                notification=SimpleNamespace(list_notifications=list_notifications),
+                feed=SimpleNamespace(
+                    get_posts=get_posts,
+                    get_post_thread=get_post_thread,
+                    post=SimpleNamespace(create=create),
+                ),
+                actor=SimpleNamespace(get_profiles=get_profiles),
+            )
+        )
+
+    def get_current_time_iso(self):
+        return "2024-01-01T00:00:00Z"
+
+    def count(self, name):
+        return sum(1 for called, _ in self.calls if called == name)
+
+
+def test_get_notifications_follows_the_cursor():
+    pages = [[reply_post("u1", "a", "one")], [reply_post("u2", "b", "two")]]
+    client = AsyncClient(pages)
+    result = asyncio.run(aio.get_notifications(client))
+    assert [info["uri"] for info in result] == ["u1", "u2"]
+    assert result[0]["reason"] == "reply"
+
+
+def test_list_unanswered_responses_matches_the_sync_rules():
+    notifications = [reply_post(f"u{i}", f"user{i}", f"text{i}") for i in range(4)]
+    client = AsyncClient(
+        [notifications], reply_counts={"u0": 0, "u1": 1, "u2": 1}, answered={"u1"}
+    )
+    responses = asyncio.run(aio.list_unanswered_responses(client, max_workers=2))
+    assert [r["uri"] for r in responses] == ["u0", "u2", "u3"]
+    assert responses[0] == {
+        "cid": "cid-u0",
+        "uri": "u0",
+        "author": "user0",
+        "text": "text0",
+        "root_uri": None,
+        "root_cid": None,
+    }
+    # u0 is known to have no replies; u3 could not be hydrated
+    threads = [
+        params["uri"] for name, params in client.calls if name == "get_post_thread"
+    ]
+    assert sorted(threads) == ["u1", "u2", "u3"]
+    assert client.peak <= 2
+
+
+def test_fetch_threads_bounds_concurrency():
+    client = AsyncClient([[]])
+    results = asyncio.run(
+        aio.fetch_threads(client, [f"u{i}" for i in range(10)], max_workers=3)
+    )
+    assert [result["uri"] for result in results] == [f"u{i}" for i in range(10)]
+    assert client.peak == 3
+
+
+def test_publish_post_resolves_mentions_and_images():
+    _shared_memory.clear()
+    client = AsyncClient([[]])
+    created = asyncio.run(
+        aio.publish_post(
+            client,
+            "hi @alice.test and @alice.test #tag",
+            image_path=[b"one", b"two"],
+            alt_text=["first"],
+        )
+    )
+    assert created == {"uri": "at://did:plc:me/post/1", "cid": "cid-new"}
+    assert client.count("get_profiles") == 1
+    assert client.count("upload_blob") == 2
+    record = next(params for name, params in client.calls if name == "create")
+    assert [image.alt for image in record.embed.images] == ["first", "Image"]
+    features = [facet.features[0] for facet in record.facets]
+    assert [feature.did for feature in features[:2]] == ["did:plc:alice.test"] * 2
+    assert features[2].tag == "tag"
@@ -1,6 +1,14 @@
 import pytest
+from atproto import SessionEvent
+from atproto.exceptions import NetworkError, UnauthorizedError
 
-from bluesky_social.auth import authenticate_bluesky, clear_credentials, get_credentials
+from bluesky_social.auth import (
+    authenticate_bluesky,
+    clear_credentials,
+    get_credentials,
+    persist_session,
+    resume_session,
+)
 
 
 class DummyClient:
@@ -52,3 +60,69 @@ def test_authenticate_bluesky_failure():
     client = DummyClient()
     with pytest.raises(Exception):
         authenticate_bluesky(client, "wrong", "pw")
+
+
+class FakeKeyring:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+
+    def get_password(self, service, key):
+        return self.entries.get((service, key))
+
+    def set_password(self, service, key, value):
+        self.entries[(service, key)] = value
+
+    def delete_password(self, service, key):
+        del self.entries[(service, key)]
+
+
+class SessionClient:
+    def __init__(self, fail_resume=None):
+        self.fail_resume = fail_resume
+        self.callbacks = []
+        self.logins = []
+
+    def on_session_change(self, callback):
+        self.callbacks.append(callback)
+
+    def login(self, username=None, password=None, session_string=None):
+        self.logins.append((username, password, session_string))
+        if session_string and self.fail_resume:
+            raise self.fail_resume
+
+
+def test_resume_session_uses_stored_session(monkeypatch):
+    fake = FakeKeyring({("Bluesky", "valid:session"): "stored-session"})
+    monkeypatch.setattr("bluesky_social.auth.keyring", fake)
+    client = SessionClient()
+    assert resume_session(client, "Bluesky", "valid")
+    assert client.logins == [(None, None, "stored-session")]
+
+
+def test_resume_session_discards_unusable_session(monkeypatch):
+    fake = FakeKeyring({("Bluesky", "valid:session"): "stale-session"})
+    monkeypatch.setattr("bluesky_social.auth.keyring", fake)
+    expired = UnauthorizedError()
+    assert not resume_session(SessionClient(expired), "Bluesky", "valid")
+    assert ("Bluesky", "valid:session") not in fake.entries
+    assert not resume_session(SessionClient(), "Bluesky", "valid")
+
+
+def test_resume_session_keeps_the_session_on_network_errors(monkeypatch):
+    fake = FakeKeyring({("Bluesky", "valid:session"): "stored-session"})
+    monkeypatch.setattr("bluesky_social.auth.keyring", fake)
+    with pytest.raises(NetworkError):
+        resume_session(SessionClient(NetworkError()), "Bluesky", "valid")
+    assert fake.entries[("Bluesky", "valid:session")] == "stored-session"
+
+
+def test_persist_session_saves_new_and_refreshed_sessions(monkeypatch):
+    fake = FakeKeyring()
+    monkeypatch.setattr("bluesky_social.auth.keyring", fake)
+    client = SessionClient()
+    persist_session(client, "Bluesky", "valid")
+    session = type("obj", (), {"export": lambda self: "exported"})()
+    client.callbacks[0](SessionEvent.IMPORT, session)
+    assert fake.entries == {}
+    client.callbacks[0](SessionEvent.REFRESH, session)
+    assert fake.entries == {("Bluesky", "valid:session"): "exported"}
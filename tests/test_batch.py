@@ -0,0 +1,192 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from atproto.exceptions import BadRequestError
+from atproto_client.models.blob_ref import BlobRef, IpldLink
+from PIL import Image
+
+from bluesky_social.batch import post_many, read_batch_file, read_completed, reply_all
+from bluesky_social.records import ResponseRecord
+from bluesky_social.store import NotificationStore
+
+BLOB_CID = "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"
+
+
+class BatchClient:
+    def __init__(self, fail_text=None):
+        self.me = SimpleNamespace(did="did:plc:me", handle="me.bsky.social")
+        self.fail_text = fail_text
+        self.lock = threading.Lock()
+        self.created = []
+        self.uploads = 0
+
+        self.apply_writes_calls = 0
+
+        def create(repo, record, rkey=None):
+            if record.text == self.fail_text:
+                raise Exception("InvalidRecord")
+            with self.lock:
+                self.created.append(record.text)
+            return SimpleNamespace(uri=f"at://{repo}/post/{rkey}", cid=f"cid-{rkey}")
+
+        def apply_writes(data):
+            self.apply_writes_calls += 1
+            texts = [write.value["text"] for write in data.writes]
+            if self.fail_text in texts:
+                raise BadRequestError()
+            self.created.extend(texts)
+            return SimpleNamespace(
+                results=[
+                    SimpleNamespace(
+                        uri=f"at://{data.repo}/post/{write.rkey}",
+                        cid=f"cid-{write.rkey}",
+                    )
+                    for write in data.writes
+                ]
+            )
+
+        self.app = SimpleNamespace(
+            bsky=SimpleNamespace(
+                feed=SimpleNamespace(post=SimpleNamespace(create=create))
+            )
+        )
+        self.com = SimpleNamespace(
+            atproto=SimpleNamespace(repo=SimpleNamespace(apply_writes=apply_writes))
+        )
+
+    def get_current_time_iso(self):
+        return "2024-01-01T00:00:00Z"
+
+    def upload_blob(self, data):
+        with self.lock:
+            self.uploads += 1
+        blob = BlobRef(
+            mime_type="image/png", size=len(data), ref=IpldLink(link=BLOB_CID)
+        )
+        return SimpleNamespace(blob=blob)
+
+
+def test_read_batch_file_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "posts.jsonl"
+    jsonl.write_text('{"text": "one"}\n\n{"text": "two", "alt": "a"}\n')
+    assert list(read_batch_file(str(jsonl))) == [
+        {"text": "one"},
+        {"text": "two", "alt": "a"},
+    ]
+
+    csv_path = tmp_path / "posts.csv"
+    csv_path.write_text("text,image,reply_uri,reply_cid\nhello,,at://x,cidx\n")
+    assert list(read_batch_file(str(csv_path))) == [
+        {"text": "hello", "reply_to": {"uri": "at://x", "cid": "cidx"}}
+    ]
+
+
+def test_post_many_reports_failures_and_resumes(tmp_path):
+    image_path = tmp_path / "image.png"
+    Image.new("RGB", (10, 10), color="blue").save(image_path)
+    items = [
+        {"text": "first"},
+        {"text": "broken"},
+        {"text": "with image", "image": str(image_path), "alt": "blue"},
+        {"text": "x" * 400},
+    ]
+    results_path = tmp_path / "results.jsonl"
+
+    client = BatchClient(fail_text="broken")
+    results = post_many(client, items, max_workers=2, results_path=str(results_path))
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["uri"] and results[2]["uri"]
+    assert results[1]["error"] == "InvalidRecord"
+    assert "maximum allowed length" in results[3]["error"]
+    assert client.uploads == 1
+    assert client.created == ["first", "with image"]
+    assert read_completed(str(results_path)) == {0, 2}
+
+    retry = BatchClient()
+    results = post_many(retry, items[:3], max_workers=2, results_path=str(results_path))
+    assert [r["index"] for r in results] == [1]
+    assert retry.created == ["broken"]
+    assert retry.apply_writes_calls == 1
+    assert retry.uploads == 0
+    lines = [json.loads(line) for line in results_path.read_text().splitlines()]
+    assert len(lines) == 5
+
+
+def test_post_many_groups_records_into_commits():
+    client = BatchClient()
+    items = [{"text": f"post {i}"} for i in range(5)]
+    results = post_many(client, items, max_workers=0, chunk_size=2)
+    assert client.apply_writes_calls == 3
+    assert client.created == [item["text"] for item in items]
+    uris = [result["uri"] for result in results]
+    assert len(set(uris)) == 5
+    # Record keys are TIDs, so URIs sort in creation order
+    assert uris == sorted(uris)
+
+
+def test_reply_all_links_threads_and_marks_responses_answered():
+    client = BatchClient()
+    writes, profile_requests = [], []
+    apply_writes = client.com.atproto.repo.apply_writes
+
+    def recording_apply_writes(data):
+        writes.extend(write.value for write in data.writes)
+        return apply_writes(data)
+
+    def get_profiles(params):
+        profile_requests.append(params["actors"])
+        return SimpleNamespace(
+            profiles=[
+                SimpleNamespace(did=f"did:plc:{actor}", handle=actor, display_name="")
+                for actor in params["actors"]
+            ]
+        )
+
+    client.com.atproto.repo.apply_writes = recording_apply_writes
+    client.app.bsky.actor = SimpleNamespace(get_profiles=get_profiles)
+
+    store = NotificationStore(":memory:")
+    store.add_notifications(
+        client.me.did,
+        [
+            SimpleNamespace(
+                uri=uri,
+                cid=f"cid-{uri}",
+                reason="reply",
+                indexed_at="2024-01-01T00:00:00Z",
+                author=SimpleNamespace(handle=handle, did=f"did:plc:{handle}"),
+                record=SimpleNamespace(text="hi", reply=None),
+            )
+            for uri, handle in (("at://r1", "bob.test"), ("at://r2", "carol.test"))
+        ],
+    )
+    responses = [
+        ResponseRecord("cid-r1", "at://r1", "bob.test", "hi", "at://root", "rcid"),
+        {"cid": "cid-r2", "uri": "at://r2", "author": "carol.test", "text": "hi"},
+        ResponseRecord("cid-r3", "at://r3", "spam.test", "spam", None, None),
+    ]
+
+    replies = reply_all(
+        client,
+        responses,
+        lambda r: None if r["text"] == "spam" else "Thanks @{author}!".format(**r),
+        store=store,
+    )
+    assert [(r["parent_uri"], r["text"], r["error"]) for r in replies] == [
+        ("at://r1", "Thanks @bob.test!", None),
+        ("at://r2", "Thanks @carol.test!", None),
+    ]
+    assert client.apply_writes_calls == 1
+    # Both mentions are resolved with one request
+    assert profile_requests == [["bob.test", "carol.test"]]
+    assert writes[0]["reply"]["parent"]["uri"] == "at://r1"
+    assert writes[0]["reply"]["root"]["uri"] == "at://root"
+    # A response without a root starts the thread it replies to
+    assert writes[1]["reply"]["root"]["uri"] == "at://r2"
+    assert store.unanswered_responses(client.me.did) == []
+
+    assert reply_all(client, responses[2:], "Re: {text}")[0]["text"] == "Re: spam"
+    with pytest.raises(KeyError):
+        reply_all(client, responses, "Re: {missing}")
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from atproto_client.models.blob_ref import BlobRef, IpldLink
+
+from bluesky_social.blob_cache import (
+    BlobCache,
+    convert_cached,
+    sha256_hex,
+    upload_blob_cached,
+)
+
+BLOB_CID = "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"
+
+
+class UploadClient:
+    def __init__(self, did="did:plc:me"):
+        self.me = SimpleNamespace(did=did)
+        self.uploads = 0
+
+    def upload_blob(self, data):
+        self.uploads += 1
+        blob = BlobRef(
+            mime_type="image/jpeg", size=len(data), ref=IpldLink(link=BLOB_CID)
+        )
+        return SimpleNamespace(blob=blob)
+
+
+def test_upload_blob_cached_skips_repeat_uploads(tmp_path):
+    client = UploadClient()
+    with BlobCache(str(tmp_path / "blobs.sqlite3")) as cache:
+        first = upload_blob_cached(client, b"banner", cache)
+        second = upload_blob_cached(client, b"banner", cache)
+        assert client.uploads == 1
+        assert str(second.cid) == BLOB_CID
+        assert (second.mime_type, second.size) == (first.mime_type, first.size)
+
+        upload_blob_cached(client, b"logo", cache)
+        assert client.uploads == 2
+
+        # Blobs belong to one repository
+        other = UploadClient(did="did:plc:other")
+        upload_blob_cached(other, b"banner", cache)
+        assert other.uploads == 1
+
+    upload_blob_cached(client, b"banner")
+    assert client.uploads == 3
+
+
+def test_blob_cache_expiry_and_lru_eviction():
+    client = UploadClient()
+    expired = BlobCache(":memory:", ttl=-1)
+    upload_blob_cached(client, b"a", expired)
+    upload_blob_cached(client, b"a", expired)
+    assert client.uploads == 2
+
+    cache = BlobCache(":memory:", max_entries=2)
+    for data in (b"a", b"b"):
+        upload_blob_cached(client, data, cache)
+    assert cache.get_blob("did:plc:me", sha256_hex(b"a")) is not None
+    upload_blob_cached(client, b"c", cache)
+    # "b" was the least recently used entry
+    assert cache.get_blob("did:plc:me", sha256_hex(b"b")) is None
+    assert cache.get_blob("did:plc:me", sha256_hex(b"a")) is not None
+
+
+def test_convert_cached_keys_on_source_and_settings():
+    cache = BlobCache(":memory:")
+    calls = []
+
+    def convert():
+        calls.append(1)
+        return b"jpeg bytes"
+
+    assert convert_cached(b"png", "jpeg:q85", convert, cache) == b"jpeg bytes"
+    assert convert_cached(b"png", "jpeg:q85", convert, cache) == b"jpeg bytes"
+    assert len(calls) == 1
+    convert_cached(b"png", "jpeg:q70", convert, cache)
+    assert len(calls) == 2
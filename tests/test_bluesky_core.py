@@ -1,6 +1,20 @@
+import json
+from io import BytesIO
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
-from bluesky_social.bluesky_core import detect_hashtags, post
+import pytest
+from atproto_client.models.blob_ref import BlobRef, IpldLink
+from atproto_client.models.utils import get_model_as_json
+from PIL import Image
+
+from bluesky_social.bluesky_core import (
+    detect_hashtags,
+    post,
+    publish_thread,
+    record_cid,
+    upload_images,
+)
 from bluesky_social.notifications import list_unanswered_responses
 
 
@@ -37,8 +51,78 @@ def test_list_unanswered_responses(mock_client_class):
     fake_client.app.bsky.notification.list_notifications.return_value.notifications = [
         fake_notification
     ]
+    fake_client.app.bsky.notification.list_notifications.return_value.cursor = None
     fake_client.app.bsky.feed.get_post_thread.return_value.thread.replies = []
 
     responses = list_unanswered_responses(fake_client)
     assert len(responses) == 1
     assert responses[0]["cid"] == "cid-1"
+
+
+def test_publish_thread_links_replies_in_one_commit():
+    fake_client = MagicMock()
+    fake_client.get_current_time_iso.return_value = "2023-10-01T00:00:00Z"
+    fake_client.me.did = "did:example:123"
+    fake_client.com.atproto.repo.apply_writes.return_value.results = None
+
+    created = publish_thread(fake_client, ["one", "two #tag", "three"])
+
+    fake_client.com.atproto.repo.apply_writes.assert_called_once()
+    # Hash the records exactly as they are sent over the wire
+    data = fake_client.com.atproto.repo.apply_writes.call_args[0][0]
+    writes = [
+        SimpleNamespace(rkey=w["rkey"], value=w["value"])
+        for w in json.loads(get_model_as_json(data))["writes"]
+    ]
+    assert [w.value["text"] for w in writes] == ["one", "two #tag", "three"]
+    assert [r["cid"] for r in created] == [record_cid(w.value) for w in writes]
+    assert (
+        created[0]["uri"] == f"at://did:example:123/app.bsky.feed.post/{writes[0].rkey}"
+    )
+    assert "reply" not in writes[0].value
+    for i in (1, 2):
+        reply = writes[i].value["reply"]
+        assert {k: reply["parent"][k] for k in ("uri", "cid")} == created[i - 1]
+        assert {k: reply["root"][k] for k in ("uri", "cid")} == created[0]
+
+
+def test_record_cid_skips_blob_links():
+    assert record_cid({"text": "hi"}).startswith("bafyrei")
+    assert record_cid({"embed": {"ref": {"$link": "bafkrei"}}}) is None
+
+
+def png_bytes(color, size=(64, 64)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_upload_images_converts_oversized_images_and_keeps_order(monkeypatch):
+    monkeypatch.setattr("bluesky_social.bluesky_core.MAX_IMAGE_SIZE", 1000)
+    uploaded = []
+
+    def upload_blob(data):
+        uploaded.append(data)
+        blob = BlobRef(mime_type="image/jpeg", size=len(data), ref=IpldLink(link="x"))
+        return SimpleNamespace(blob=blob)
+
+    fake_client = SimpleNamespace(upload_blob=upload_blob)
+    small = png_bytes("red", (4, 4))
+    large = png_bytes("blue", (400, 400))
+    assert len(small) < 1000 < len(large)
+
+    images = upload_images(fake_client, [large, small, large], ["a", "b"])
+
+    assert [image.alt for image in images] == ["a", "b", "Image"]
+    assert small in uploaded
+    converted = [data for data in uploaded if data != small]
+    assert len(converted) == 2
+    for data in converted:
+        assert len(data) <= 1000
+        with Image.open(BytesIO(data)) as encoded:
+            assert encoded.format == "JPEG"
+
+
+def test_upload_images_rejects_more_than_four():
+    with pytest.raises(ValueError):
+        upload_images(MagicMock(), [b"x"] * 5)
@@ -1,8 +1,15 @@
 import os
+from io import BytesIO
 
+import pytest
 from PIL import Image
 
-from bluesky_social.image_utils import convert_to_jpeg
+from bluesky_social.image_utils import (
+    as_image_list,
+    convert_to_jpeg,
+    encode_jpeg,
+    encode_to_budget,
+)
 
 
 def test_convert_to_jpeg(tmp_path):
@@ -12,3 +19,75 @@ def test_convert_to_jpeg(tmp_path):
     jpeg_path = convert_to_jpeg(str(file_path))
     assert os.path.exists(jpeg_path)
     os.remove(jpeg_path)  # Ensure cleanup
+
+
+def noise_image(width, height):
+    return Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+
+
+def test_encode_to_budget_fits_small_image_in_one_attempt(tmp_path):
+    file_path = tmp_path / "small.png"
+    Image.new("RGBA", (50, 50), color=(0, 0, 255, 128)).save(file_path)
+    result = encode_to_budget(str(file_path), max_bytes=100_000)
+    assert result["attempts"] == 1
+    assert result["quality"] == 85
+    assert result["size"] == (50, 50)
+    assert result["elapsed"] >= 0
+
+
+def test_encode_to_budget_lands_under_budget(tmp_path):
+    file_path = tmp_path / "noise.png"
+    noise_image(400, 300).save(file_path)
+    budget = 60_000
+    result = encode_to_budget(str(file_path), max_bytes=budget)
+    assert len(result["data"]) <= budget
+    assert result["attempts"] > 1
+    with Image.open(BytesIO(result["data"])) as encoded:
+        assert encoded.format == "JPEG"
+        assert encoded.size == result["size"]
+
+
+def test_encode_to_budget_downsamples_large_jpeg(tmp_path):
+    file_path = tmp_path / "large.jpg"
+    Image.new("RGB", (3000, 1500), color="green").save(file_path)
+    result = encode_to_budget(str(file_path), max_dimension=1000)
+    assert result["size"] == (1000, 500)
+
+
+def test_encode_to_budget_rejects_impossible_budget(tmp_path):
+    file_path = tmp_path / "noise.png"
+    noise_image(300, 300).save(file_path)
+    with pytest.raises(ValueError):
+        encode_to_budget(str(file_path), max_bytes=100)
+
+
+def test_encode_jpeg_from_memory_writes_no_files(tmp_path):
+    buffer = BytesIO()
+    Image.new("RGBA", (20, 10), color=(255, 0, 0, 128)).save(buffer, format="PNG")
+    png = buffer.getvalue()
+    for source in (png, bytearray(png), memoryview(png), BytesIO(png)):
+        data = encode_jpeg(source)
+        with Image.open(BytesIO(data)) as encoded:
+            assert encoded.format == "JPEG"
+            assert encoded.size == (20, 10)
+    assert encode_to_budget(memoryview(png), max_bytes=100_000)["attempts"] == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_convert_to_jpeg_needs_output_path_for_bytes(tmp_path):
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10)).save(buffer, format="PNG")
+    with pytest.raises(ValueError):
+        convert_to_jpeg(buffer.getvalue())
+    output_path = str(tmp_path / "out.jpeg")
+    assert convert_to_jpeg(buffer.getvalue(), output_path=output_path) == output_path
+    assert os.path.exists(output_path)
+
+
+def test_as_image_list_treats_paths_and_bytes_as_one_image():
+    stream = BytesIO(b"png")
+    assert as_image_list(None) == [] and as_image_list(b"") == []
+    assert as_image_list("a.png") == ["a.png"]
+    assert as_image_list(b"png") == [b"png"]
+    assert as_image_list(stream) == [stream]
+    assert as_image_list(("a.png", b"png")) == ["a.png", b"png"]
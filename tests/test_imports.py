@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+import bluesky_social
+
+# Cumulative microseconds allowed for importing the CLI module. Loading
+# atproto alone takes several times this, so the budget fails as soon as a
+# heavy dependency is imported eagerly again.
+CLI_IMPORT_BUDGET_US = 250_000
+
+HEAVY_MODULES = ("atproto", "atproto_client", "PIL", "keyring", "httpx", "libipld")
+
+
+def import_times(module):
+    """Import a module in a fresh interpreter and return its -X importtime log."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_skips_heavy_dependencies():
+    times = import_times("bluesky_social.cli")
+    loaded = {name.split(".")[0] for name in times}
+    assert loaded.isdisjoint(HEAVY_MODULES)
+    assert times["bluesky_social.cli"] < CLI_IMPORT_BUDGET_US
+
+
+def test_public_api_loads_on_first_use():
+    from bluesky_social.bluesky_core import post
+
+    assert bluesky_social.post is post
+    assert "post" in dir(bluesky_social)
+    assert set(bluesky_social.__all__) <= set(dir(bluesky_social))
+    with pytest.raises(AttributeError):
+        bluesky_social.__getattr__("not_a_function")
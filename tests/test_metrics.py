@@ -0,0 +1,101 @@
+import json
+
+import httpx
+import pytest
+from atproto import Client
+
+from bluesky_social.metrics import (
+    FUNCTION,
+    XRPC,
+    Metrics,
+    instrumented,
+    serve_metrics,
+)
+from bluesky_social.scheduler import RequestScheduler, ScheduledRequest
+
+
+def test_observe_keeps_counts_bytes_and_histogram():
+    registry = Metrics()
+    for seconds in (0.001, 0.002, 0.03, 12.0):
+        registry.observe(XRPC, "app.bsky.feed.getPosts", seconds, received=100)
+    registry.observe(XRPC, "app.bsky.feed.getPosts", 0.2, error=True, sent=10)
+    registry.retry(XRPC, "app.bsky.feed.getPosts")
+
+    stats = registry.snapshot()[XRPC]["app.bsky.feed.getPosts"]
+    assert (stats["calls"], stats["errors"], stats["retries"]) == (5, 1, 1)
+    assert (stats["bytes_sent"], stats["bytes_received"]) == (10, 400)
+    assert stats["max_seconds"] == 12.0
+    assert stats["buckets"]["0.005"] == 2
+    assert stats["buckets"]["10.0"] == 4
+    assert stats["buckets"]["+Inf"] == 5
+    assert stats["p50_seconds"] == 0.05
+    # The slowest call is past the last bucket
+    assert stats["p95_seconds"] == 12.0
+
+    summary = registry.summary().splitlines()
+    assert summary[0].split()[:3] == ["Operation", "Calls", "Errors"]
+    assert summary[2].split()[:5] == ["xrpc", "app.bsky.feed.getPosts", "5", "1", "1"]
+    registry.reset()
+    assert registry.summary() == "No calls recorded."
+
+
+def test_instrumented_records_calls_and_errors(tmp_path):
+    registry = Metrics()
+
+    @instrumented("test.square", registry)
+    def square(value):
+        if value < 0:
+            raise ValueError("negative")
+        return value * value
+
+    assert square(3) == 9
+    with pytest.raises(ValueError):
+        square(-1)
+    assert square.__name__ == "square"
+
+    path = tmp_path / "stats.json"
+    registry.dump(str(path))
+    stats = json.loads(path.read_text())[FUNCTION]["test.square"]
+    assert (stats["calls"], stats["errors"]) == (2, 1)
+
+
+def test_scheduled_requests_record_latency_bytes_and_retries():
+    registry = Metrics()
+    statuses = [503]
+
+    def handler(request):
+        if statuses:
+            return httpx.Response(statuses.pop(0), json={"error": "Busy"})
+        return httpx.Response(200, json={"did": "did:plc:alice"})
+
+    scheduler = RequestScheduler(sleep=lambda delay: None, metrics=registry)
+    request = ScheduledRequest(scheduler, transport=httpx.MockTransport(handler))
+    client = Client(base_url="https://pds.test/xrpc", request=request)
+    client.com.atproto.identity.resolve_handle({"handle": "alice.test"})
+
+    stats = registry.snapshot()[XRPC]["com.atproto.identity.resolveHandle"]
+    assert (stats["calls"], stats["errors"], stats["retries"]) == (2, 1, 1)
+    assert stats["bytes_received"] == len(b'{"did":"did:plc:alice"}')
+
+
+def test_prometheus_export_is_served_over_http():
+    registry = Metrics()
+    registry.observe(FUNCTION, 'odd"name', 0.02)
+    text = registry.prometheus()
+    assert "# TYPE bluesky_social_calls_total counter" in text
+    assert 'bluesky_social_calls_total{kind="function",name="odd\\"name"} 1' in text
+    assert (
+        'bluesky_social_latency_seconds_bucket{kind="function",name="odd\\"name",'
+        'le="0.025"} 1' in text
+    )
+
+    server = serve_metrics(0, registry)
+    try:
+        port = server.server_address[1]
+        response = httpx.get(f"http://127.0.0.1:{port}/metrics")
+        assert response.status_code == 200
+        assert response.text == registry.prometheus()
+        assert httpx.get(f"http://127.0.0.1:{port}/other").status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
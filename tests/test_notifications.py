@@ -1,6 +1,9 @@
 from bluesky_social.notifications import (
+    fetch_posts,
+    fetch_threads,
     get_notifications,
     get_responses,
+    iter_notifications,
     list_posts_and_responses,
     list_unanswered_responses,
 )
@@ -39,7 +42,7 @@ class DummyClient:
         self.me = type("obj", (), {"handle": "dummy_handle", "did": "dummy_did"})
 
         # Dummy notification list and feed logic
-        def list_notifications():
+        def list_notifications(params=None):
             return type(
                 "obj",
                 (),
@@ -88,9 +91,9 @@ class DummyClient:
 
 def test_get_notifications(capsys):
     client = DummyClient()
-    get_notifications(client)
-    captured = capsys.readouterr().out
-    assert "Notification" in captured
+    notifications = get_notifications(client)
+    assert [info["reason"] for info in notifications] == ["info", "reply"]
+    assert capsys.readouterr().out == ""
 
 
 def test_get_responses():
@@ -101,12 +104,120 @@ def test_get_responses():
 
 def test_list_posts_and_responses(capsys):
     client = DummyClient()
-    list_posts_and_responses(client)
-    captured = capsys.readouterr().out
-    assert "post text" in captured
+    posts = list_posts_and_responses(client)
+    assert posts[0]["text"] == "post text"
+    assert posts[0]["error"] is None
+    assert capsys.readouterr().out == ""
 
 
 def test_list_unanswered_responses():
     client = DummyClient()
     responses = list_unanswered_responses(client)
     assert isinstance(responses, list)
+
+
+def test_fetch_threads_preserves_order_and_reports_failures():
+    client = DummyClient()
+
+    def get_post_thread(query):
+        if query["uri"] == "bad":
+            raise RuntimeError("boom")
+        return DummyThread([DummyReply(query["uri"], "user", "cid", "uri")])
+
+    client.app.bsky.feed.get_post_thread = get_post_thread
+    results = fetch_threads(client, ["a", "bad", "c"], max_workers=3)
+    assert [r["uri"] for r in results] == ["a", "bad", "c"]
+    assert results[0]["thread"].thread.replies[0].post.record.text == "a"
+    assert results[1]["thread"] is None
+    assert isinstance(results[1]["error"], RuntimeError)
+    assert results[2]["error"] is None
+
+
+def test_list_unanswered_responses_skips_failed_threads(caplog):
+    client = DummyClient()
+
+    def get_post_thread(query):
+        raise RuntimeError("boom")
+
+    client.app.bsky.feed.get_post_thread = get_post_thread
+    responses = list_unanswered_responses(client, max_workers=2)
+    assert responses == []
+    assert "Error processing thread" in caplog.text
+
+
+def test_iter_notifications_follows_cursor_and_stops_at_since():
+    client = DummyClient()
+    pages = {
+        None: (
+            [
+                DummyNotification("a", "reply", "c1", "u1", "t1"),
+                DummyNotification("b", "like", "c2", "u2", "t2"),
+            ],
+            "next",
+        ),
+        "next": ([DummyNotification("c", "reply", "c3", "u3", "t3")], None),
+    }
+    for i, notification in enumerate(pages[None][0] + pages["next"][0]):
+        notification.indexed_at = f"2024-01-0{3 - i}T00:00:00Z"
+
+    def list_notifications(params=None):
+        items, cursor = pages[params["cursor"]]
+        return type("obj", (), {"notifications": items, "cursor": cursor})
+
+    client.app.bsky.notification.list_notifications = list_notifications
+    assert [n.uri for n in iter_notifications(client)] == ["u1", "u2", "u3"]
+    recent = iter_notifications(client, since="2024-01-02T00:00:00Z")
+    assert [n.uri for n in recent] == ["u1"]
+
+
+def test_fetch_posts_batches_uris():
+    client = DummyClient()
+    calls = []
+
+    def get_posts(params):
+        calls.append(params["uris"])
+        return type(
+            "obj",
+            (),
+            {"posts": [type("obj", (), {"uri": uri}) for uri in params["uris"]]},
+        )
+
+    client.app.bsky.feed.get_posts = get_posts
+    uris = [f"u{i}" for i in range(60)]
+    posts = fetch_posts(client, uris + ["u0"], max_workers=3)
+    assert list(posts) == uris
+    assert sorted(len(batch) for batch in calls) == [10, 25, 25]
+
+
+def test_list_unanswered_responses_only_fetches_threads_with_replies():
+    client = DummyClient()
+    notifications = [
+        DummyNotification(f"user{i}", "reply", f"cid{i}", f"uri{i}", f"text{i}")
+        for i in range(3)
+    ]
+    client.app.bsky.notification.list_notifications = lambda params=None: type(
+        "obj", (), {"notifications": notifications}
+    )
+    reply_counts = {"uri0": 0, "uri1": 2}
+
+    def get_posts(params):
+        posts = [
+            type("obj", (), {"uri": uri, "reply_count": reply_counts[uri]})
+            for uri in params["uris"]
+            if uri in reply_counts
+        ]
+        return type("obj", (), {"posts": posts})
+
+    threads = []
+
+    def get_post_thread(query):
+        threads.append(query)
+        return DummyThread([DummyReply("thanks", "dummy_handle", "c", "u")])
+
+    client.app.bsky.feed.get_posts = get_posts
+    client.app.bsky.feed.get_post_thread = get_post_thread
+    responses = list_unanswered_responses(client, depth=2)
+    assert [r["uri"] for r in responses] == ["uri0"]
+    # uri2 could not be hydrated, so it falls back to a thread lookup too
+    assert sorted(query["uri"] for query in threads) == ["uri1", "uri2"]
+    assert {query["depth"] for query in threads} == {2}
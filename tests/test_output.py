@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from bluesky_social.output import RecordWriter, write_records
+
+RECORDS = [
+    {"uri": "at://a", "text": 'héllo, "world"', "replies": ["one", "two"]},
+    {"uri": "at://b", "text": "second", "replies": []},
+]
+FIELDS = ("uri", "text", "replies")
+
+
+def written(format, records=RECORDS, text=None):
+    stream = io.StringIO()
+    count = write_records(records, format, FIELDS, text, stream=stream)
+    return count, stream.getvalue()
+
+
+def test_json_jsonl_and_csv_round_trip():
+    count, output = written("json")
+    assert count == 2
+    assert json.loads(output) == RECORDS
+    assert json.loads(written("json", [])[1]) == []
+
+    _, output = written("jsonl")
+    assert [json.loads(line) for line in output.splitlines()] == RECORDS
+
+    _, output = written("csv")
+    rows = list(csv.DictReader(io.StringIO(output)))
+    assert rows[0]["text"] == RECORDS[0]["text"]
+    assert json.loads(rows[0]["replies"]) == ["one", "two"]
+    assert list(rows[0]) == list(FIELDS)
+
+
+def test_text_uses_the_formatter_with_record_numbers():
+    _, output = written("text", text=lambda i, record: f"{i}. {record['uri']}")
+    assert output == "1. at://a\n2. at://b\n"
+    with pytest.raises(ValueError):
+        RecordWriter(io.StringIO(), "xml", FIELDS)
+
+
+def test_records_are_written_as_they_are_produced():
+    stream = io.StringIO()
+    seen = []
+
+    def records():
+        for record in RECORDS:
+            yield record
+            # The previous record is already in the stream
+            seen.append(stream.getvalue().count("at://"))
+
+    write_records(records(), "jsonl", FIELDS, stream=stream)
+    assert seen == [1, 2]
+
+
+def test_a_failed_listing_does_not_look_complete():
+    def records():
+        yield RECORDS[0]
+        raise RuntimeError("page 2 failed")
+
+    stream = io.StringIO()
+    with pytest.raises(RuntimeError):
+        write_records(records(), "json", FIELDS, stream=stream)
+    assert not stream.getvalue().endswith("]\n")
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(stream.getvalue())
+
+
+def test_write_records_closes_its_stdout_wrapper(tmp_path, monkeypatch):
+    path = tmp_path / "stdout.txt"
+    with open(path, "w") as stdout:
+        monkeypatch.setattr(sys, "stdout", stdout)
+        assert write_records(RECORDS, "jsonl", FIELDS) == 2
+        # The buffered wrapper was flushed and closed, standard output was not
+        assert path.read_text().count("\n") == 2
+        print("still open", file=stdout)
+    assert path.read_text().endswith("still open\n")
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timezone
+
+from bluesky_social.pagination import achunked, chunked, paginate, parse_timestamp
+
+
+class DummyPage:
+    def __init__(self, items, cursor):
+        self.items = items
+        self.cursor = cursor
+
+
+def make_fetcher(pages):
+    calls = []
+
+    def fetch_page(cursor):
+        calls.append(cursor)
+        return pages[cursor]
+
+    return fetch_page, calls
+
+
+def test_paginate_follows_cursor():
+    pages = {
+        None: DummyPage([1, 2], "c1"),
+        "c1": DummyPage([3, 4], "c2"),
+        "c2": DummyPage([5], None),
+    }
+    for prefetch in (True, False):
+        fetch_page, calls = make_fetcher(pages)
+        assert list(paginate(fetch_page, "items", prefetch=prefetch)) == [1, 2, 3, 4, 5]
+        assert calls == [None, "c1", "c2"]
+
+
+def test_paginate_stops_on_empty_page_and_repeated_cursor():
+    fetch_page, calls = make_fetcher(
+        {None: DummyPage([1], "c1"), "c1": DummyPage([], "c2")}
+    )
+    assert list(paginate(fetch_page, "items")) == [1]
+    assert calls == [None, "c1"]
+
+    fetch_page, calls = make_fetcher(
+        {None: DummyPage([1], "c1"), "c1": DummyPage([2], "c1")}
+    )
+    assert list(paginate(fetch_page, "items", prefetch=False)) == [1, 2]
+
+
+def test_paginate_is_lazy():
+    fetch_page, calls = make_fetcher(
+        {None: DummyPage([1, 2], "c1"), "c1": DummyPage([3], None)}
+    )
+    items = paginate(fetch_page, "items", prefetch=False)
+    assert next(items) == 1
+    assert calls == [None]
+    items.close()
+
+
+def test_parse_timestamp():
+    expected = datetime(2024, 5, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+    assert parse_timestamp("2024-05-01T12:00:00.123Z") == expected
+    assert parse_timestamp("2024-05-01T12:00:00.123000+00:00") == expected
+    assert parse_timestamp("2024-05-01T12:00:00.1230000Z") == expected
+    assert parse_timestamp(datetime(2024, 5, 1)).tzinfo is timezone.utc
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 3)) == []
+
+
+def test_achunked():
+    async def numbers(count):
+        for number in range(count):
+            yield number
+
+    async def collect(count, size):
+        return [chunk async for chunk in achunked(numbers(count), size)]
+
+    assert asyncio.run(collect(5, 2)) == [[0, 1], [2, 3], [4]]
+    assert asyncio.run(collect(0, 3)) == []
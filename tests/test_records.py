@@ -0,0 +1,79 @@
+import dataclasses
+import json
+import pickle
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from bluesky_social.notifications import post_summary
+from bluesky_social.records import (
+    NotificationRecord,
+    ResponseRecord,
+    as_dicts,
+    extract,
+    notification_record,
+    response_record,
+)
+
+
+def notification(handle, text="hi", reason="reply"):
+    return SimpleNamespace(
+        uri="at://u",
+        cid="cid",
+        reason=reason,
+        author=SimpleNamespace(handle=handle),
+        record=SimpleNamespace(text=text),
+    )
+
+
+def test_records_are_frozen_slotted_mappings():
+    record = response_record(notification("alice.test"))
+    assert record == {
+        "cid": "cid",
+        "uri": "at://u",
+        "author": "alice.test",
+        "text": "hi",
+        "root_uri": None,
+        "root_cid": None,
+    }
+    assert record["author"] == "alice.test" and record.get("missing") is None
+    assert list(record)[:4] == ["cid", "uri", "author", "text"]
+    assert {**record, "extra": 1}["extra"] == 1
+    assert json.loads(json.dumps(record.as_dict()))["text"] == "hi"
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.text = "changed"
+    with pytest.raises(KeyError):
+        record["missing"]
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert len({record, response_record(notification("alice.test"))}) == 1
+
+
+def test_extract_tolerates_missing_parts_and_interns_handles():
+    assert extract(None) == (None, None, None, None)
+    assert extract(SimpleNamespace(cid="c", author=None)) == ("c", None, None, None)
+
+    handle = "".join(["bob", ".test"])
+    first = notification_record(notification(handle), intern_handles=True)
+    second = notification_record(notification("".join(["bob", ".test"])), True)
+    assert first.author is second.author is sys.intern("bob.test")
+    assert isinstance(first, NotificationRecord) and first.reason == "reply"
+    assert as_dicts([first])[0]["author"] == "bob.test"
+    assert ResponseRecord(**dict(response_record(None))) == response_record(None)
+
+
+def test_post_summary_reads_replies_or_the_thread_error():
+    item = SimpleNamespace(post=notification("me.test", "my post"), reply_count=1)
+    reply = SimpleNamespace(post=notification("bob.test", "a reply"))
+    thread = SimpleNamespace(thread=SimpleNamespace(replies=[reply]))
+
+    ok = post_summary(
+        item, {"at://u": {"uri": "at://u", "thread": thread, "error": None}}
+    )
+    assert (ok.text, ok.replies, ok.error) == ("my post", ("a reply",), None)
+
+    failed = {"at://u": {"uri": "at://u", "thread": None, "error": ValueError("x")}}
+    assert post_summary(item, failed).error == "ValueError('x')"
+    quiet = SimpleNamespace(post=item.post, reply_count=0)
+    assert post_summary(quiet, {}).replies == ()
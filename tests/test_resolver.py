@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bluesky_social import resolver as resolver_module
+from bluesky_social.resolver import IdentityResolver
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache():
+    resolver_module._shared_memory.clear()
+    yield
+    resolver_module._shared_memory.clear()
+
+
+class ProfilesClient:
+    def __init__(self, known):
+        self.calls = []
+
+        def get_profiles(params):
+            self.calls.append(list(params["actors"]))
+            return SimpleNamespace(
+                profiles=[
+                    SimpleNamespace(
+                        did=f"did:plc:{name}", handle=name, display_name=None
+                    )
+                    for name in params["actors"]
+                    if name in known
+                ]
+            )
+
+        self.app = SimpleNamespace(
+            bsky=SimpleNamespace(actor=SimpleNamespace(get_profiles=get_profiles))
+        )
+
+
+def test_resolve_handles_batches_and_caches():
+    handles = [f"user{i}.test" for i in range(30)]
+    client = ProfilesClient(known=set(handles))
+    resolver = IdentityResolver(client)
+
+    dids = resolver.resolve_handles(["@User0.test", *handles, "ghost.test"])
+    assert dids == {handle: f"did:plc:{handle}" for handle in handles}
+    assert [len(call) for call in client.calls] == [25, 6]
+    assert resolver.stats() == {"hits": 0, "misses": 31, "requests": 2}
+
+    assert resolver.resolve_handle("user7.test") == "did:plc:user7.test"
+    assert (
+        resolver.get_profiles(["did:plc:user8.test"])["did:plc:user8.test"]["handle"]
+        == "user8.test"
+    )
+    assert len(client.calls) == 2
+    assert resolver.hits == 2
+
+
+def test_disk_cache_outlives_the_process_cache(tmp_path):
+    path = str(tmp_path / "identities.sqlite3")
+    client = ProfilesClient(known={"alice.test"})
+    with IdentityResolver(client, path) as resolver:
+        assert resolver.resolve_handle("alice.test") == "did:plc:alice.test"
+
+    resolver_module._shared_memory.clear()
+    with IdentityResolver(client, path) as resolver:
+        assert resolver.resolve_handle("alice.test") == "did:plc:alice.test"
+        assert resolver.hits == 1
+    assert len(client.calls) == 1
+
+    resolver_module._shared_memory.clear()
+    with IdentityResolver(client, path, ttl=0) as resolver:
+        resolver.resolve_handle("alice.test")
+        assert resolver.misses == 1
+    assert len(client.calls) == 2
+
+
+def test_remember_moves_a_handle_to_its_new_owner():
+    resolver = IdentityResolver(ProfilesClient(known=set()))
+    resolver.remember([SimpleNamespace(did="did:plc:old", handle="bob.test")])
+    resolver.remember([SimpleNamespace(did="did:plc:new", handle="Bob.test")])
+    assert resolver.resolve_handle("bob.test") == "did:plc:new"
@@ -0,0 +1,63 @@
+from bluesky_social.bluesky_core import detect_hashtags
+from bluesky_social.richtext import build_facets
+
+
+def facet_texts(text, facets):
+    data = text.encode("utf-8")
+    return [
+        data[facet.index.byte_start : facet.index.byte_end].decode("utf-8")
+        for facet in facets
+    ]
+
+
+def test_build_facets_finds_tags_mentions_and_links():
+    text = (
+        "Grüße @Alice.bsky.social and @nobody.example! "
+        "See https://example.com/a_(b). #café (#tag) a#b"
+    )
+    calls = []
+
+    def resolve(handles):
+        calls.append(handles)
+        return {"alice.bsky.social": "did:plc:alice"}
+
+    facets = build_facets(text, resolve)
+    assert calls == [["alice.bsky.social", "nobody.example"]]
+    assert facet_texts(text, facets) == [
+        "@Alice.bsky.social",
+        "https://example.com/a_(b)",
+        "#café",
+        "#tag",
+    ]
+    features = [facet.features[0] for facet in facets]
+    assert features[0].did == "did:plc:alice"
+    assert features[1].uri == "https://example.com/a_(b)"
+    assert [features[2].tag, features[3].tag] == ["café", "tag"]
+
+
+def test_build_facets_skips_mentions_without_resolver():
+    facets = build_facets("(see https://example.com) @alice.bsky.social")
+    assert facet_texts("(see https://example.com) @alice.bsky.social", facets) == [
+        "https://example.com"
+    ]
+
+
+def test_tags_stop_at_spaces_punctuation_and_emoji():
+    text = "#python… more #tag\xa0x #fun🎉 #x—y #2024 #1_2 #snake_ #日本語 #" + "a" * 65
+    facets = detect_hashtags(text)
+    assert [facet.features[0].tag for facet in facets] == [
+        "python",
+        "tag",
+        "fun",
+        "x",
+        "snake",
+        "日本語",
+    ]
+    assert facet_texts(text, facets) == [
+        "#python",
+        "#tag",
+        "#fun",
+        "#x",
+        "#snake",
+        "#日本語",
+    ]
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import httpx
+import pytest
+from atproto import Client
+from atproto.exceptions import BadRequestError, NetworkError, RequestException
+
+from bluesky_social.scheduler import RequestScheduler, ScheduledRequest, TokenBucket
+
+
+def scheduled_client(handler, **scheduler_args):
+    now = [1000.0]
+    sleeps = []
+
+    def sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    scheduler = RequestScheduler(sleep=sleep, clock=lambda: now[0], **scheduler_args)
+    request = ScheduledRequest(scheduler, transport=httpx.MockTransport(handler))
+    return Client(base_url="https://pds.test/xrpc", request=request), sleeps
+
+
+def resolved(request):
+    return httpx.Response(200, json={"did": "did:plc:alice"})
+
+
+def test_reads_retry_rate_limits_and_server_errors():
+    statuses = [429, 503]
+
+    def handler(request):
+        if statuses:
+            return httpx.Response(
+                statuses.pop(0), headers={"retry-after": "7"}, json={"error": "Busy"}
+            )
+        return resolved(request)
+
+    client, sleeps = scheduled_client(handler, base_delay=0.5)
+    response = client.com.atproto.identity.resolve_handle({"handle": "alice.test"})
+    assert response.did == "did:plc:alice"
+    # The 429 waits for retry-after; the 503 backs off with jitter
+    assert sleeps[0] == 7.0
+    assert 0 <= sleeps[1] <= 1.0
+    assert client.request.scheduler.retries == 2
+
+
+def test_reads_give_up_after_max_retries_and_never_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502 if len(calls) < 10 else 400, json={"error": "X"})
+
+    client, _ = scheduled_client(handler, max_retries=2)
+    with pytest.raises(NetworkError):
+        client.com.atproto.identity.resolve_handle({"handle": "alice.test"})
+    assert len(calls) == 3
+
+    calls[:] = [None] * 10
+    with pytest.raises(BadRequestError):
+        client.com.atproto.identity.resolve_handle({"handle": "alice.test"})
+    assert len(calls) == 11
+
+
+def test_writes_retry_only_when_rate_limited():
+    statuses = [429, 200, 503]
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(statuses.pop(0), json={})
+
+    client, sleeps = scheduled_client(handler)
+    record = {"repo": "did:plc:alice", "collection": "app.bsky.feed.post", "rkey": "a"}
+    client.com.atproto.repo.delete_record(record)
+    assert len(calls) == 2 and len(sleeps) == 1
+    # A failed write may have been applied, so it is not sent again
+    with pytest.raises(RequestException):
+        client.com.atproto.repo.delete_record(record)
+    assert len(calls) == 3
+
+
+def test_budget_from_headers_throttles_before_the_limit():
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={
+                "ratelimit-limit": "10",
+                "ratelimit-remaining": "0",
+                "ratelimit-reset": "1030",
+                "ratelimit-policy": "10;w=100",
+            },
+            json={"did": "did:plc:alice"},
+        )
+
+    client, sleeps = scheduled_client(handler)
+    scheduler = client.request.scheduler
+    send = client.request._client.get
+    scheduler.call("app.bsky.feed.getPosts", False, lambda: send("https://pds.test/"))
+    assert sleeps == []
+    # The response reported an empty budget: wait for one token to refill
+    scheduler.call("app.bsky.feed.getPosts", False, lambda: send("https://pds.test/"))
+    assert sleeps == [pytest.approx(10.0)]
+    # Other endpoints have their own budget
+    scheduler.call(
+        "app.bsky.actor.getProfiles", False, lambda: send("https://pds.test/")
+    )
+    assert len(sleeps) == 1
+
+
+def test_token_bucket_refills_at_the_policy_rate():
+    bucket = TokenBucket()
+    assert bucket.acquire(0.0) == 0.0
+    bucket.update(
+        {
+            "ratelimit-limit": "5",
+            "ratelimit-remaining": "1",
+            "ratelimit-policy": "5;w=10",
+        },
+        now=100.0,
+    )
+    assert bucket.acquire(100.0) == 0.0
+    assert bucket.acquire(100.0) == pytest.approx(2.0)
+    assert bucket.acquire(102.0) == 0.0
+
+
+def test_writes_are_sent_one_at_a_time_in_order():
+    scheduler = RequestScheduler()
+    order = []
+    active = []
+
+    def send(n):
+        def request():
+            active.append(n)
+            assert len(active) == 1
+            time.sleep(0.01)
+            order.append(n)
+            active.remove(n)
+            return httpx.Response(200)
+
+        return request
+
+    threads = []
+    for n in range(5):
+        thread = threading.Thread(target=scheduler.call, args=("x", True, send(n)))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.002)
+    for thread in threads:
+        thread.join()
+    assert order == list(range(5))
+
+
+def test_blob_uploads_run_concurrently_and_retry_like_reads():
+    both_sending = threading.Barrier(2, timeout=5)
+    statuses = [503]
+    blob = {
+        "$type": "blob",
+        "ref": {"$link": "bafkreibme22gw2h7y2h7tg2fhqotaqjucnbc24deqo72b6mkl2egezxhvy"},
+        "mimeType": "image/png",
+        "size": 3,
+    }
+
+    def handler(request):
+        if statuses:
+            return httpx.Response(statuses.pop(0), json={"error": "Busy"})
+        # Blocks until the other upload is in flight as well
+        both_sending.wait()
+        return httpx.Response(200, json={"blob": blob})
+
+    client, sleeps = scheduled_client(handler)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.upload_blob(b"png")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 2
+    assert client.request.scheduler.retries == 1 and len(sleeps) == 1
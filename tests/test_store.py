@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+from bluesky_social.notifications import list_unanswered_responses, sync_store
+from bluesky_social.store import NotificationStore
+
+ME = "did:plc:me"
+
+
+def make_notification(uri, reason, indexed_at, parent_uri=None, text="hi"):
+    reply = None
+    if parent_uri:
+        reply = SimpleNamespace(
+            parent=SimpleNamespace(uri=parent_uri, cid="pcid"),
+            root=SimpleNamespace(uri="root", cid="rcid"),
+        )
+    return SimpleNamespace(
+        uri=uri,
+        cid=f"cid-{uri}",
+        reason=reason,
+        indexed_at=indexed_at,
+        author=SimpleNamespace(handle=f"author-{uri}", did=f"did:{uri}"),
+        record=SimpleNamespace(text=text, reply=reply),
+    )
+
+
+def make_feed_item(uri, indexed_at, parent_uri=None, author=ME):
+    reply = (
+        SimpleNamespace(parent=SimpleNamespace(uri=parent_uri)) if parent_uri else None
+    )
+    return SimpleNamespace(
+        post=SimpleNamespace(
+            uri=uri,
+            cid=f"cid-{uri}",
+            indexed_at=indexed_at,
+            reply_count=0,
+            author=SimpleNamespace(did=author),
+            record=SimpleNamespace(text=f"text-{uri}", reply=reply),
+        ),
+        reason=None,
+    )
+
+
+class StoreClient:
+    def __init__(self, notifications, feed):
+        self.me = SimpleNamespace(handle="me.bsky.social", did=ME)
+        self.notification_calls = []
+        self.thread_calls = 0
+
+        def list_notifications(params):
+            self.notification_calls.append(params)
+            return SimpleNamespace(notifications=list(notifications), cursor=None)
+
+        def get_author_feed(params):
+            return SimpleNamespace(feed=list(feed), cursor=None)
+
+        def get_post_thread(params):
+            self.thread_calls += 1
+            raise AssertionError("store queries must not fetch threads")
+
+        self.app = SimpleNamespace(
+            bsky=SimpleNamespace(
+                notification=SimpleNamespace(list_notifications=list_notifications),
+                feed=SimpleNamespace(
+                    get_author_feed=get_author_feed, get_post_thread=get_post_thread
+                ),
+            )
+        )
+
+
+def test_unanswered_responses_query():
+    store = NotificationStore(":memory:")
+    store.add_notifications(
+        ME,
+        [
+            make_notification("r1", "reply", "2024-01-03T00:00:00Z", "p1"),
+            make_notification("r2", "reply", "2024-01-02T00:00:00Z", "p1"),
+            make_notification("l1", "like", "2024-01-01T00:00:00Z"),
+        ],
+    )
+    store.add_posts(
+        ME,
+        [
+            make_feed_item("p1", "2024-01-01T00:00:00Z"),
+            make_feed_item("answer", "2024-01-04T00:00:00Z", parent_uri="r2"),
+            make_feed_item("repost", "2024-01-04T00:00:00Z", author="did:other"),
+        ],
+    )
+    unanswered = store.unanswered_responses(ME)
+    assert [r["uri"] for r in unanswered] == ["r1"]
+    assert store.unanswered_responses("did:plc:someone-else") == []
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+    posts = {p["uri"]: p for p in store.posts(ME)}
+    assert set(posts) == {"p1", "answer"}
+    assert posts["p1"]["replies"] == ["hi", "hi"]
+    assert posts["answer"]["replies"] == []
+    # Replies are fetched for all posts at once, not per post
+    assert len(statements) == 2
+    store.close()
+
+
+def test_sync_store_only_pulls_deltas(tmp_path):
+    notifications = [make_notification("r1", "reply", "2024-01-02T00:00:00Z", "p1")]
+    client = StoreClient(notifications, [make_feed_item("p1", "2024-01-01T00:00:00Z")])
+    with NotificationStore(str(tmp_path / "cache" / "store.sqlite3")) as store:
+        assert sync_store(client, store) == (1, 1)
+        assert store.get_state(ME, "notifications_indexed_at") == (
+            "2024-01-02T00:00:00+00:00"
+        )
+        # Nothing newer than the stored marker: the iterator stops immediately
+        assert sync_store(client, store) == (0, 0)
+
+
+def test_sync_marker_ignores_the_pinned_post_and_never_moves_back():
+    pinned = make_feed_item("pinned", "2020-01-01T00:00:00Z")
+    pinned.reason = SimpleNamespace(py_type="app.bsky.feed.defs#reasonPin")
+    client = StoreClient([], [pinned, make_feed_item("p1", "2024-01-01T00:00:00Z")])
+    store = NotificationStore(":memory:")
+    assert sync_store(client, store) == (0, 2)
+    assert store.get_state(ME, "feed_indexed_at") == "2024-01-01T00:00:00+00:00"
+    # Only the pinned post is listed again, and it is older than the marker
+    assert sync_store(client, store) == (0, 1)
+    assert store.get_state(ME, "feed_indexed_at") == "2024-01-01T00:00:00+00:00"
+
+
+def test_list_unanswered_responses_from_store():
+    notifications = [make_notification("r1", "reply", "2024-01-02T00:00:00Z", "p1")]
+    client = StoreClient(notifications, [])
+    store = NotificationStore(":memory:")
+    responses = list_unanswered_responses(client, store=store)
+    assert responses == [
+        {
+            "cid": "cid-r1",
+            "uri": "r1",
+            "author": "author-r1",
+            "text": "hi",
+            "root_uri": "root",
+            "root_cid": "rcid",
+        }
+    ]
+    assert client.thread_calls == 0
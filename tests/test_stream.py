@@ -0,0 +1,112 @@
+import hashlib
+
+import libipld
+import pytest
+
+from bluesky_social import stream
+from bluesky_social.stream import (
+    encode_frame,
+    iter_stream_replies,
+    read_frames,
+    unanswered_from_stream,
+    write_frames,
+)
+
+ME = "did:plc:me"
+
+
+def varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+def block(value):
+    data = libipld.encode_dag_cbor(value)
+    return b"\x01\x71\x12\x20" + hashlib.sha256(data).digest(), data
+
+
+def commit(repo, rkey, record, extra_blocks=()):
+    cid, data = block(record)
+    header = libipld.encode_dag_cbor({"version": 1, "roots": []})
+    car = varint(len(header)) + header
+    for section_cid, section in [*extra_blocks, (cid, data)]:
+        car += varint(len(section_cid) + len(section)) + section_cid + section
+    ops = [{"action": "create", "path": f"app.bsky.feed.post/{rkey}", "cid": cid}]
+    body = {"repo": repo, "ops": ops, "blocks": car}
+    return encode_frame("#commit", body), libipld.encode_cid(cid)
+
+
+def post(text, parent_uri=None):
+    record = {"$type": "app.bsky.feed.post", "text": text}
+    if parent_uri:
+        ref = {"uri": parent_uri, "cid": "bafyparent"}
+        record["reply"] = {"parent": ref, "root": ref}
+    return record
+
+
+def test_replay_finds_unanswered_replies(tmp_path, monkeypatch):
+    my_post = f"at://{ME}/app.bsky.feed.post/1"
+    other_block = block({"unrelated": True})
+    frames = [
+        commit("did:plc:alice", "a", post("hi", my_post), [other_block])[0],
+        commit("did:plc:bob", "b", post("hey", my_post))[0],
+        commit("did:plc:carol", "c", post("elsewhere", "at://did:plc:x/p/1"))[0],
+        encode_frame("#identity", {"did": "did:plc:bob"}),
+        commit(ME, "r", post("thanks", "at://did:plc:alice/app.bsky.feed.post/a"))[0],
+    ]
+    path = str(tmp_path / "frames.bin")
+    assert write_frames(path, frames) == 5
+
+    decoded = []
+    decode = libipld.decode_dag_cbor
+    monkeypatch.setattr(
+        stream.libipld,
+        "decode_dag_cbor",
+        lambda data: decoded.append(data) or decode(data),
+    )
+    replies = list(iter_stream_replies(read_frames(path), [ME]))
+    assert [(r["author"], r["text"]) for r in replies] == [
+        ("did:plc:alice", "hi"),
+        ("did:plc:bob", "hey"),
+    ]
+    assert replies[0]["uri"] == "at://did:plc:alice/app.bsky.feed.post/a"
+    assert replies[0]["cid"].startswith("bafyrei")
+    # Only post blocks are decoded, never the unrelated block in the CAR
+    assert other_block[1] not in decoded
+    assert len(decoded) == 4
+
+    unanswered = unanswered_from_stream(read_frames(path), [ME])
+    assert [r["author"] for r in unanswered] == ["did:plc:bob"]
+
+
+def test_firehose_raises_when_the_client_fails(monkeypatch):
+    import atproto
+
+    class Message:
+        type = "#identity"
+        body = {"did": ME}
+
+    class FailingClient:
+        stopped = False
+
+        def __init__(self, params, base_uri):
+            pass
+
+        def start(self, on_message):
+            on_message(Message())
+            raise ConnectionError("socket closed")
+
+        def stop(self):
+            FailingClient.stopped = True
+
+    monkeypatch.setattr(atproto, "FirehoseSubscribeReposClient", FailingClient)
+    frames = stream.firehose_frames()
+    assert next(frames) == ("#identity", {"did": ME})
+    with pytest.raises(ConnectionError, match="socket closed"):
+        next(frames)
+    assert FailingClient.stopped
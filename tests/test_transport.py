@@ -0,0 +1,45 @@
+import httpx
+
+from bluesky_social.scheduler import RequestScheduler
+from bluesky_social.transport import HttpPool, create_client
+
+
+def test_clients_share_one_pool():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"did": "did:plc:alice"})
+
+    pool = HttpPool(max_connections=4, transport=httpx.MockTransport(handler))
+    first = create_client("https://pds.test/xrpc", pool=pool)
+    second = create_client("https://pds.test/xrpc", pool=pool)
+    assert first.request._client is second.request._client is pool.client
+    assert first.request.scheduler is not second.request.scheduler
+
+    for client in (first, second):
+        response = client.com.atproto.identity.resolve_handle({"handle": "a.test"})
+        assert response.did == "did:plc:alice"
+    assert len(seen) == 2
+
+    # Closing one client leaves the pool usable by the others
+    first.request.close()
+    assert not pool.client.is_closed
+    pool.close()
+    assert pool.client.is_closed
+
+
+def test_clones_keep_the_pool_and_scheduler():
+    scheduler = RequestScheduler()
+    with HttpPool() as pool:
+        request = pool.request(scheduler)
+        clone = request.clone()
+        assert clone.pool is pool and clone.scheduler is scheduler
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(
+        "bluesky_social.transport.importlib.util.find_spec", lambda name: None
+    )
+    with HttpPool(http2=True) as pool:
+        assert pool.http2 is False
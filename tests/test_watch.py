@@ -0,0 +1,100 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from atproto.exceptions import RateLimitExceededError
+from atproto_client.request import Response
+
+from bluesky_social.watch import NotificationWatcher, rate_limit_delay
+
+
+def notification(n):
+    return SimpleNamespace(
+        author=SimpleNamespace(handle=f"user{n}"),
+        reason="reply",
+        cid=f"cid{n}",
+        uri=f"uri{n}",
+        record=SimpleNamespace(text=f"text{n}"),
+        indexed_at=f"2024-01-01T00:00:{n:02d}Z",
+    )
+
+
+class WatchClient:
+    def __init__(self, polls):
+        # Each poll sees the full newest-first list available at that time
+        self.polls = polls
+        self.requests = []
+
+        def list_notifications(params=None):
+            self.requests.append(params)
+            items = self.polls[min(len(self.requests) - 1, len(self.polls) - 1)]
+            if isinstance(items, Exception):
+                raise items
+            return SimpleNamespace(notifications=items[: params["limit"]], cursor=None)
+
+        self.app = SimpleNamespace(
+            bsky=SimpleNamespace(
+                notification=SimpleNamespace(list_notifications=list_notifications)
+            )
+        )
+
+
+def test_watcher_emits_only_new_notifications_in_order():
+    old = [notification(1)]
+    client = WatchClient(
+        [old, old, [notification(3), notification(2), *old], [notification(3)]]
+    )
+    emitted = []
+    watcher = NotificationWatcher(client, emitted.append, min_interval=0)
+    assert watcher.run(max_polls=4) == 2
+    assert [info["uri"] for info in emitted] == ["uri2", "uri3"]
+    assert client.requests[0]["limit"] == 1
+    json.dumps(emitted)
+
+
+def test_watcher_keeps_notifications_sharing_the_last_seen_time():
+    def at(uri, second):
+        return SimpleNamespace(**{**vars(notification(second)), "uri": uri})
+
+    first, second, late = at("a", 2), at("b", 2), at("c", 2)
+    client = WatchClient(
+        [[first, notification(1)], [second, first], [late, second, first]]
+    )
+    emitted = []
+    watcher = NotificationWatcher(client, emitted.append, min_interval=0)
+    watcher.run(max_polls=3)
+    # "a" existed at start; "b" and "c" arrived later with the same timestamp
+    assert [info["uri"] for info in emitted] == ["b", "c"]
+
+
+def test_watcher_backs_off_when_idle_and_tightens_on_activity():
+    watcher = NotificationWatcher(
+        WatchClient([[]]), min_interval=1, max_interval=10, backoff=2
+    )
+    assert watcher._next_interval(0) == 2
+    watcher.interval = 10
+    assert watcher._next_interval(0) == 10
+    assert watcher._next_interval(3) == 5
+    assert watcher._next_interval(watcher.page_size) == 2.5
+
+
+def test_watcher_waits_for_rate_limit_reset():
+    reset = datetime.now(timezone.utc) + timedelta(seconds=120)
+    error = RateLimitExceededError(
+        Response(
+            success=False,
+            status_code=429,
+            content=None,
+            headers={"ratelimit-reset": str(int(reset.timestamp()))},
+        )
+    )
+    assert 100 < rate_limit_delay(error, 5) <= 120
+
+    client = WatchClient([[notification(1)], error, [notification(2)]])
+    emitted = []
+    watcher = NotificationWatcher(client, emitted.append, since="2024-01-01T00:00:00Z")
+    watcher._stop.wait = lambda delay: delays.append(delay)
+    delays = []
+    watcher.run(max_polls=3)
+    assert [info["uri"] for info in emitted] == ["uri1", "uri2"]
+    assert delays[1] > 100